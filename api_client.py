@@ -0,0 +1,213 @@
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+# 管理后台接口的公共前缀
+ADMIN_BASE_URL = "http://admin.btest4wohjelay.com:3000/adminsystem/server/newgamemanager"
+
+DEFAULT_HEADERS: Dict[str, str] = {
+    "Accept": "application/json, text/plain, */*",
+    "Accept-Language": "zh-TW,zh;q=0.9,en;q=0.8,en-GB;q=0.7,en-US;q=0.6,zh-CN;q=0.5",
+}
+
+# 遇到这些状态码时按退避策略重试
+RETRY_STATUS_CODES = {500, 502, 503, 504}
+
+# 默认只自动重试幂等方法；POST 等请求可能已被服务端处理，重发会重复提交
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+
+class RateLimiter:
+    """
+    按主机限速：同一主机相邻两次请求的发起时间至少间隔 1/max_rps 秒。
+    max_rps <= 0 表示不限速。线程安全，可在多个工作线程间共享。
+    """
+
+    def __init__(self, max_rps: float) -> None:
+        self.interval = 1.0 / max_rps if max_rps > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next_slot: Dict[str, float] = {}
+
+    def wait(self, url: str) -> None:
+        if self.interval <= 0:
+            return
+        host = urlsplit(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.interval
+        delay = slot - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+
+@dataclass
+class RequestTiming:
+    method: str
+    url: str
+    status: Optional[int]
+    elapsed: float
+    attempts: int
+
+
+class ApiClient:
+    """
+    基于 requests.Session 的共享客户端：
+    - 连接池与 keep-alive，pool_size 控制每个主机保持的连接数
+    - 超时、连接错误与 5xx 响应按带抖动的指数退避重试（最多 retries 次）；
+      只对幂等方法自动重试，其他方法需在调用时传 retry=True（连接超时除外，此时请求尚未发出）
+    - 记录每个请求的耗时，可通过 summary() 输出统计
+    """
+
+    def __init__(
+        self,
+        headers: Optional[Dict[str, str]] = None,
+        pool_size: int = 10,
+        retries: int = 3,
+        backoff: float = 0.5,
+        max_backoff: float = 10.0,
+        timeout: float = 15.0,
+        rate_limiter: Optional[RateLimiter] = None,
+    ) -> None:
+        self.retries = max(0, retries)
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.rate_limiter = rate_limiter
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update(DEFAULT_HEADERS)
+        if headers:
+            self.session.headers.update(headers)
+
+        self._lock = threading.Lock()
+        self.timings: List[RequestTiming] = []
+
+    def backoff_delay(self, attempt: int) -> float:
+        """
+        第 attempt 次重试前的等待时间（full jitter）：在 [0, backoff * 2^attempt] 内随机取值。
+        """
+        return random.uniform(0, min(self.max_backoff, self.backoff * (2 ** attempt)))
+
+    def request(self, method: str, url: str, retry: Optional[bool] = None, **kwargs: Any) -> requests.Response:
+        kwargs.setdefault("timeout", self.timeout)
+        if retry is None:
+            retry = method.upper() in IDEMPOTENT_METHODS
+        attempt = 0
+        while True:
+            if self.rate_limiter is not None:
+                self.rate_limiter.wait(url)
+            _rewind_bodies(kwargs)
+            start = time.perf_counter()
+            try:
+                resp = self.session.request(method, url, **kwargs)
+            except (requests.Timeout, requests.ConnectionError) as e:
+                self._record(method, url, None, time.perf_counter() - start, attempt + 1)
+                if attempt >= self.retries or not (retry or isinstance(e, requests.ConnectTimeout)):
+                    raise
+            else:
+                self._record(method, url, resp.status_code, time.perf_counter() - start, attempt + 1)
+                if not retry or resp.status_code not in RETRY_STATUS_CODES or attempt >= self.retries:
+                    return resp
+                resp.close()
+            time.sleep(self.backoff_delay(attempt))
+            attempt += 1
+
+    def get(self, url: str, **kwargs: Any) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs: Any) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def close(self) -> None:
+        self.session.close()
+
+    def __enter__(self) -> "ApiClient":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def _record(self, method: str, url: str, status: Optional[int], elapsed: float, attempts: int) -> None:
+        with self._lock:
+            self.timings.append(RequestTiming(method, url, status, elapsed, attempts))
+
+    def summary(self) -> str:
+        """
+        返回请求耗时统计的单行摘要。
+        """
+        with self._lock:
+            elapsed = sorted(t.elapsed for t in self.timings)
+            retried = sum(1 for t in self.timings if t.attempts > 1)
+        if not elapsed:
+            return "未发起请求"
+        p95 = elapsed[min(len(elapsed) - 1, int(len(elapsed) * 0.95))]
+        return (
+            f"请求 {len(elapsed)} 次（重试 {retried} 次），"
+            f"平均 {sum(elapsed) / len(elapsed):.3f}s，p95 {p95:.3f}s，最慢 {elapsed[-1]:.3f}s"
+        )
+
+
+def response_ok(resp: requests.Response) -> bool:
+    """
+    判断管理后台接口是否处理成功：HTTP 2xx，且响应 JSON 中的 success / code 字段（若有）表示成功。
+    """
+    return status_text_ok(resp.status_code, resp.text)
+
+
+def status_text_ok(status_code: int, text: str) -> bool:
+    """
+    与 response_ok 相同的判断，直接使用状态码与响应文本（供不经过 requests 的异步上传使用）。
+    """
+    if not 200 <= status_code < 400:
+        return False
+    try:
+        payload = json.loads(text)
+    except ValueError:
+        return True
+    if isinstance(payload, dict):
+        if "success" in payload:
+            return bool(payload["success"])
+        if "code" in payload:
+            return str(payload["code"]) in ("0", "200")
+    return True
+
+
+_default_client: Optional[ApiClient] = None
+_default_client_lock = threading.Lock()
+
+
+def get_default_client() -> ApiClient:
+    """
+    返回进程内共享的默认客户端（首次调用时创建），供未显式传入 client 的函数使用。
+    """
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = ApiClient()
+        return _default_client
+
+
+def _rewind_bodies(kwargs: Dict[str, Any]) -> None:
+    """
+    重试前将 files/data 中的文件对象复位到开头，否则重发时会读到空内容。
+    """
+    bodies: List[Any] = [kwargs.get("data")]
+    files = kwargs.get("files")
+    if isinstance(files, dict):
+        for value in files.values():
+            bodies.append(value[1] if isinstance(value, tuple) and len(value) > 1 else value)
+    for body in bodies:
+        if hasattr(body, "seek") and hasattr(body, "read"):
+            body.seek(0)
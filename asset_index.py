@@ -0,0 +1,358 @@
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from asset_tree import ItemResolver, load_platforms
+from hash_cache import HashCache
+from image_info import ImageHeaderError, read_image_info
+from naming import is_image_name
+from upload_journal import file_sha256
+
+
+DEFAULT_INDEX_PATH = ".asset_index.sqlite"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS assets (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtimeNs INTEGER NOT NULL,
+    sha256 TEXT,
+    width INTEGER,
+    height INTEGER,
+    format TEXT,
+    alpha INTEGER,
+    error TEXT,
+    gamingType TEXT,
+    platformDir TEXT,
+    gamingItemId TEXT,
+    gamingPlatformId TEXT,
+    ahash TEXT,
+    dhash TEXT,
+    phash TEXT
+);
+CREATE INDEX IF NOT EXISTS assets_sha256 ON assets(sha256);
+CREATE INDEX IF NOT EXISTS assets_item ON assets(gamingItemId);
+CREATE INDEX IF NOT EXISTS assets_type_platform ON assets(gamingType, platformDir);
+"""
+
+# 感知哈希列（由 find_duplicate_images.py 按需写入，文件变化时清空）
+PERCEPTUAL_COLUMNS = ("ahash", "dhash", "phash")
+
+# (相对路径, 大小, mtime 纳秒)
+FileStat = Tuple[str, int, int]
+
+
+def scan_images(root: Path) -> Iterator[FileStat]:
+    """
+    用 os.scandir 遍历 root 下的所有图片，产出 (相对路径, 大小, mtime)。
+    """
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as it:
+                entries = list(it)
+        except OSError:
+            continue
+        for entry in entries:
+            try:
+                if entry.is_dir():
+                    stack.append(Path(entry.path))
+                elif is_image_name(entry.name):
+                    st = entry.stat()
+                    yield Path(entry.path).relative_to(root).as_posix(), st.st_size, st.st_mtime_ns
+            except OSError:
+                continue
+
+
+def _describe(root: Path, rel_path: str) -> Dict[str, Any]:
+    path = str(root / rel_path)
+    row: Dict[str, Any] = {"sha256": file_sha256(path), "width": None, "height": None,
+                           "format": None, "alpha": None, "error": None}
+    try:
+        info = read_image_info(path)
+        row.update(width=info.width, height=info.height, format=info.format,
+                   alpha=None if info.alpha is None else int(info.alpha))
+    except ImageHeaderError as e:
+        row["error"] = str(e)
+    return row
+
+
+class AssetIndex:
+    """
+    gamingType 目录树的图片元数据索引（SQLite）：路径、大小、修改时间、SHA-256、尺寸、格式、
+    透明通道以及匹配到的 gamingItemId。refresh 按大小与修改时间比较，只重新读取新增或变化的文件；
+    游戏数据变化时只重新匹配 gamingItemId，不读取文件。路径以相对于 root 的 POSIX 形式保存。
+    上传脚本经由 IndexedHashCache 读取 SHA-256，查重脚本把感知哈希存在同一张表中。
+    查询方法可在多个线程中同时调用。
+    """
+
+    def __init__(self, db_path: str = DEFAULT_INDEX_PATH, root: str = "gamingType") -> None:
+        self.path = db_path
+        self.root = Path(root)
+        self._resolved_root = self.root.resolve()
+        self._lock = threading.Lock()
+        self.last_refresh: Dict[str, int] = {}  # 最近一次 refresh 的统计
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        with self.conn:
+            self.conn.executescript(SCHEMA)
+            columns = {row["name"] for row in self.conn.execute("PRAGMA table_info(assets)")}
+            for column in PERCEPTUAL_COLUMNS:
+                if column not in columns:  # 旧版本创建的索引
+                    self.conn.execute(f"ALTER TABLE assets ADD COLUMN {column} TEXT")
+            stored_root = self._meta("root")
+            if stored_root is not None and stored_root != str(self.root.resolve()):
+                # 换了根目录，旧的相对路径已无意义
+                self.conn.execute("DELETE FROM assets")
+                self.conn.execute("DELETE FROM meta")
+            self._set_meta("root", str(self.root.resolve()))
+
+    def _meta(self, key: str) -> Optional[str]:
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row["value"] if row else None
+
+    def _set_meta(self, key: str, value: str) -> None:
+        self.conn.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (key, value))
+
+    def _match(self, resolver: Optional[ItemResolver], rel_path: str) -> Dict[str, Any]:
+        parts = rel_path.split("/")
+        row: Dict[str, Any] = {
+            "gamingType": parts[0] if len(parts) > 1 else None,
+            "platformDir": parts[1] if len(parts) > 2 else None,
+            "gamingItemId": None,
+            "gamingPlatformId": None,
+        }
+        ref = resolver.resolve(self.root / rel_path, self.root) if resolver is not None else None
+        if ref is not None:
+            row["gamingItemId"] = str(ref[1].get("gamingItemId"))
+            row["gamingPlatformId"] = str(ref[0].get("gamingPlatformId"))
+        return row
+
+    def refresh(
+        self,
+        resolver: Optional[ItemResolver] = None,
+        catalog_key: str = "",
+        workers: int = 8,
+    ) -> Dict[str, int]:
+        """
+        与磁盘同步，返回各类变化的数量。catalog_key 标识游戏数据的版本（例如 JSON 的 sha256），
+        与上次不同时对所有记录重新匹配 gamingItemId。
+        不给 resolver 时只更新文件信息：已有记录保留原来的匹配结果；有新增文件时清除 catalogKey，
+        下次带 resolver 刷新时会重新匹配全部记录。
+        """
+        known = {
+            row["path"]: (row["size"], row["mtimeNs"])
+            for row in self.conn.execute("SELECT path, size, mtimeNs FROM assets")
+        }
+        seen = set()
+        changed: List[FileStat] = []
+        for rel_path, size, mtime_ns in scan_images(self.root):
+            seen.add(rel_path)
+            if known.get(rel_path) != (size, mtime_ns):
+                changed.append((rel_path, size, mtime_ns))
+        removed = [p for p in known if p not in seen]
+
+        stats = {"added": 0, "updated": 0, "removed": len(removed), "rematched": 0, "unchanged": 0}
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            described = list(pool.map(lambda s: _describe(self.root, s[0]), changed))
+
+        with self.conn:
+            self.conn.executemany("DELETE FROM assets WHERE path = ?", [(p,) for p in removed])
+            for (rel_path, size, mtime_ns), row in zip(changed, described):
+                stats["updated" if rel_path in known else "added"] += 1
+                match = self._match(resolver, rel_path)
+                if resolver is None:
+                    # 没有游戏数据时不覆盖已有的匹配结果
+                    del match["gamingItemId"], match["gamingPlatformId"]
+                row.update(match, path=rel_path, size=size, mtimeNs=mtime_ns)
+                row.update(dict.fromkeys(PERCEPTUAL_COLUMNS))
+                columns = ", ".join(row)
+                updates = ", ".join(f"{c} = excluded.{c}" for c in row if c != "path")
+                self.conn.execute(
+                    f"INSERT INTO assets ({columns}) VALUES ({', '.join('?' for _ in row)})"
+                    f" ON CONFLICT(path) DO UPDATE SET {updates}",
+                    list(row.values()),
+                )
+            if resolver is None and stats["added"]:
+                self.conn.execute("DELETE FROM meta WHERE key = 'catalogKey'")
+            if resolver is not None and catalog_key != (self._meta("catalogKey") or ""):
+                changed_paths = {s[0] for s in changed}
+                for rel_path in seen - changed_paths:
+                    match = self._match(resolver, rel_path)
+                    self.conn.execute(
+                        "UPDATE assets SET gamingType = ?, platformDir = ?, gamingItemId = ?, gamingPlatformId = ?"
+                        " WHERE path = ?",
+                        (match["gamingType"], match["platformDir"], match["gamingItemId"],
+                         match["gamingPlatformId"], rel_path),
+                    )
+                    stats["rematched"] += 1
+                self._set_meta("catalogKey", catalog_key)
+        stats["unchanged"] = len(seen) - len(changed)
+        self.last_refresh = stats
+        return stats
+
+    def _rows(self, where: str = "1", params: tuple = ()) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self.conn.execute(f"SELECT * FROM assets WHERE {where} ORDER BY path", params).fetchall()
+        return [dict(row) for row in rows]
+
+    def get(self, path: str) -> Optional[Dict[str, Any]]:
+        """
+        按路径（绝对路径或相对于 root）取记录；文件的大小或修改时间与索引不一致时返回 None。
+        """
+        full = Path(path) if Path(path).is_absolute() else self.root / path
+        try:
+            rel_path = full.resolve().relative_to(self._resolved_root).as_posix()
+            st = os.stat(full)
+        except (OSError, ValueError):
+            return None
+        rows = self._rows("path = ?", (rel_path,))
+        if not rows or (rows[0]["size"], rows[0]["mtimeNs"]) != (st.st_size, st.st_mtime_ns):
+            return None
+        return rows[0]
+
+    def image_hashes(self, path: str) -> Optional[Dict[str, str]]:
+        """
+        返回已记录的感知哈希（aHash / dHash / pHash）；文件不在索引中、已变化或尚未计算时返回 None。
+        """
+        row = self.get(path)
+        if row is None or row["phash"] is None:
+            return None
+        return {column: row[column] for column in PERCEPTUAL_COLUMNS}
+
+    def set_image_hashes(self, path: str, hashes: Dict[str, str]) -> bool:
+        """
+        为索引中未变化的文件记录感知哈希，返回是否写入（不在索引中的文件返回 False）。
+        """
+        row = self.get(path)
+        if row is None:
+            return False
+        with self._lock, self.conn:
+            self.conn.execute(
+                "UPDATE assets SET ahash = ?, dhash = ?, phash = ? WHERE path = ?",
+                (*(hashes[column] for column in PERCEPTUAL_COLUMNS), row["path"]),
+            )
+        return True
+
+    def by_item(self, gaming_item_id: Any) -> List[Dict[str, Any]]:
+        return self._rows("gamingItemId = ?", (str(gaming_item_id),))
+
+    def by_sha256(self, sha256: str) -> List[Dict[str, Any]]:
+        return self._rows("sha256 = ?", (sha256,))
+
+    def assets(self, gaming_type: Optional[str] = None, platform_dir: Optional[str] = None) -> List[Dict[str, Any]]:
+        clauses, params = [], []
+        if gaming_type is not None:
+            clauses.append("gamingType = ?")
+            params.append(str(gaming_type))
+        if platform_dir is not None:
+            clauses.append("platformDir = ?")
+            params.append(platform_dir)
+        return self._rows(" AND ".join(clauses) or "1", tuple(params))
+
+    def duplicate_groups(self) -> List[List[Dict[str, Any]]]:
+        """
+        内容完全相同（SHA-256 相同）的文件分组。
+        """
+        shas = [row["sha256"] for row in self.conn.execute(
+            "SELECT sha256 FROM assets WHERE sha256 IS NOT NULL GROUP BY sha256 HAVING COUNT(*) > 1 ORDER BY sha256"
+        )]
+        return [self.by_sha256(sha) for sha in shas]
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> "AssetIndex":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+class IndexedHashCache(HashCache):
+    """
+    优先使用资源索引的 HashCache：索引中有记录且大小、修改时间未变的文件直接使用索引中的 SHA-256，
+    其他文件（例如索引根目录之外的优化结果）照常计算并缓存在 path 指向的哈希缓存中。
+    """
+
+    def __init__(self, index: AssetIndex, path: str) -> None:
+        super().__init__(path)
+        self.index = index
+
+    def sha256(self, file_path: str) -> str:
+        row = self.index.get(os.path.abspath(file_path))
+        if row is not None and row["sha256"]:
+            return row["sha256"]
+        return super().sha256(file_path)
+
+
+def open_asset_index(
+    db_path: str = DEFAULT_INDEX_PATH,
+    root: str = "gamingType",
+    json_file: Optional[str] = "gaming_platforms.json",
+    workers: int = 8,
+) -> AssetIndex:
+    """
+    打开索引并与磁盘同步；给出 json_file 时同时匹配 gamingItemId。
+    """
+    index = AssetIndex(db_path, root)
+    resolver, catalog_key = None, ""
+    if json_file and os.path.exists(json_file):
+        resolver = ItemResolver(load_platforms(json_file))
+        catalog_key = file_sha256(json_file)
+    index.refresh(resolver, catalog_key, workers)
+    return index
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="维护并查询 gamingType 目录树的图片元数据索引")
+    parser.add_argument("--root", type=str, default="gamingType", help="图片目录树根路径，默认 gamingType")
+    parser.add_argument("--index", type=str, default=DEFAULT_INDEX_PATH, help=f"索引文件路径，默认 {DEFAULT_INDEX_PATH}")
+    parser.add_argument("--json-file", type=str, default="gaming_platforms.json", help="用于匹配 gamingItemId 的游戏数据")
+    parser.add_argument("--workers", type=int, default=8, help="读取文件的线程数，默认 8")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("refresh", help="与磁盘同步索引")
+    query = sub.add_parser("query", help="查询索引（会先同步）")
+    query.add_argument("--item", type=str, default=None, help="按 gamingItemId 查询")
+    query.add_argument("--sha256", type=str, default=None, help="按文件 SHA-256 查询")
+    query.add_argument("--type", dest="gaming_type", type=str, default=None, help="按 gamingType 目录查询")
+    query.add_argument("--platform", type=str, default=None, help="按平台目录查询")
+    query.add_argument("--unmatched", action="store_true", help="只列出未匹配到游戏项的图片")
+    sub.add_parser("duplicates", help="列出内容完全相同的文件")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    if not Path(args.root).is_dir():
+        print(f"目录不存在: {args.root}", file=sys.stderr)
+        sys.exit(1)
+    with open_asset_index(args.index, args.root, args.json_file, args.workers) as index:
+        if args.command == "refresh":
+            print(f"索引已同步: {index.last_refresh}")
+            return
+        if args.command == "duplicates":
+            for group in index.duplicate_groups():
+                print(f"{group[0]['sha256'][:12]}  " + "  ".join(row["path"] for row in group))
+            return
+        if args.item is not None:
+            rows = index.by_item(args.item)
+        elif args.sha256 is not None:
+            rows = index.by_sha256(args.sha256)
+        else:
+            rows = index.assets(args.gaming_type, args.platform)
+        if args.unmatched:
+            rows = [row for row in rows if row["gamingItemId"] is None]
+    print(json.dumps(rows, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
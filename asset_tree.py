@@ -0,0 +1,123 @@
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from catalog import load_platform_dict
+from naming import is_image_name, sanitize_name
+
+
+# (平台对象, 游戏项对象)
+ItemRef = Tuple[Dict[str, Any], Dict[str, Any]]
+
+
+def load_platforms(json_path: str) -> Dict[str, Dict[str, Any]]:
+    """
+    读取 gaming_platforms.json（或编译后的 .sqlite 目录文件），返回以 gamingPlatformId 为键的平台字典。
+    """
+    return load_platform_dict(json_path)
+
+
+def _dir_key(name: Any) -> str:
+    return sanitize_name(name).lower()
+
+
+class ItemResolver:
+    """
+    将 gamingType 目录树中的图片解析为对应的平台与游戏项。
+    目录约定（与 createfile.py 一致，目录名为 sanitize_name 后的名称）：
+    - gamingType/{type}/{平台名}/{gamingItemId}.png      已按 ID 重命名的图片
+    - gamingType/{type}/{平台名}/{游戏名}.png            以游戏名命名的图片
+    - gamingType/{type}/{平台名}/{游戏名}/任意名称.png   放在游戏目录中的图片
+    """
+
+    def __init__(self, data: Dict[str, Dict[str, Any]]) -> None:
+        self.by_item_id: Dict[str, ItemRef] = {}
+        # 不同平台可能同名（例如 BBINDZ 与 BBINDZA 都叫 BBIN电子），会共用同一个目录
+        self._platforms: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+        self._items_by_name: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._platform_refs: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        for platform_id, platform in data.items():
+            gaming_type = str(platform.get("gamingType", ""))
+            name = platform.get("gamingPlatformName") or f"platform_{platform_id}"
+            self._platforms.setdefault((gaming_type, _dir_key(name)), []).append(platform)
+            for item in platform.get("items") or []:
+                item_id = item.get("gamingItemId")
+                if item_id not in (None, ""):
+                    self.by_item_id.setdefault(str(item_id), (platform, item))
+                if item.get("gamingItemName"):
+                    key = (str(platform.get("gamingPlatformId")), _dir_key(item["gamingItemName"]))
+                    self._items_by_name.setdefault(key, item)
+            for ref in (platform.get("gamingPlatformId"), platform.get("gamingPlatformCode")):
+                if ref not in (None, ""):
+                    self._platform_refs.setdefault((gaming_type, str(ref).lower()), platform)
+
+    def find_platforms(self, gaming_type: str, dir_name: str) -> List[Dict[str, Any]]:
+        return self._platforms.get((str(gaming_type), _dir_key(dir_name)), [])
+
+    def find_platforms_by_ref(self, gaming_type: str, ref: str) -> List[Dict[str, Any]]:
+        """
+        按 gamingPlatformId、gamingPlatformCode 或平台名查找平台；平台名可能对应多个平台。
+        """
+        platform = self._platform_refs.get((str(gaming_type), ref.lower()))
+        return [platform] if platform is not None else self.find_platforms(gaming_type, ref)
+
+    def find_item(self, platform: Dict[str, Any], name: str) -> Optional[Dict[str, Any]]:
+        """
+        在平台内按 gamingItemId 或游戏名查找游戏项。
+        """
+        ref = self.by_item_id.get(name)
+        if ref is not None and ref[0] is platform:
+            return ref[1]
+        return self._items_by_name.get((str(platform.get("gamingPlatformId")), _dir_key(name)))
+
+    def resolve(self, image: Path, root: Path) -> Optional[ItemRef]:
+        try:
+            parts = image.relative_to(root).parts
+        except ValueError:
+            return None
+        if len(parts) not in (3, 4):
+            return None
+        platforms = self.find_platforms(parts[0], parts[1])
+        # 优先使用游戏目录名，其次使用文件名（ID 或游戏名）
+        candidates = [parts[2], image.stem] if len(parts) == 4 else [image.stem]
+        for name in candidates:
+            for platform in platforms:
+                item = self.find_item(platform, name)
+                if item is not None:
+                    return platform, item
+        return None
+
+
+def iter_platform_images(root: Path, gaming_types: Optional[Iterable[str]] = None) -> Iterator[Path]:
+    """
+    遍历直接放在 root/{type}/ 下的图片（平台图片，例如 gamingType/4/PG电子.png），按路径排序产出。
+    """
+    type_filter = {str(t) for t in gaming_types} if gaming_types else None
+    for type_dir in sorted(p for p in root.iterdir() if p.is_dir()):
+        if type_filter is not None and type_dir.name not in type_filter:
+            continue
+        yield from sorted(p for p in type_dir.iterdir() if p.is_file() and is_image_name(p.name))
+
+
+def iter_tree_images(
+    root: Path,
+    gaming_types: Optional[Iterable[str]] = None,
+    platform_names: Optional[Iterable[str]] = None,
+) -> Iterator[Path]:
+    """
+    遍历 root/{type}/{平台}/ 下的图片（包含游戏子目录中的一层），按路径排序产出。
+    """
+    type_filter = {str(t) for t in gaming_types} if gaming_types else None
+    platform_filter = {_dir_key(p) for p in platform_names} if platform_names else None
+    for type_dir in sorted(p for p in root.iterdir() if p.is_dir()):
+        if type_filter is not None and type_dir.name not in type_filter:
+            continue
+        for platform_dir in sorted(p for p in type_dir.iterdir() if p.is_dir()):
+            if platform_filter is not None and _dir_key(platform_dir.name) not in platform_filter:
+                continue
+            for entry in sorted(platform_dir.iterdir()):
+                if entry.is_dir():
+                    yield from sorted(
+                        p for p in entry.iterdir() if p.is_file() and is_image_name(p.name)
+                    )
+                elif is_image_name(entry.name):
+                    yield entry
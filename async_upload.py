@@ -0,0 +1,267 @@
+import argparse
+import asyncio
+import random
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+try:
+    import aiohttp
+except ImportError:  # aiohttp 为可选依赖，仅异步上传（--async）需要
+    aiohttp = None
+
+HAS_AIOHTTP = aiohttp is not None
+
+from api_client import DEFAULT_HEADERS, RETRY_STATUS_CODES
+from multipart import CHUNK_SIZE, StreamingMultipart
+
+
+def parse_rate(spec: str) -> float:
+    """
+    解析带宽限制，例如 "512K"、"2M"、"1.5MB/s"（字节/秒）；"0" 表示不限速。可直接用作 argparse 的 type。
+    """
+    text = spec.strip().upper()
+    if text.endswith("/S"):
+        text = text[:-2]
+    if text.endswith("B"):
+        text = text[:-1]
+    units = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+    scale = 1
+    if text and text[-1] in units:
+        text, scale = text[:-1], units[text[-1]]
+    try:
+        rate = float(text) * scale
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"无法解析带宽限制: {spec!r}（示例：512K、2M、1.5MB/s）")
+    if rate < 0:
+        raise argparse.ArgumentTypeError(f"带宽限制不能为负数: {spec!r}")
+    return rate
+
+
+class TokenBucket:
+    """
+    全局字节令牌桶：按 rate 字节/秒补充令牌，最多累积 burst 字节（默认约 0.25 秒的量）。所有上传协程共用一个实例，
+    发送每块数据前先取得等量的令牌，总上行速率因此不超过 rate。rate <= 0 表示不限速。
+    """
+
+    def __init__(self, rate: float, burst: Optional[float] = None) -> None:
+        self.rate = rate
+        self.burst = burst if burst is not None else max(rate / 4, CHUNK_SIZE)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def consume(self, amount: int) -> None:
+        if self.rate <= 0:
+            return
+        # 持锁等待，按先来后到分配带宽，避免小请求一直插队饿死大文件
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                # 单块大于桶容量时允许透支，之后按速率补回
+                if self._tokens >= min(amount, self.burst):
+                    self._tokens -= amount
+                    return
+                await asyncio.sleep((min(amount, self.burst) - self._tokens) / self.rate)
+
+
+@dataclass
+class UploadJob:
+    url: str
+    make_body: Callable[[], StreamingMultipart]  # 每个任务只构造一次，重试时 seek(0) 复用
+    tag: Any = None  # 调用方的上下文，原样带回结果中
+
+
+@dataclass
+class UploadResult:
+    job: UploadJob
+    status: Optional[int]
+    text: str
+    elapsed: float
+    attempts: int
+    error: Optional[str] = None
+
+
+class _RetryableStatus(Exception):
+    def __init__(self, status: int, text: str) -> None:
+        super().__init__(f"HTTP {status}")
+        self.status = status
+        self.text = text
+
+
+# 超时、连接错误、响应不完整（aiohttp.ClientError）与可重试状态码都按退避策略重试
+_RETRY_ERRORS: Tuple[type, ...] = (asyncio.TimeoutError, OSError, _RetryableStatus)
+if aiohttp is not None:
+    _RETRY_ERRORS += (aiohttp.ClientError,)
+
+
+class AsyncUploader:
+    """
+    asyncio 上传引擎：
+    - 请求体为 StreamingMultipart，按块从磁盘读取后发送，每块先从全局令牌桶取得带宽
+    - 有界队列：任务来源按需读取，队列满时暂停读取（背压），同时在途的请求不超过 concurrency
+    - 每个请求有总超时（不含等待带宽的时间），超时、连接错误与 5xx 按带抖动的指数退避重试
+    请求经由 aiohttp 的连接池发出（需要安装 aiohttp）。与同步脚本一致，HTTPS 不校验证书（verify=False）。
+    """
+
+    def __init__(
+        self,
+        headers: Optional[Dict[str, str]] = None,
+        concurrency: int = 4,
+        queue_size: Optional[int] = None,
+        bandwidth: float = 0,
+        timeout: float = 120.0,
+        retries: int = 3,
+        backoff: float = 0.5,
+        max_backoff: float = 10.0,
+        chunk_size: int = CHUNK_SIZE,
+    ) -> None:
+        if aiohttp is None:
+            raise SystemExit("异步上传需要安装 aiohttp：pip install aiohttp")
+        self.headers = {**DEFAULT_HEADERS, **(headers or {})}
+        self.concurrency = max(1, concurrency)
+        self.queue_size = queue_size or self.concurrency * 2
+        self.bandwidth = bandwidth
+        self.timeout = timeout
+        self.retries = max(0, retries)
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.chunk_size = chunk_size
+        self.bytes_sent = 0
+        self.requests = 0
+        self.retried = 0
+        self.elapsed = 0.0
+
+    def backoff_delay(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_backoff, self.backoff * (2 ** attempt)))
+
+    async def _iter_body(self, body: StreamingMultipart, bucket: TokenBucket, throttled: List[float]) -> AsyncIterator[bytes]:
+        while True:
+            # 读盘放到线程中，避免网络共享盘上的慢读阻塞事件循环
+            chunk = await asyncio.to_thread(body.read, self.chunk_size)
+            if not chunk:
+                return
+            waited = time.monotonic()
+            await bucket.consume(len(chunk))
+            throttled[0] += time.monotonic() - waited
+            self.bytes_sent += len(chunk)
+            yield chunk
+
+    async def _post(
+        self, session: Any, url: str, body: StreamingMultipart, bucket: TokenBucket, throttled: List[float]
+    ) -> Tuple[int, str]:
+        headers = {"Content-Type": body.content_type, "Content-Length": str(len(body))}
+        data = self._iter_body(body, bucket, throttled)
+        async with session.post(url, data=data, headers=headers, ssl=False) as resp:
+            return resp.status, await resp.text(errors="replace")
+
+    async def _with_deadline(self, coro: Awaitable[Tuple[int, str]], throttled: List[float]) -> Tuple[int, str]:
+        """
+        与 asyncio.wait_for 相同，但等待令牌桶的时间不计入超时：限速很低时大文件不会因排队被误判超时而重传。
+        """
+        task = asyncio.ensure_future(coro)
+        start = time.monotonic()
+        try:
+            while True:
+                remaining = self.timeout + throttled[0] - (time.monotonic() - start)
+                if remaining <= 0:
+                    raise asyncio.TimeoutError()
+                done, _ = await asyncio.wait({task}, timeout=remaining)
+                if done:
+                    return task.result()
+        finally:
+            if not task.done():
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+
+    async def _send(self, session: Any, job: UploadJob, bucket: TokenBucket) -> UploadResult:
+        start = time.perf_counter()
+        body = job.make_body()
+        attempt = 0
+        try:
+            while True:
+                body.seek(0)
+                self.requests += 1
+                throttled = [0.0]
+                try:
+                    coro = self._post(session, job.url, body, bucket, throttled)
+                    status, text = await self._with_deadline(coro, throttled)
+                    if status in RETRY_STATUS_CODES and attempt < self.retries:
+                        raise _RetryableStatus(status, text)
+                    return UploadResult(job, status, text, time.perf_counter() - start, attempt + 1)
+                except _RETRY_ERRORS as e:
+                    if attempt >= self.retries:
+                        error = "请求超时" if isinstance(e, asyncio.TimeoutError) else (str(e) or type(e).__name__)
+                        return UploadResult(job, None, "", time.perf_counter() - start, attempt + 1, error)
+                except Exception as e:
+                    return UploadResult(job, None, "", time.perf_counter() - start, attempt + 1, str(e))
+                self.retried += 1
+                await asyncio.sleep(self.backoff_delay(attempt))
+                attempt += 1
+        finally:
+            body.close()
+
+    async def run(
+        self,
+        jobs: Iterable[UploadJob],
+        on_result: Optional[Callable[[UploadResult], None]] = None,
+    ) -> List[UploadResult]:
+        """
+        上传 jobs 中的全部任务，按完成顺序返回结果；on_result 在每个任务完成时调用（在事件循环中）。
+        jobs 可以是惰性生成器（例如边计算哈希边产出），只在队列有空位时才读取下一项。
+        """
+        start = time.perf_counter()
+        bucket = TokenBucket(self.bandwidth)
+        queue: "asyncio.Queue[Optional[UploadJob]]" = asyncio.Queue(maxsize=self.queue_size)
+        results: List[UploadResult] = []
+        session = aiohttp.ClientSession(
+            headers=self.headers,
+            connector=aiohttp.TCPConnector(limit=self.concurrency),
+            timeout=aiohttp.ClientTimeout(total=None),  # 超时由 _with_deadline 控制
+        )
+
+        async def produce() -> None:
+            iterator = iter(jobs)
+            while True:
+                # 生成器中可能有阻塞操作（读文件、算哈希），放到线程中执行
+                job = await asyncio.to_thread(next, iterator, None)
+                if job is None:
+                    break
+                await queue.put(job)  # 队列满时在此等待
+            for _ in range(self.concurrency):
+                await queue.put(None)
+
+        async def work() -> None:
+            while True:
+                job = await queue.get()
+                if job is None:
+                    return
+                result = await self._send(session, job, bucket)
+                results.append(result)
+                if on_result is not None:
+                    on_result(result)
+
+        try:
+            await asyncio.gather(produce(), *(work() for _ in range(self.concurrency)))
+        finally:
+            await session.close()
+            self.elapsed += time.perf_counter() - start
+        return results
+
+    def run_sync(
+        self,
+        jobs: Iterable[UploadJob],
+        on_result: Optional[Callable[[UploadResult], None]] = None,
+    ) -> List[UploadResult]:
+        return asyncio.run(self.run(jobs, on_result))
+
+    def summary(self) -> str:
+        if not self.requests:
+            return "未发起请求"
+        rate = self.bytes_sent / self.elapsed / 1024 if self.elapsed else 0.0
+        return (
+            f"请求 {self.requests} 次（重试 {self.retried} 次），发送 {self.bytes_sent / 1024 / 1024:.1f} MB，"
+            f"平均 {rate:.0f} KB/s"
+        )
@@ -0,0 +1,488 @@
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from name_matcher import normalize_name
+from upload_journal import file_sha256
+
+
+CATALOG_SUFFIXES = (".sqlite", ".db")
+NDJSON_SUFFIXES = (".ndjson", ".jsonl")
+
+# 列不声明类型，保留 JSON 中的原始值类型（例如 gamingItemId 为整数、gamingType 为字符串）；
+# *Key 列统一存字符串，供索引查询使用
+SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE platforms (
+    position INTEGER PRIMARY KEY,
+    platformKey TEXT NOT NULL,
+    gamingPlatformId,
+    gamingPlatformCode TEXT,
+    gamingPlatformName TEXT,
+    gamingType TEXT
+);
+CREATE TABLE items (
+    platformPosition INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    itemKey TEXT,
+    gamingItemId,
+    gamingItemCode,
+    gamingItemName TEXT,
+    normName TEXT,
+    gamingType TEXT,
+    PRIMARY KEY (platformPosition, position)
+);
+CREATE INDEX platforms_key ON platforms(platformKey);
+CREATE INDEX platforms_code ON platforms(gamingPlatformCode);
+CREATE INDEX platforms_name ON platforms(gamingPlatformName);
+CREATE INDEX items_key ON items(itemKey);
+CREATE INDEX items_code ON items(gamingItemCode);
+CREATE INDEX items_name ON items(gamingItemName);
+CREATE INDEX items_norm ON items(normName);
+"""
+
+
+def default_catalog_path(json_path: str) -> str:
+    """
+    与 JSON 同名的编译目录文件路径，例如 gaming_platforms.json -> gaming_platforms.sqlite。
+    """
+    return os.path.splitext(json_path)[0] + ".sqlite"
+
+
+def _source_stat(path: str) -> Dict[str, str]:
+    stat = os.stat(path)
+    return {"sourceSize": str(stat.st_size), "sourceMtime": str(stat.st_mtime_ns)}
+
+
+def compile_catalog(data: Dict[str, Dict[str, Any]], db_path: str, source_path: Optional[str] = None) -> None:
+    """
+    将平台字典编译为 SQLite 目录文件（先写临时文件再替换，读者不会看到半成品）。
+    给出 source_path 时记录该 JSON 文件的 sha256、大小与修改时间，供 open_catalog 判断目录文件是否过期。
+    """
+    meta = {"platformCount": str(len(data)), "sourceHash": ""}
+    if source_path:
+        meta["sourceHash"] = file_sha256(source_path)
+        meta.update(_source_stat(source_path))
+    directory = os.path.dirname(os.path.abspath(db_path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=".sqlite")
+    os.close(fd)
+    try:
+        conn = sqlite3.connect(tmp_path)
+        with conn:
+            conn.executescript(SCHEMA)
+            for p_pos, (platform_id, platform) in enumerate(data.items()):
+                conn.execute(
+                    "INSERT INTO platforms VALUES (?, ?, ?, ?, ?, ?)",
+                    (
+                        p_pos,
+                        str(platform_id),
+                        platform.get("gamingPlatformId"),
+                        platform.get("gamingPlatformCode"),
+                        platform.get("gamingPlatformName"),
+                        platform.get("gamingType"),
+                    ),
+                )
+                conn.executemany(
+                    "INSERT INTO items VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    [
+                        (
+                            p_pos,
+                            i_pos,
+                            str(item.get("gamingItemId", "")),
+                            item.get("gamingItemId", ""),
+                            item.get("gamingItemCode"),
+                            item.get("gamingItemName"),
+                            normalize_name(str(item.get("gamingItemName") or "")),
+                            item.get("gamingType"),
+                        )
+                        for i_pos, item in enumerate(platform.get("items") or [])
+                    ],
+                )
+            conn.executemany("INSERT INTO meta VALUES (?, ?)", list(meta.items()))
+        conn.close()
+        os.replace(tmp_path, db_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+_PLATFORM_COLUMNS = ("gamingPlatformCode", "gamingPlatformId", "gamingType", "gamingPlatformName")
+_ITEM_COLUMNS = ("gamingItemName", "gamingItemCode", "gamingType", "gamingItemId")
+
+
+class Catalog:
+    """
+    只读打开编译好的目录文件。打开只需建立连接（不解析整个文件），
+    查询通过索引按 gamingItemId、gamingItemCode、platformCode 与规范化名称完成；
+    启用 mmap 读取，多次查询共享操作系统页缓存。
+    返回的平台与游戏项字典与 gaming_platforms.json 中的字段一致。
+    """
+
+    def __init__(self, db_path: str) -> None:
+        if not os.path.exists(db_path):
+            raise FileNotFoundError(db_path)
+        self.path = db_path
+        self.conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA mmap_size = 268435456")
+
+    def meta(self, key: str) -> Optional[str]:
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row["value"] if row else None
+
+    def _item_query(self, where: str, params: tuple) -> List[Dict[str, Any]]:
+        rows = self.conn.execute(
+            "SELECT i.*, p.gamingPlatformCode AS platformCode, p.gamingPlatformId AS platformId,"
+            " p.gamingPlatformName AS platformName FROM items i"
+            " JOIN platforms p ON p.position = i.platformPosition"
+            f" WHERE {where} ORDER BY i.platformPosition, i.position",
+            params,
+        ).fetchall()
+        return [self._item_row(row) for row in rows]
+
+    @staticmethod
+    def _item_row(row: sqlite3.Row) -> Dict[str, Any]:
+        item = {col: row[col] for col in _ITEM_COLUMNS}
+        item["gamingPlatformId"] = row["platformId"]
+        item["gamingPlatformCode"] = row["platformCode"]
+        item["gamingPlatformName"] = row["platformName"]
+        return item
+
+    def item_by_id(self, gaming_item_id: Any) -> Optional[Dict[str, Any]]:
+        items = self._item_query("i.itemKey = ?", (str(gaming_item_id),))
+        return items[0] if items else None
+
+    def items_by_code(self, gaming_item_code: Any) -> List[Dict[str, Any]]:
+        return self._item_query("i.gamingItemCode = ?", (gaming_item_code,))
+
+    def items_by_platform(self, platform_code: str) -> List[Dict[str, Any]]:
+        return self._item_query("p.gamingPlatformCode = ?", (platform_code,))
+
+    def items_by_name(self, name: str) -> List[Dict[str, Any]]:
+        """
+        按规范化名称查找（忽略大小写、全角/半角、繁简体与标点差异）。
+        """
+        return self._item_query("i.normName = ?", (normalize_name(name),))
+
+    def items_by_name_prefix(self, prefix: str) -> List[Dict[str, Any]]:
+        """
+        按规范化名称前缀查找，走 normName 上的有序索引做范围扫描。
+        """
+        key = normalize_name(prefix)
+        return self._item_query("i.normName >= ? AND i.normName < ?", (key, key + "\U0010ffff"))
+
+    def find(
+        self,
+        item_id: Any = None,
+        code: Any = None,
+        platform: Optional[str] = None,
+        gaming_type: Any = None,
+        name: Optional[str] = None,
+        prefix: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        组合条件查找游戏项，各条件之间为"且"关系：
+        - item_id: gamingItemId
+        - code: gamingItemCode
+        - platform: 平台编码、平台名称或 gamingPlatformId
+        - gaming_type: gamingType
+        - name: 规范化后完全相同的名称
+        - prefix: 规范化后的名称前缀
+        """
+        clauses: List[str] = []
+        params: List[Any] = []
+        if item_id is not None:
+            clauses.append("i.itemKey = ?")
+            params.append(str(item_id))
+        if code is not None:
+            clauses.append("i.gamingItemCode = ?")
+            params.append(code)
+        if platform is not None:
+            clauses.append("(p.gamingPlatformCode = ? OR p.gamingPlatformName = ? OR p.platformKey = ?)")
+            params.extend([platform, platform, str(platform)])
+        if gaming_type is not None:
+            clauses.append("i.gamingType = ?")
+            params.append(str(gaming_type))
+        if name is not None:
+            clauses.append("i.normName = ?")
+            params.append(normalize_name(name))
+        if prefix is not None:
+            key = normalize_name(prefix)
+            clauses.append("i.normName >= ? AND i.normName < ?")
+            params.extend([key, key + "\U0010ffff"])
+        return self._item_query(" AND ".join(clauses) or "1", tuple(params))
+
+    def items(self, gaming_type: Optional[str] = None) -> List[Dict[str, Any]]:
+        if gaming_type is None:
+            return self._item_query("1", ())
+        return self._item_query("i.gamingType = ?", (str(gaming_type),))
+
+    def platforms(self) -> List[Dict[str, Any]]:
+        rows = self.conn.execute("SELECT * FROM platforms ORDER BY position").fetchall()
+        return [{col: row[col] for col in _PLATFORM_COLUMNS} for row in rows]
+
+    def platform_by_id(self, platform_id: Any) -> Optional[Dict[str, Any]]:
+        row = self.conn.execute("SELECT * FROM platforms WHERE platformKey = ?", (str(platform_id),)).fetchone()
+        return {col: row[col] for col in _PLATFORM_COLUMNS} if row else None
+
+    def to_platform_dict(self) -> Dict[str, Dict[str, Any]]:
+        """
+        还原为与 gaming_platforms.json 相同结构的字典。
+        """
+        result: Dict[str, Dict[str, Any]] = {}
+        by_position: Dict[int, Dict[str, Any]] = {}
+        for row in self.conn.execute("SELECT * FROM platforms ORDER BY position"):
+            entry = {col: row[col] for col in _PLATFORM_COLUMNS}
+            result[row["platformKey"]] = entry
+            by_position[row["position"]] = entry
+        for row in self.conn.execute("SELECT * FROM items ORDER BY platformPosition, position"):
+            by_position[row["platformPosition"]].setdefault("items", []).append(
+                {col: row[col] for col in _ITEM_COLUMNS}
+            )
+        return result
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> "Catalog":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+def is_catalog_path(path: str) -> bool:
+    return os.path.splitext(path)[1].lower() in CATALOG_SUFFIXES
+
+
+def _fallback_catalog_path(json_path: str) -> str:
+    digest = hashlib.sha1(os.path.abspath(json_path).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(tempfile.gettempdir(), f"gaming_catalog-{digest}.sqlite")
+
+
+def _is_fresh(db_path: str, json_path: str) -> bool:
+    """
+    目录文件记录的源文件大小与修改时间未变时直接视为有效；否则比较 sha256
+    （例如文件被复制或 touch 过但内容未变）。
+    """
+    try:
+        with Catalog(db_path) as catalog:
+            meta = {key: catalog.meta(key) for key in ("sourceHash", "sourceSize", "sourceMtime")}
+    except (OSError, sqlite3.Error):
+        return False
+    if not meta["sourceHash"]:
+        return False
+    stat = _source_stat(json_path)
+    if meta["sourceSize"] == stat["sourceSize"] and meta["sourceMtime"] == stat["sourceMtime"]:
+        return True
+    return meta["sourceHash"] == file_sha256(json_path)
+
+
+def open_catalog(path: str, cache_path: Optional[str] = None) -> Catalog:
+    """
+    打开目录：path 为 .sqlite/.db 时直接打开；为 JSON 时使用旁路缓存的目录文件
+    （默认与 JSON 同名的 .sqlite），缓存不存在或 JSON 内容已变化（按 sha256 判断）时重新编译。
+    JSON 所在目录不可写时缓存到系统临时目录。
+    """
+    if is_catalog_path(path):
+        return Catalog(path)
+    candidates = [cache_path] if cache_path else [default_catalog_path(path), _fallback_catalog_path(path)]
+    for db_path in candidates:
+        if _is_fresh(db_path, path):
+            return Catalog(db_path)
+    data = load_platform_dict(path)
+    for db_path in candidates:
+        try:
+            compile_catalog(data, db_path, source_path=path)
+        except OSError:
+            if db_path == candidates[-1]:
+                raise
+            continue
+        return Catalog(db_path)
+    raise FileNotFoundError(path)
+
+
+def is_ndjson_path(path: str) -> bool:
+    name = path[: -len(".part")] if path.endswith(".part") else path
+    return os.path.splitext(name)[1].lower() in NDJSON_SUFFIXES
+
+
+class NdjsonWriter:
+    """
+    以 NDJSON 逐行写出平台数据：每行一个平台记录 {"type": "platform", ...}
+    或一个游戏项记录 {"type": "item", "gamingPlatformId": ..., ...}，平台行总在其游戏项之前。
+    抓到一条就追加一行并 flush，可被多个抓取线程共用。内容先写入 path + ".part"，commit 时改名为 path；
+    中途中断时 .part 文件保留已抓到的记录，可以直接用 load_platform_dict 读取。
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.part_path = path + ".part"
+        self._lock = threading.Lock()
+        self._file = open(self.part_path, "w", encoding="utf-8")
+
+    def _write(self, record: Dict[str, Any]) -> None:
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+
+    def platform(self, entry: Dict[str, Any]) -> None:
+        self._write({"type": "platform", **{k: v for k, v in entry.items() if k != "items"}})
+
+    def item(self, platform_id: str, entry: Dict[str, Any]) -> None:
+        self._write({"type": "item", "gamingPlatformId": platform_id, **entry})
+
+    def items(self, platform_id: str, entries: Iterable[Dict[str, Any]]) -> None:
+        """一次写出一个平台的全部游戏项，各行连续出现，不与其他线程的记录交错。"""
+        lines = "".join(
+            json.dumps({"type": "item", "gamingPlatformId": platform_id, **entry}, ensure_ascii=False) + "\n"
+            for entry in entries
+        )
+        if not lines:
+            return
+        with self._lock:
+            self._file.write(lines)
+            self._file.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            if not self._file.closed:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                self._file.close()
+
+    def commit(self) -> None:
+        self.close()
+        os.replace(self.part_path, self.path)
+
+    def discard(self) -> None:
+        self.close()
+        os.remove(self.part_path)
+
+
+def iter_ndjson_records(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    逐行读取 NDJSON 记录；中断的写入可能留下不完整的最后一行，解析失败的行会被跳过。
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(record, dict):
+                yield record
+
+
+def load_ndjson(path: str) -> Dict[str, Dict[str, Any]]:
+    """
+    把 NDJSON 平台数据还原为与 JSON 输出相同的平台字典。
+    """
+    data: Dict[str, Dict[str, Any]] = {}
+    for record in iter_ndjson_records(path):
+        kind = record.pop("type", None)
+        if kind == "platform":
+            data[str(record["gamingPlatformId"])] = record
+        elif kind == "item":
+            platform = data.get(str(record.pop("gamingPlatformId", "")))
+            if platform is not None:
+                platform.setdefault("items", []).append(record)
+    return data
+
+
+def load_platform_dict(path: str) -> Dict[str, Dict[str, Any]]:
+    """
+    读取平台数据：.sqlite/.db 为编译后的目录文件，.ndjson/.jsonl 为逐行输出，其他按 JSON 解析。
+    """
+    if is_catalog_path(path):
+        with Catalog(path) as catalog:
+            return catalog.to_platform_dict()
+    if is_ndjson_path(path):
+        return load_ndjson(path)
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if not isinstance(data, dict):
+        raise ValueError("JSON 根节点应为对象（以平台ID为键）")
+    return data
+
+
+ITEM_OUTPUT_COLUMNS = (
+    "gamingItemId",
+    "gamingItemCode",
+    "gamingItemName",
+    "gamingType",
+    "gamingPlatformCode",
+    "gamingPlatformName",
+)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="查询或编译游戏目录（gaming_platforms.json / .sqlite）")
+    parser.add_argument(
+        "--json-file",
+        type=str,
+        default="gaming_platforms.json",
+        help="平台数据 JSON 或 .sqlite 目录文件，默认 gaming_platforms.json",
+    )
+    parser.add_argument("--catalog-db", type=str, default=None, help="JSON 的目录缓存文件，默认与 JSON 同名（.sqlite）")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    lookup = sub.add_parser("lookup", help="查找游戏项")
+    lookup.add_argument("--id", dest="item_id", type=str, default=None, help="gamingItemId")
+    lookup.add_argument("--code", type=str, default=None, help="gamingItemCode")
+    lookup.add_argument("--platform", type=str, default=None, help="平台编码、平台名称或 gamingPlatformId")
+    lookup.add_argument("--type", dest="gaming_type", type=str, default=None, help="gamingType")
+    lookup.add_argument("--name", type=str, default=None, help="游戏名称（忽略大小写、全角/半角、繁简体与标点）")
+    lookup.add_argument("--prefix", type=str, default=None, help="游戏名称前缀")
+    lookup.add_argument("--format", choices=("table", "json"), default="table", help="输出格式，默认 table")
+
+    sub.add_parser("compile", help="编译（或刷新）目录缓存文件")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    try:
+        catalog = open_catalog(args.json_file, args.catalog_db)
+    except FileNotFoundError:
+        print(f"未找到文件: {args.json_file}", file=sys.stderr)
+        sys.exit(1)
+    except (ValueError, json.JSONDecodeError, sqlite3.Error) as e:
+        print(f"读取失败: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    with catalog:
+        if args.command == "compile":
+            print(f"目录文件: {catalog.path}（平台 {catalog.meta('platformCount')} 个）")
+            return
+        results = catalog.find(
+            item_id=args.item_id,
+            code=args.code,
+            platform=args.platform,
+            gaming_type=args.gaming_type,
+            name=args.name,
+            prefix=args.prefix,
+        )
+    if args.format == "json":
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+    else:
+        for item in results:
+            print("\t".join(str(item.get(col, "")) for col in ITEM_OUTPUT_COLUMNS))
+        print(f"共 {len(results)} 条", file=sys.stderr)
+    if not results:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from catalog import load_platform_dict
+from response_cache import write_json_atomic
+
+
+DEFAULT_FEED_PATH = "catalog_changes.jsonl"
+DEFAULT_CURSOR_FILE = ".change_feed_cursor.json"
+
+PLATFORM_FIELDS = ("gamingPlatformCode", "gamingPlatformName", "gamingType")
+ITEM_FIELDS = ("gamingItemCode", "gamingItemName", "gamingType", "gamingPlatformId")
+
+# 变更类型
+ADDED = "added"
+REMOVED = "removed"
+RENAMED = "renamed"  # 名称变化（可能同时有其他字段变化）
+MOVED = "moved"  # 游戏项换了所属平台
+CHANGED = "changed"  # 编码或类型变化
+
+
+def _platform_record(platform: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: v for k, v in platform.items() if k != "items"}
+
+
+def _item_records(data: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """
+    以 gamingItemId 为键展开所有游戏项，附带所属平台的 ID 与名称（便于下游定位目录）。
+    """
+    items: Dict[str, Dict[str, Any]] = {}
+    for platform_id, platform in data.items():
+        for item in platform.get("items") or []:
+            items[str(item.get("gamingItemId"))] = {
+                **item,
+                "gamingPlatformId": str(platform.get("gamingPlatformId", platform_id)),
+                "gamingPlatformName": platform.get("gamingPlatformName"),
+            }
+    return items
+
+
+def _compare(
+    kind: str,
+    key: str,
+    before: Optional[Dict[str, Any]],
+    after: Optional[Dict[str, Any]],
+    fields: Tuple[str, ...],
+    name_field: str,
+) -> Optional[Dict[str, Any]]:
+    if before is None and after is None:
+        return None
+    if before is None:
+        op, changed = ADDED, []
+    elif after is None:
+        op, changed = REMOVED, []
+    else:
+        changed = [f for f in fields if before.get(f) != after.get(f)]
+        if not changed:
+            return None
+        if name_field in changed:
+            op = RENAMED
+        elif "gamingPlatformId" in changed:
+            op = MOVED
+        else:
+            op = CHANGED
+    return {"kind": kind, "op": op, "id": key, "fields": changed, "before": before, "after": after}
+
+
+def diff_catalogs(old: Dict[str, Any], new: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    按 gamingPlatformId / gamingItemId 比较两份平台字典，返回变更记录列表（平台在前，游戏项在后）：
+    {"kind": "platform" | "item", "op": added / removed / renamed / moved / changed,
+     "id": ID, "fields": [变化的字段], "before": 旧记录或 None, "after": 新记录或 None}
+    游戏项记录附带 gamingPlatformId 与 gamingPlatformName；平台改名不会使其下的游戏项计为变化。
+    """
+    changes: List[Dict[str, Any]] = []
+    for pid in list(new) + [pid for pid in old if pid not in new]:
+        before = _platform_record(old[pid]) if pid in old else None
+        after = _platform_record(new[pid]) if pid in new else None
+        change = _compare("platform", str(pid), before, after, PLATFORM_FIELDS, "gamingPlatformName")
+        if change:
+            changes.append(change)
+    old_items, new_items = _item_records(old), _item_records(new)
+    for item_id in list(new_items) + [i for i in old_items if i not in new_items]:
+        change = _compare("item", item_id, old_items.get(item_id), new_items.get(item_id), ITEM_FIELDS, "gamingItemName")
+        if change:
+            changes.append(change)
+    return changes
+
+
+def summarize_changes(changes: Iterable[Dict[str, Any]]) -> Dict[str, Dict[str, int]]:
+    summary: Dict[str, Dict[str, int]] = {"platform": {}, "item": {}}
+    for change in changes:
+        counts = summary[change["kind"]]
+        counts[change["op"]] = counts.get(change["op"], 0) + 1
+    return summary
+
+
+def append_change_feed(feed_path: str, changes: List[Dict[str, Any]], source: str) -> Dict[str, Any]:
+    """
+    把一次变更作为一行追加到变更流文件（JSONL），序号在上一条的基础上递增，返回写入的记录。
+    """
+    last = read_change_feed(feed_path, since=-1)
+    changeset = {
+        "seq": (last[-1]["seq"] + 1) if last else 1,
+        "generatedAt": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "source": source,
+        "summary": summarize_changes(changes),
+        "changes": changes,
+    }
+    with open(feed_path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(changeset, ensure_ascii=False) + "\n")
+    return changeset
+
+
+def read_change_feed(feed_path: str, since: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    读取变更流。since 为 None 时只返回最新一条；否则返回序号大于 since 的全部记录。
+    """
+    changesets: List[Dict[str, Any]] = []
+    try:
+        with open(feed_path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    changesets.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue  # 中断时可能留下不完整的最后一行
+    except FileNotFoundError:
+        return []
+    if since is None:
+        return changesets[-1:]
+    return [c for c in changesets if c["seq"] > since]
+
+
+def merge_changes(changesets: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    把多次变更合并为从最早状态到最新状态的一组变更（同一对象取最早的 before 与最新的 after）。
+    """
+    merged: Dict[Tuple[str, str], Tuple[Any, Any]] = {}
+    for changeset in changesets:
+        for change in changeset["changes"]:
+            key = (change["kind"], change["id"])
+            before = merged[key][0] if key in merged else change["before"]
+            merged[key] = (before, change["after"])
+    changes = []
+    for (kind, key), (before, after) in merged.items():
+        fields, name_field = (PLATFORM_FIELDS, "gamingPlatformName") if kind == "platform" else (ITEM_FIELDS, "gamingItemName")
+        change = _compare(kind, key, before, after, fields, name_field)
+        if change:
+            changes.append(change)
+    changes.sort(key=lambda c: c["kind"] != "platform")
+    return changes
+
+
+def load_changes(feed_path: str, since: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    下游脚本的入口：读取变更流并合并。
+    """
+    return merge_changes(read_change_feed(feed_path, since))
+
+
+def read_cursor(cursor_file: str, feed_path: str) -> int:
+    """
+    读取下游脚本在该变更流上已处理到的序号（游标文件按变更流的绝对路径分别记录），未记录时为 0。
+    """
+    try:
+        with open(cursor_file, "r", encoding="utf-8") as f:
+            cursors = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return 0
+    seq = cursors.get(os.path.abspath(feed_path)) if isinstance(cursors, dict) else None
+    return seq if isinstance(seq, int) else 0
+
+
+def write_cursor(cursor_file: str, feed_path: str, seq: int) -> None:
+    try:
+        with open(cursor_file, "r", encoding="utf-8") as f:
+            cursors = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        cursors = {}
+    if not isinstance(cursors, dict):
+        cursors = {}
+    cursors[os.path.abspath(feed_path)] = seq
+    write_json_atomic(cursor_file, cursors, indent=2)
+
+
+def load_pending_changes(
+    feed_path: str, cursor_file: str, since: Optional[int] = None
+) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+    """
+    下游脚本按游标消费变更流：读取序号大于 since（默认为游标文件中记录的序号）的全部变更并合并，
+    返回 (变更, 最后一条的序号)。没有新变更时序号为 None。调用方处理成功后再用 write_cursor 记下该序号，
+    中途失败或只是预览时不更新游标，下次运行会重新处理这些变更。
+    """
+    if since is None:
+        since = read_cursor(cursor_file, feed_path)
+    changesets = read_change_feed(feed_path, since)
+    return merge_changes(changesets), (changesets[-1]["seq"] if changesets else None)
+
+
+def describe_change(change: Dict[str, Any]) -> str:
+    before, after = change["before"] or {}, change["after"] or {}
+    name_field = "gamingPlatformName" if change["kind"] == "platform" else "gamingItemName"
+    label = "平台" if change["kind"] == "platform" else "游戏项"
+    if change["op"] == ADDED:
+        return f"[新增{label}] {change['id']} {after.get(name_field)}"
+    if change["op"] == REMOVED:
+        return f"[删除{label}] {change['id']} {before.get(name_field)}"
+    details = ", ".join(f"{f}: {before.get(f)} -> {after.get(f)}" for f in change["fields"])
+    return f"[{label}{change['op']}] {change['id']} {details}"
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="比较两份平台数据，或查看 query.py 写入的变更流")
+    sub = parser.add_subparsers(dest="command", required=True)
+    diff = sub.add_parser("diff", help="比较两份平台数据（JSON 或 SQLite 目录文件）")
+    diff.add_argument("old", type=str, help="旧数据文件")
+    diff.add_argument("new", type=str, help="新数据文件")
+    diff.add_argument("--feed", type=str, default=None, help="同时把结果追加到该变更流文件")
+    diff.add_argument("--format", choices=("text", "json"), default="text", help="输出格式，默认 text")
+    show = sub.add_parser("show", help="查看变更流")
+    show.add_argument("--feed", type=str, default=DEFAULT_FEED_PATH, help=f"变更流文件，默认 {DEFAULT_FEED_PATH}")
+    show.add_argument("--since", type=int, default=None, help="合并显示序号大于该值的全部变更，默认只显示最新一次")
+    show.add_argument("--format", choices=("text", "json"), default="text", help="输出格式，默认 text")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    if args.command == "diff":
+        try:
+            old, new = load_platform_dict(args.old), load_platform_dict(args.new)
+        except (OSError, ValueError) as e:
+            print(f"无法读取数据: {e}", file=sys.stderr)
+            sys.exit(1)
+        changes = diff_catalogs(old, new)
+        if args.feed and changes:
+            changeset = append_change_feed(args.feed, changes, args.new)
+            print(f"已追加到 {args.feed}（序号 {changeset['seq']}）", file=sys.stderr)
+    else:
+        changes = load_changes(args.feed, args.since)
+
+    if args.format == "json":
+        print(json.dumps(changes, ensure_ascii=False, indent=2))
+        return
+    for change in changes:
+        print(describe_change(change))
+    print(f"共 {len(changes)} 项变更: {summarize_changes(changes)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,25 +1,19 @@
 import argparse
 import json
 import os
-import re
+import sqlite3
 import sys
-from typing import Any, Dict, List
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
-
-INVALID_WIN_CHARS = re.compile(r'[<>:"/\\|?*]')
-
-
-def sanitize_name(name: str) -> str:
-    """
-    将名称清洗为 Windows 允许的目录名：
-    - 去除非法字符 <>:"/\|?*
-    - 去除首尾空白与句点
-    - 将连续空白压缩为一个空格
-    - 名称为空时回退为 'Unnamed'
-    """
-    name = INVALID_WIN_CHARS.sub(" ", str(name))
-    name = re.sub(r"\s+", " ", name).strip().strip(".")
-    return name or "Unnamed"
+from catalog import load_platform_dict
+from catalog_diff import DEFAULT_CURSOR_FILE, DEFAULT_FEED_PATH, RENAMED, load_pending_changes, write_cursor
+from fs_plan import DONE, FsPlan
+from naming import sanitize_name
+from response_cache import write_json_atomic
+from tree_snapshot import TreeSnapshot
 
 
 def create_directories_from_json(data: Dict[str, Any], base_dir: str) -> List[str]:
@@ -44,38 +38,335 @@ def create_directories_from_json(data: Dict[str, Any], base_dir: str) -> List[st
     return created_paths
 
 
+DEFAULT_STATE_FILE = ".createfile_state.json"
+
+
+@dataclass
+class TreeDiff:
+    """
+    期望的目录结构与现有目录树之间的差异（路径均相对于根目录）。
+    - create: 需要新建的目录
+    - rename: (旧路径, 新路径)，名称变化但 gamingPlatformId / gamingItemId 未变的目录
+    - stale: 现有但已不在数据中的目录（只报告，不删除）
+    - unchanged: 已存在且无需处理的目录数
+    - state: 本次应写入状态文件的 {"platform:ID" / "item:ID": 路径}
+    """
+    create: List[str] = field(default_factory=list)
+    rename: List[Tuple[str, str]] = field(default_factory=list)
+    stale: List[str] = field(default_factory=list)
+    unchanged: int = 0
+    state: Dict[str, str] = field(default_factory=dict)
+
+    def is_empty(self) -> bool:
+        return not (self.create or self.rename)
+
+
+def desired_directories(data: Dict[str, Any]) -> Dict[str, List[str]]:
+    """
+    计算数据对应的目录结构：{相对路径: [对应的状态键]}，顺序与 create_directories_from_json 一致。
+    名称相同的平台（如 BBINDZ / BBINDZA）共用一个目录。
+    """
+    desired: Dict[str, List[str]] = {}
+    for platform_id, platform in data.items():
+        platform_name = platform.get("gamingPlatformName") or f"platform_{platform_id}"
+        platform_dir = sanitize_name(platform_name)
+        desired.setdefault(platform_dir, []).append(f"platform:{platform_id}")
+        for item in platform.get("items") or []:
+            item_name = item.get("gamingItemName")
+            if not item_name:
+                continue
+            item_dir = f"{platform_dir}/{sanitize_name(item_name)}"
+            desired.setdefault(item_dir, []).append(f"item:{item.get('gamingItemId')}")
+    return desired
+
+
+def scan_existing_directories(base_dir: str) -> List[str]:
+    """
+    一次遍历现有目录树的前两层（平台目录与游戏项目录），返回相对路径列表。
+    """
+    snapshot = TreeSnapshot(Path(base_dir), max_depth=2)
+    root = Path(base_dir)
+    return [d.relative_to(root).as_posix() for d in snapshot.all_dirs()]
+
+
+def load_state(state_file: str) -> Dict[str, str]:
+    try:
+        with open(state_file, "r", encoding="utf-8") as f:
+            state = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+    return state if isinstance(state, dict) else {}
+
+
+def diff_tree(data: Dict[str, Any], existing: List[str], state: Dict[str, str]) -> TreeDiff:
+    """
+    比较期望目录与现有目录。上一次运行记录的状态（ID -> 路径）用于识别改名：
+    某个 ID 的期望路径不存在、而它上次的路径仍存在且不再被其他对象使用时，视为改名。
+    平台目录先于游戏项目录处理，平台改名后其下的游戏项路径随之更新。
+    """
+    desired = desired_directories(data)
+    present = set(existing)
+    diff = TreeDiff()
+    claimed: set = set()  # 已被某个期望目录占用的现有路径
+    moved_platforms: Dict[str, str] = {}  # 新平台目录 -> 旧平台目录
+
+    def current(path: str) -> str:
+        # 平台改名前，游戏项目录仍位于旧平台目录下
+        head, _, tail = path.partition("/")
+        return f"{moved_platforms[head]}/{tail}" if tail and head in moved_platforms else path
+
+    def rebase(path: str) -> str:
+        # 旧状态中的路径换算到平台改名之后的位置
+        head, _, tail = path.partition("/")
+        renamed = {old: new for new, old in moved_platforms.items()}
+        return f"{renamed[head]}/{tail}" if tail and head in renamed else path
+
+    for level in (1, 2):
+        for path, keys in desired.items():
+            if path.count("/") != level - 1:
+                continue
+            for key in keys:
+                diff.state[key] = path
+            if current(path) in present:
+                diff.unchanged += 1
+                claimed.add(current(path))
+                continue
+            old = next(
+                (state[key] for key in keys if state.get(key) and state[key] != path),
+                None,
+            )
+            old_current = current(rebase(old)) if old else None
+            if (
+                old_current
+                and old_current in present
+                and old_current not in claimed
+                and rebase(old) not in desired
+                and old.count("/") == path.count("/")
+            ):
+                diff.rename.append((rebase(old), path))
+                claimed.add(old_current)
+                if level == 1:
+                    moved_platforms[path] = old
+            else:
+                diff.create.append(path)
+
+    expected_current = {current(path) for path in desired} | claimed
+    stale = set()
+    for path in existing:
+        parent = path.rpartition("/")[0]
+        if parent in stale or path in expected_current or path.split("/")[-1].startswith("."):
+            continue  # 过期平台目录下的游戏项目录不再逐个列出
+        stale.add(path)
+        diff.stale.append(path)
+    return diff
+
+
+def diff_from_changes(
+    data: Dict[str, Any],
+    changes: List[Dict[str, Any]],
+    base_dir: str,
+    state: Dict[str, str],
+) -> TreeDiff:
+    """
+    只根据变更流（catalog_diff.py）计算差异：只检查变更涉及的目录，不扫描整个目录树，
+    耗时与变更数量成正比。改名、共用目录与状态文件的处理规则与 diff_tree 相同。
+    """
+    root = Path(base_dir)
+    desired = desired_directories(data)
+    diff = TreeDiff(state=dict(state))
+    moved_platforms: Dict[str, str] = {}  # 新平台目录 -> 旧平台目录
+
+    def current(path: str) -> str:
+        head, _, tail = path.partition("/")
+        return f"{moved_platforms[head]}/{tail}" if tail and head in moved_platforms else path
+
+    def rebase(path: str) -> str:
+        head, _, tail = path.partition("/")
+        renamed = {old: new for new, old in moved_platforms.items()}
+        return f"{renamed[head]}/{tail}" if tail and head in renamed else path
+
+    def directory(change: Dict[str, Any], record: Optional[Dict[str, Any]]) -> Optional[str]:
+        if record is None:
+            return None
+        platform_id = record.get("gamingPlatformId", change["id"])
+        platform_dir = sanitize_name(record.get("gamingPlatformName") or f"platform_{platform_id}")
+        if change["kind"] == "platform":
+            return platform_dir
+        item_name = record.get("gamingItemName")
+        return f"{platform_dir}/{sanitize_name(item_name)}" if item_name else None
+
+    def with_unchanged_items(changes: List[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        # 平台改名但目录无法整体改名（旧目录仍被同名平台使用）时，其下未变化的游戏项也要逐个迁移
+        changed_items = {c["id"] for c in changes if c["kind"] == "item"}
+        for change in changes:
+            yield change
+            if change["kind"] != "platform" or change["op"] != RENAMED:
+                continue
+            if sanitize_name(change["after"].get("gamingPlatformName") or "") in moved_platforms:
+                continue
+            for item in data.get(change["id"], {}).get("items") or []:
+                if str(item.get("gamingItemId")) in changed_items:
+                    continue
+                record = {**item, "gamingPlatformId": change["id"]}
+                yield {
+                    "kind": "item",
+                    "id": str(item.get("gamingItemId")),
+                    "before": {**record, "gamingPlatformName": change["before"].get("gamingPlatformName")},
+                    "after": {**record, "gamingPlatformName": change["after"].get("gamingPlatformName")},
+                }
+
+    for change in with_unchanged_items(changes):
+        key = f"{change['kind']}:{change['id']}"
+        old, new = directory(change, change["before"]), directory(change, change["after"])
+        old = rebase(old) if old else None
+        if new is None:
+            diff.state.pop(key, None)
+            parent = (old or "").rpartition("/")[0]
+            if old and old not in desired and parent not in diff.stale and (root / current(old)).is_dir():
+                diff.stale.append(old)
+            continue
+        diff.state[key] = new
+        if (root / current(new)).is_dir():
+            diff.unchanged += 1
+        elif old and old != new and old not in desired and (root / current(old)).is_dir():
+            diff.rename.append((old, new))
+            if change["kind"] == "platform":
+                moved_platforms[new] = old
+        elif new not in diff.create:
+            diff.create.append(new)
+    return diff
+
+
+def apply_tree_diff(diff: TreeDiff, base_dir: str, workers: int = 8) -> None:
+    """
+    执行差异：先改名平台目录，再并行改名游戏项目录，最后并行创建缺失的目录。
+    """
+    root = Path(base_dir)
+    for level in (1, 2):
+        plan = FsPlan()
+        for old, new in diff.rename:
+            if new.count("/") == level - 1:
+                plan.add(root / old, root / new)
+        for op in plan.conflicts():
+            print(f"无法改名: {op.describe()}", file=sys.stderr)
+        for op in plan.apply(workers=workers):
+            if op.status != DONE:
+                print(f"改名失败: {op.describe()}", file=sys.stderr)
+
+    root.mkdir(parents=True, exist_ok=True)
+    platforms = [p for p in diff.create if "/" not in p]
+    items = [p for p in diff.create if "/" in p]
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        # 平台目录先建好，游戏项目录之间互不依赖，可并行创建
+        list(pool.map(lambda p: (root / p).mkdir(exist_ok=True), platforms))
+        list(pool.map(lambda p: (root / p).mkdir(parents=True, exist_ok=True), items))
+
+
+def print_tree_diff(diff: TreeDiff) -> None:
+    for path in diff.create:
+        print(f"+ {path}")
+    for old, new in diff.rename:
+        print(f"~ {old} -> {new}")
+    for path in diff.stale:
+        print(f"- {path}（数据中已不存在，未删除）")
+    print(
+        f"新建 {len(diff.create)} 个，改名 {len(diff.rename)} 个，"
+        f"过期 {len(diff.stale)} 个，无变化 {diff.unchanged} 个"
+    )
+
+
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="根据 gaming_platforms.json 创建平台与游戏项目录")
     parser.add_argument(
         "--json",
         default="gaming_platforms.json",
-        help="输入 JSON 文件路径（默认为 gaming_platforms.json）",
+        help="输入 JSON 文件路径（默认为 gaming_platforms.json），也可以是编译后的 .sqlite 目录文件",
     )
     parser.add_argument(
         "--output-dir",
         default=".",
         help="创建目录的根路径（默认为当前目录）",
     )
+    parser.add_argument(
+        "--diff",
+        action="store_true",
+        help="差异模式：扫描现有目录树，只创建缺失的目录、按 ID 识别改名，并报告过期目录",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="与 --diff 一起使用，只打印差异，不修改目录",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=8,
+        help="差异模式下并行创建/改名的线程数，默认 8",
+    )
+    parser.add_argument(
+        "--state-file",
+        default=None,
+        help=f"差异模式记录 ID 与目录对应关系的状态文件（默认为根路径下的 {DEFAULT_STATE_FILE}）",
+    )
+    parser.add_argument(
+        "--changes",
+        nargs="?",
+        const=DEFAULT_FEED_PATH,
+        default=None,
+        help=f"按 query.py 写入的变更流只处理有变化的平台与游戏项（隐含 --diff），默认读取 {DEFAULT_FEED_PATH}",
+    )
+    parser.add_argument(
+        "--since",
+        type=int,
+        default=None,
+        help=(
+            "与 --changes 一起使用：合并处理序号大于该值的全部变更；"
+            f"默认处理根路径下 {DEFAULT_CURSOR_FILE} 记录的上次处理位置之后的全部变更"
+        ),
+    )
     return parser.parse_args()
 
 
 def main() -> None:
     args = parse_args()
     try:
-        with open(args.json, "r", encoding="utf-8") as f:
-            data = json.load(f)
-            if not isinstance(data, dict):
-                print("JSON 根节点应为对象（以平台ID为键）", file=sys.stderr)
-                sys.exit(2)
+        data = load_platform_dict(args.json)
     except FileNotFoundError:
         print(f"未找到 JSON 文件: {args.json}", file=sys.stderr)
         sys.exit(1)
     except json.JSONDecodeError as e:
         print(f"JSON 解析失败: {e}", file=sys.stderr)
         sys.exit(1)
+    except sqlite3.Error as e:
+        print(f"目录文件读取失败: {e}", file=sys.stderr)
+        sys.exit(1)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        sys.exit(2)
+
+    if not args.diff and not args.changes:
+        created = create_directories_from_json(data, args.output_dir)
+        print(f"已创建/确认存在 {len(created)} 个目录。根路径: {os.path.abspath(args.output_dir)}")
+        return
 
-    created = create_directories_from_json(data, args.output_dir)
-    print(f"已创建/确认存在 {len(created)} 个目录。根路径: {os.path.abspath(args.output_dir)}")
+    state_file = args.state_file or os.path.join(args.output_dir, DEFAULT_STATE_FILE)
+    cursor_file = os.path.join(args.output_dir, DEFAULT_CURSOR_FILE)
+    seq = None
+    if args.changes:
+        changes, seq = load_pending_changes(args.changes, cursor_file, args.since)
+        diff = diff_from_changes(data, changes, args.output_dir, load_state(state_file))
+    else:
+        diff = diff_tree(data, scan_existing_directories(args.output_dir), load_state(state_file))
+    print_tree_diff(diff)
+    if args.dry_run:
+        return
+    if not diff.is_empty():
+        apply_tree_diff(diff, args.output_dir, args.workers)
+    if load_state(state_file) != diff.state:
+        write_json_atomic(state_file, diff.state, indent=2)
+    if seq is not None:
+        write_cursor(cursor_file, args.changes, seq)
+    print(f"根路径: {os.path.abspath(args.output_dir)}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,331 @@
+import argparse
+import json
+import math
+import os
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow 为可选依赖，仅本模块需要
+    Image = None
+
+from asset_index import AssetIndex, open_asset_index
+from asset_tree import iter_tree_images
+from response_cache import write_json_atomic
+
+
+DEFAULT_CACHE_PATH = ".phash_cache.json"
+HASH_KINDS = ("ahash", "dhash", "phash")
+
+# pHash：32x32 灰度图做二维 DCT，取左上角 8x8 低频系数
+_DCT_SIZE = 32
+_DCT_KEEP = 8
+_DCT_MATRIX = [
+    [math.cos(math.pi * (2 * x + 1) * u / (2 * _DCT_SIZE)) for x in range(_DCT_SIZE)]
+    for u in range(_DCT_KEEP)
+]
+
+
+def require_pillow() -> None:
+    if Image is None:
+        raise SystemExit("需要安装 Pillow 才能计算图片哈希：pip install Pillow")
+
+
+def _grayscale(im: "Image.Image", size: Tuple[int, int]) -> List[int]:
+    if im.mode in ("RGBA", "LA") or (im.mode == "P" and "transparency" in im.info):
+        # 透明区域按白色背景处理，避免透明像素中残留的颜色影响哈希
+        rgba = im.convert("RGBA")
+        background = Image.new("RGBA", rgba.size, (255, 255, 255, 255))
+        im = Image.alpha_composite(background, rgba)
+    small = im.convert("L").resize(size, Image.LANCZOS)
+    return list(small.tobytes())
+
+
+def _bits_to_hex(bits: Iterator[bool]) -> str:
+    value = 0
+    for bit in bits:
+        value = (value << 1) | int(bit)
+    return f"{value:016x}"
+
+
+def image_hashes(path: str) -> Dict[str, str]:
+    """
+    计算 64 位的 aHash（均值）、dHash（相邻像素差）与 pHash（DCT 低频），以 16 位十六进制返回。
+    """
+    require_pillow()
+    with Image.open(path) as im:
+        im.load()
+        pixels8 = _grayscale(im, (8, 8))
+        pixels9 = _grayscale(im, (9, 8))
+        pixels32 = _grayscale(im, (_DCT_SIZE, _DCT_SIZE))
+
+    mean = sum(pixels8) / len(pixels8)
+    ahash = _bits_to_hex(p > mean for p in pixels8)
+    dhash = _bits_to_hex(pixels9[r * 9 + c] > pixels9[r * 9 + c + 1] for r in range(8) for c in range(8))
+
+    rows = [pixels32[r * _DCT_SIZE:(r + 1) * _DCT_SIZE] for r in range(_DCT_SIZE)]
+    # 先对每行做 DCT（只保留 8 个系数），再对列做 DCT
+    row_dct = [[sum(c * v for c, v in zip(basis, row)) for basis in _DCT_MATRIX] for row in rows]
+    coeffs = [
+        sum(_DCT_MATRIX[u][x] * row_dct[x][v] for x in range(_DCT_SIZE))
+        for u in range(_DCT_KEEP)
+        for v in range(_DCT_KEEP)
+    ]
+    # 直流分量不参与中位数计算
+    median = sorted(coeffs[1:])[len(coeffs[1:]) // 2]
+    phash = _bits_to_hex(c > median for c in coeffs)
+    return {"ahash": ahash, "dhash": dhash, "phash": phash}
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+class HashStore:
+    """
+    图片哈希的本地缓存，以绝对路径为键，文件大小与修改时间都未变化时复用缓存结果。
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._dirty = False
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                self._entries: Dict[str, Dict[str, Any]] = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self._entries = {}
+
+    def get(self, file_path: str) -> Optional[Dict[str, str]]:
+        key = os.path.abspath(file_path)
+        st = os.stat(key)
+        entry = self._entries.get(key)
+        if entry and entry["size"] == st.st_size and entry["mtimeNs"] == st.st_mtime_ns:
+            return {kind: entry[kind] for kind in HASH_KINDS}
+        return None
+
+    def put(self, file_path: str, hashes: Dict[str, str]) -> None:
+        key = os.path.abspath(file_path)
+        st = os.stat(key)
+        with self._lock:
+            self._entries[key] = {"size": st.st_size, "mtimeNs": st.st_mtime_ns, **hashes}
+            self._dirty = True
+
+    def save(self) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+            write_json_atomic(self.path, self._entries)
+            self._dirty = False
+
+
+class IndexedHashStore(HashStore):
+    """
+    把感知哈希存放在资源索引（asset_index.py）中：索引里的文件读写索引的哈希列，
+    索引之外的文件仍使用 path 指向的 JSON 缓存。
+    """
+
+    def __init__(self, index: AssetIndex, path: str) -> None:
+        super().__init__(path)
+        self.index = index
+
+    def get(self, file_path: str) -> Optional[Dict[str, str]]:
+        return self.index.image_hashes(os.path.abspath(file_path)) or super().get(file_path)
+
+    def put(self, file_path: str, hashes: Dict[str, str]) -> None:
+        if not self.index.set_image_hashes(os.path.abspath(file_path), hashes):
+            super().put(file_path, hashes)
+
+
+def _hash_job(path: str) -> Tuple[str, Optional[Dict[str, str]], Optional[str]]:
+    try:
+        return path, image_hashes(path), None
+    except Exception as e:
+        return path, None, str(e)
+
+
+def compute_hashes(
+    paths: List[str],
+    store: Optional[HashStore] = None,
+    workers: Optional[int] = None,
+) -> Tuple[Dict[str, Dict[str, str]], Dict[str, str]]:
+    """
+    计算图片哈希（缓存未命中的部分在进程池中并行计算）。返回 (路径 -> 哈希, 路径 -> 错误信息)。
+    """
+    hashes: Dict[str, Dict[str, str]] = {}
+    errors: Dict[str, str] = {}
+    todo: List[str] = []
+    for path in paths:
+        cached = store.get(path) if store is not None else None
+        if cached is not None:
+            hashes[path] = cached
+        else:
+            todo.append(path)
+    if todo:
+        require_pillow()
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for path, result, error in pool.map(_hash_job, todo, chunksize=16):
+                if result is None:
+                    errors[path] = error or ""
+                    continue
+                hashes[path] = result
+                if store is not None:
+                    store.put(path, result)
+    return hashes, errors
+
+
+class BKTree:
+    """
+    以汉明距离为度量的 BK 树：查询"距离不超过 d 的所有哈希"时，
+    利用三角不等式只访问距离落在 [dist - d, dist + d] 内的子树。
+    """
+
+    def __init__(self) -> None:
+        self._root: Optional[Tuple[int, List[int], Dict[int, Any]]] = None
+
+    def add(self, value: int, index: int) -> None:
+        if self._root is None:
+            self._root = (value, [index], {})
+            return
+        node = self._root
+        while True:
+            dist = hamming(value, node[0])
+            if dist == 0:
+                node[1].append(index)
+                return
+            child = node[2].get(dist)
+            if child is None:
+                node[2][dist] = (value, [index], {})
+                return
+            node = child
+
+    def search(self, value: int, max_distance: int) -> List[Tuple[int, int]]:
+        """
+        返回 (下标, 距离) 列表。
+        """
+        found: List[Tuple[int, int]] = []
+        stack = [self._root] if self._root is not None else []
+        while stack:
+            node_value, indexes, children = stack.pop()
+            dist = hamming(value, node_value)
+            if dist <= max_distance:
+                found.extend((index, dist) for index in indexes)
+            for child_dist, child in children.items():
+                if dist - max_distance <= child_dist <= dist + max_distance:
+                    stack.append(child)
+        return found
+
+
+class UnionFind:
+    def __init__(self, size: int) -> None:
+        self.parent = list(range(size))
+
+    def find(self, x: int) -> int:
+        while self.parent[x] != x:
+            self.parent[x] = self.parent[self.parent[x]]
+            x = self.parent[x]
+        return x
+
+    def union(self, a: int, b: int) -> None:
+        ra, rb = self.find(a), self.find(b)
+        if ra != rb:
+            self.parent[max(ra, rb)] = min(ra, rb)
+
+
+def find_clusters(
+    hashes: Dict[str, Dict[str, str]],
+    kind: str = "phash",
+    threshold: int = 4,
+) -> List[Dict[str, Any]]:
+    """
+    把哈希距离不超过 threshold 的图片连成簇（并查集传递合并），返回至少包含两张图片的簇，
+    每个簇给出成员与簇内最大距离（0 表示哈希完全相同）。
+    """
+    paths = sorted(hashes)
+    values = [int(hashes[p][kind], 16) for p in paths]
+    tree = BKTree()
+    for index, value in enumerate(values):
+        tree.add(value, index)
+    groups = UnionFind(len(paths))
+    for index, value in enumerate(values):
+        for other, _ in tree.search(value, threshold):
+            if other != index:
+                groups.union(index, other)
+
+    members: Dict[int, List[int]] = {}
+    for index in range(len(paths)):
+        members.setdefault(groups.find(index), []).append(index)
+    clusters = []
+    for indexes in members.values():
+        if len(indexes) < 2:
+            continue
+        spread = max(hamming(values[a], values[b]) for a in indexes for b in indexes)
+        clusters.append({
+            "files": [paths[i] for i in indexes],
+            "maxDistance": spread,
+            "bytes": sum(os.path.getsize(paths[i]) for i in indexes),
+        })
+    clusters.sort(key=lambda c: (c["maxDistance"], -len(c["files"]), c["files"][0]))
+    return clusters
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="用感知哈希查找目录树中重复或近似重复的图片")
+    parser.add_argument("--root", type=str, default="gamingType", help="图片目录树根路径，默认 gamingType")
+    parser.add_argument("--types", type=str, default=None, help="只处理这些 gamingType 目录，逗号分隔")
+    parser.add_argument("--platform", action="append", default=None, help="只处理指定平台目录，可重复")
+    parser.add_argument("--hash", choices=HASH_KINDS, default="phash", help="用于比较的哈希，默认 phash")
+    parser.add_argument("--threshold", type=int, default=4, help="视为重复的最大汉明距离（0-64），默认 4")
+    parser.add_argument("--workers", type=int, default=None, help="计算哈希的进程数，默认为 CPU 核数")
+    parser.add_argument("--cache", type=str, default=DEFAULT_CACHE_PATH, help=f"哈希缓存路径，默认 {DEFAULT_CACHE_PATH}")
+    parser.add_argument(
+        "--index",
+        type=str,
+        default=None,
+        help="资源索引路径（asset_index.py）：感知哈希存入索引，与上传、校验共用同一份文件元数据",
+    )
+    parser.add_argument("--report", type=str, default="duplicates_report.json", help="重复图片报告输出路径")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    root = Path(args.root)
+    if not root.is_dir():
+        print(f"目录不存在: {root}", file=sys.stderr)
+        sys.exit(1)
+    types = [t.strip() for t in args.types.split(",") if t.strip()] if args.types else None
+    paths = [str(p) for p in iter_tree_images(root, types, args.platform)]
+
+    index = open_asset_index(args.index, args.root, json_file=None) if args.index else None
+    store = IndexedHashStore(index, args.cache) if index is not None else HashStore(args.cache)
+    try:
+        hashes, errors = compute_hashes(paths, store, args.workers)
+    finally:
+        store.save()
+        if index is not None:
+            index.close()
+    for path, error in errors.items():
+        print(f"无法读取: {path} - {error}")
+
+    clusters = find_clusters(hashes, args.hash, args.threshold)
+    for number, cluster in enumerate(clusters, 1):
+        label = "完全相同" if cluster["maxDistance"] == 0 else f"最大距离 {cluster['maxDistance']}"
+        print(f"[{number}] {len(cluster['files'])} 张（{label}）")
+        for path in cluster["files"]:
+            print(f"    {path}")
+    redundant = sum(len(c["files"]) - 1 for c in clusters)
+    saved = sum(c["bytes"] - c["bytes"] // len(c["files"]) for c in clusters)
+    write_json_atomic(args.report, {"hash": args.hash, "threshold": args.threshold, "clusters": clusters}, indent=2)
+    print(
+        f"共 {len(hashes)} 张图片，{len(clusters)} 组重复，可省去约 {redundant} 张"
+        f"（约 {saved / 1024 / 1024:.1f} MB），报告已保存到 {args.report}"
+    )
+
+
+if __name__ == "__main__":
+    main()
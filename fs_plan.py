@@ -0,0 +1,162 @@
+import json
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+# 操作状态
+PLANNED = "planned"
+CONFLICT = "conflict"
+DONE = "done"
+FAILED = "failed"
+
+
+@dataclass
+class FileOp:
+    src: Path
+    dest: Path
+    status: str = PLANNED
+    reason: str = ""
+
+    def describe(self) -> str:
+        text = f"{self.src} -> {self.dest}"
+        return f"{text}（{self.reason}）" if self.reason else text
+
+
+def _key(path: Path) -> str:
+    return os.path.normcase(os.path.abspath(path))
+
+
+class FsPlan:
+    """
+    文件移动/重命名计划：先完整计算所有 源 -> 目标，再统一执行。
+    - add 时检测冲突：目标已存在于磁盘、多个文件指向同一目标、同一文件被重复加入；
+      冲突的操作标记为 conflict，不会执行（源已不存在而目标存在时不算冲突，见下）
+    - apply 用线程池并行执行，每完成一项就追加写入撤销日志（JSONL，逐行 fsync）；
+      日志只追加、从不清空，中断后重跑不会丢失上一次已移动文件的撤销记录
+    - 重试安全：源文件已不存在而目标已存在的操作视为上次已完成，同样记入撤销日志
+    - undo_plan 按撤销日志逆序把文件移回原处
+    exists 用于判断目标是否已存在，默认直接访问磁盘，也可以传入 TreeSnapshot.exists。
+    """
+
+    def __init__(self, exists: Optional[Callable[[Path], bool]] = None) -> None:
+        self.ops: List[FileOp] = []
+        self._exists = exists or (lambda p: Path(p).exists())
+        self._dests: Dict[str, FileOp] = {}
+        self._srcs: Dict[str, FileOp] = {}
+
+    def add(self, src: Path, dest: Path) -> FileOp:
+        op = FileOp(Path(src), Path(dest))
+        src_key, dest_key = _key(op.src), _key(op.dest)
+        if src_key in self._srcs:
+            op.status, op.reason = CONFLICT, "源文件已在计划中"
+        elif dest_key in self._dests:
+            op.status, op.reason = CONFLICT, f"与 {self._dests[dest_key].src.name} 的目标相同"
+        elif dest_key != src_key and self._exists(op.dest) and self._exists(op.src):
+            op.status, op.reason = CONFLICT, "目标已存在"
+        else:
+            self._srcs[src_key] = op
+            self._dests[dest_key] = op
+        self.ops.append(op)
+        return op
+
+    def planned(self) -> List[FileOp]:
+        return [op for op in self.ops if op.status == PLANNED]
+
+    def conflicts(self) -> List[FileOp]:
+        return [op for op in self.ops if op.status == CONFLICT]
+
+    def to_json(self) -> List[Dict[str, str]]:
+        return [
+            {"src": str(op.src), "dest": str(op.dest), "status": op.status, "reason": op.reason}
+            for op in self.ops
+        ]
+
+    def apply(
+        self,
+        workers: int = 8,
+        undo_log: Optional[str] = None,
+        on_done: Optional[Callable[[FileOp], None]] = None,
+    ) -> List[FileOp]:
+        """
+        并行执行计划中未冲突的操作，返回这些操作（status 为 done 或 failed）。
+        on_done 在每项完成后调用（在工作线程中，需自行保证线程安全）。
+        """
+        ops = self.planned()
+        lock = threading.Lock()
+        log = open(undo_log, "a", encoding="utf-8") if undo_log and ops else None
+
+        def run(op: FileOp) -> FileOp:
+            try:
+                if not op.src.exists() and op.dest.exists():
+                    op.reason = "此前已完成"
+                elif op.dest.exists() and _key(op.dest) != _key(op.src):
+                    raise FileExistsError(f"目标已存在: {op.dest}")
+                else:
+                    op.dest.parent.mkdir(parents=True, exist_ok=True)
+                    shutil.move(str(op.src), str(op.dest))
+                op.status = DONE
+            except Exception as e:
+                op.status, op.reason = FAILED, str(e)
+            if op.status == DONE and log is not None:
+                line = json.dumps({"src": str(op.src), "dest": str(op.dest), "ts": time.time()}, ensure_ascii=False)
+                with lock:
+                    log.write(line + "\n")
+                    log.flush()
+                    os.fsync(log.fileno())
+            if on_done is not None:
+                on_done(op)
+            return op
+
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+                return list(pool.map(run, ops))
+        finally:
+            if log is not None:
+                log.close()
+
+
+def undo_plan(
+    undo_log: str,
+    workers: int = 8,
+    on_done: Optional[Callable[[FileOp], None]] = None,
+) -> List[FileOp]:
+    """
+    按撤销日志把文件移回原处（逆序执行）。全部成功后日志改名为 *.undone，避免重复撤销。
+    日志可能包含多次运行的记录（例如先重命名、后又移动同一文件，或重跑时重复记录的项），
+    涉及同一路径的操作分到先后两批执行，其余操作在同一批内并行。
+    """
+    entries = []
+    with open(undo_log, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entries.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue  # 中断时可能留下不完整的最后一行
+    batches: List[FsPlan] = [FsPlan()]
+    touched: set = set()
+    for entry in reversed(entries):
+        src, dest = Path(entry["dest"]), Path(entry["src"])
+        keys = {_key(src), _key(dest)}
+        if keys & touched:
+            batches.append(FsPlan())
+            touched = set()
+        touched |= keys
+        batches[-1].add(src, dest)
+    ops: List[FileOp] = []
+    for plan in batches:
+        plan.apply(workers, on_done=on_done)
+        if on_done is not None:
+            for op in plan.conflicts():
+                on_done(op)
+        ops.extend(plan.ops)
+    if all(op.status == DONE for op in ops):
+        os.replace(undo_log, undo_log + ".undone")
+    return ops
@@ -0,0 +1,46 @@
+import json
+import os
+import threading
+from typing import Any, Dict
+
+from response_cache import write_json_atomic
+from upload_journal import file_sha256
+
+DEFAULT_HASH_CACHE_PATH = ".hash_cache.json"
+
+
+class HashCache:
+    """
+    文件 SHA-256 的本地缓存，以绝对路径为键，记录 size、mtime（纳秒）与哈希。
+    文件大小与修改时间都未变化时直接返回缓存的哈希，不再重新读取文件内容。
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._dirty = False
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                self._entries: Dict[str, Dict[str, Any]] = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self._entries = {}
+
+    def sha256(self, file_path: str) -> str:
+        key = os.path.abspath(file_path)
+        st = os.stat(key)
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry and entry["size"] == st.st_size and entry["mtimeNs"] == st.st_mtime_ns:
+            return entry["sha256"]
+        digest = file_sha256(key)
+        with self._lock:
+            self._entries[key] = {"size": st.st_size, "mtimeNs": st.st_mtime_ns, "sha256": digest}
+            self._dirty = True
+        return digest
+
+    def save(self) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+            write_json_atomic(self.path, self._entries)
+            self._dirty = False
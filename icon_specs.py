@@ -0,0 +1,48 @@
+import json
+from typing import Any, Dict, Optional
+
+# 各图片字段的规格，可用 JSON 文件按字段覆盖：
+# - size: 规格尺寸 [宽, 高]（优化时超出则等比缩小，不放大；校验时尺寸不一致报警告）
+# - maxBytes: 单个文件大小上限
+# - formats: 允许的图片格式（Pillow 格式名）
+# - alpha: 是否允许/保留透明通道
+DEFAULT_SPEC: Dict[str, Any] = {
+    "size": [408, 408],
+    "maxBytes": 400 * 1024,
+    "formats": ["PNG", "JPEG", "WEBP"],
+    "alpha": True,
+}
+
+# 游戏项方形图标：现有 gamingType/{type}/{平台}/ 下均为 408x408 的 RGBA PNG，
+# 体积约 150-375 KB（中位数约 265 KB），上限取 400 KB，现有图片都不会报警告
+_ITEM_ICON: Dict[str, Any] = {"size": [408, 408], "maxBytes": 400 * 1024}
+# 平台标识（updateGamePlatfrom 独有的字段）：目录树中还没有这类图片，尺寸与体积为预定规格
+_PLATFORM_ICON: Dict[str, Any] = {"size": [200, 200], "maxBytes": 100 * 1024}
+
+ICON_SLOT_SPECS: Dict[str, Dict[str, Any]] = {
+    # 游戏项图片（updateGameItemInfo）；conUrlFile / icon1File-icon3File 平台也有同名字段，按游戏项规格
+    "conUrlFile": {**_ITEM_ICON, "formats": ["PNG", "JPEG"], "alpha": False},
+    "icon1File": dict(_ITEM_ICON),
+    "icon2File": dict(_ITEM_ICON),
+    "icon3File": dict(_ITEM_ICON),
+    "hjIcon1File": dict(_ITEM_ICON),
+    "hjIcon2File": dict(_ITEM_ICON),
+    "hjIcon3File": dict(_ITEM_ICON),
+    # 平台图片（updateGamePlatfrom）
+    "icon4File": dict(_PLATFORM_ICON),
+    "icon5File": {**_PLATFORM_ICON, "formats": ["PNG", "WEBP"]},
+}
+
+
+def load_slot_specs(spec_file: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    返回每个图片字段的完整规格（默认值 + 字段配置 + spec_file 中的覆盖项）。
+    """
+    overrides: Dict[str, Dict[str, Any]] = {}
+    if spec_file:
+        with open(spec_file, "r", encoding="utf-8") as f:
+            overrides = json.load(f)
+    specs: Dict[str, Dict[str, Any]] = {}
+    for slot in set(ICON_SLOT_SPECS) | set(overrides):
+        specs[slot] = {**DEFAULT_SPEC, **ICON_SLOT_SPECS.get(slot, {}), **overrides.get(slot, {})}
+    return specs
@@ -0,0 +1,109 @@
+import struct
+from dataclasses import dataclass
+from typing import BinaryIO, Optional
+
+# 文件头最多读取的字节数；JPEG 的尺寸在 SOF 段中，位置不固定，需要逐段跳读
+_HEAD_BYTES = 64
+
+
+@dataclass
+class ImageInfo:
+    format: str  # 与 Pillow 的格式名一致：PNG / JPEG / GIF / BMP / WEBP
+    width: int
+    height: int
+    alpha: Optional[bool]  # 是否带透明通道；无法仅从文件头判断时为 None
+
+
+class ImageHeaderError(ValueError):
+    pass
+
+
+def _png_info(f: BinaryIO, head: bytes) -> ImageInfo:
+    if len(head) < 26 or head[12:16] != b"IHDR":
+        raise ImageHeaderError("PNG 缺少 IHDR")
+    width, height = struct.unpack(">II", head[16:24])
+    color_type = head[25]
+    alpha = color_type in (4, 6)
+    if color_type == 3:
+        # 调色板图片：IDAT 之前出现 tRNS 段即带透明
+        f.seek(8)
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                break
+            length, kind = struct.unpack(">I4s", header)
+            if kind == b"tRNS":
+                alpha = True
+                break
+            if kind in (b"IDAT", b"IEND"):
+                break
+            f.seek(length + 4, 1)
+    return ImageInfo("PNG", width, height, alpha)
+
+
+def _jpeg_info(f: BinaryIO) -> ImageInfo:
+    f.seek(2)
+    while True:
+        marker = f.read(2)
+        if len(marker) < 2 or marker[0] != 0xFF:
+            raise ImageHeaderError("JPEG 段结构损坏")
+        code = marker[1]
+        if code == 0xFF:
+            f.seek(-1, 1)  # 填充字节
+            continue
+        if code in (0xD8, 0x01) or 0xD0 <= code <= 0xD7:
+            continue  # 无长度字段的标记
+        if code in (0xD9, 0xDA):
+            raise ImageHeaderError("JPEG 在 SOF 之前结束")
+        length_bytes = f.read(2)
+        if len(length_bytes) < 2:
+            raise ImageHeaderError("JPEG 文件不完整")
+        length = struct.unpack(">H", length_bytes)[0]
+        if 0xC0 <= code <= 0xCF and code not in (0xC4, 0xC8, 0xCC):
+            data = f.read(5)
+            if len(data) < 5:
+                raise ImageHeaderError("JPEG 文件不完整")
+            height, width = struct.unpack(">HH", data[1:5])
+            return ImageInfo("JPEG", width, height, False)
+        f.seek(length - 2, 1)
+
+
+def _webp_info(head: bytes) -> ImageInfo:
+    chunk = head[12:16]
+    if chunk == b"VP8 " and len(head) >= 30:
+        width, height = struct.unpack("<HH", head[26:30])
+        return ImageInfo("WEBP", width & 0x3FFF, height & 0x3FFF, False)
+    if chunk == b"VP8L" and len(head) >= 25:
+        bits = struct.unpack("<I", head[21:25])[0]
+        alpha = bool(bits >> 28 & 1)
+        return ImageInfo("WEBP", (bits & 0x3FFF) + 1, (bits >> 14 & 0x3FFF) + 1, alpha)
+    if chunk == b"VP8X" and len(head) >= 30:
+        alpha = bool(head[20] & 0x10)
+        width = int.from_bytes(head[24:27], "little") + 1
+        height = int.from_bytes(head[27:30], "little") + 1
+        return ImageInfo("WEBP", width, height, alpha)
+    raise ImageHeaderError("无法识别的 WebP 数据块")
+
+
+def read_image_info(path: str) -> ImageInfo:
+    """
+    只读取文件头解析图片格式、尺寸与透明通道，不解码像素。
+    无法识别或文件头损坏时抛出 ImageHeaderError。
+    """
+    with open(path, "rb") as f:
+        head = f.read(_HEAD_BYTES)
+        if head.startswith(b"\x89PNG\r\n\x1a\n"):
+            return _png_info(f, head)
+        if head.startswith(b"\xff\xd8"):
+            return _jpeg_info(f)
+        if head[:6] in (b"GIF87a", b"GIF89a") and len(head) >= 10:
+            width, height = struct.unpack("<HH", head[6:10])
+            return ImageInfo("GIF", width, height, None)
+        if head.startswith(b"BM") and len(head) >= 30:
+            width, height = struct.unpack("<ii", head[18:26])
+            bpp = struct.unpack("<H", head[28:30])[0]
+            # 32 位 BMP 的第四通道不一定是透明度
+            return ImageInfo("BMP", width, abs(height), None if bpp == 32 else False)
+        if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+            return _webp_info(head)
+    raise ImageHeaderError("无法识别的图片格式")
@@ -1,48 +1,43 @@
 import argparse
-import os
-import shutil
 from pathlib import Path
-from typing import Dict, Iterable
+from typing import Dict, Iterable, Optional
 
+from fs_plan import CONFLICT, DONE, FsPlan, undo_plan
+from naming import is_image
+from tree_snapshot import TreeSnapshot
 
-IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".bmp", ".webp"}
 
+DEFAULT_UNDO_LOG = "move_undo.jsonl"
 
-def is_image(path: Path) -> bool:
-    return path.is_file() and path.suffix.lower() in IMAGE_EXTENSIONS
 
-
-def collect_folder_map(base_dir: Path, recursive: bool) -> Dict[str, Path]:
+def collect_folder_map(base_dir: Path, recursive: bool, snapshot: Optional[TreeSnapshot] = None) -> Dict[str, Path]:
     """
     收集文件夹名称到路径的映射（小写作为匹配键）。
     - recursive=False: 仅收集 base_dir 的第一层子目录
     - recursive=True: 递归收集 base_dir 下的所有目录
+    给出 snapshot 时直接从快照读取，不再访问磁盘。
     """
+    snapshot = snapshot or TreeSnapshot(base_dir, max_depth=None if recursive else 1)
     folder_map: Dict[str, Path] = {}
-    if recursive:
-        for p in base_dir.rglob("*"):
-            if p.is_dir():
-                folder_map[p.name.lower()] = p
-    else:
-        for p in base_dir.iterdir():
-            if p.is_dir():
-                folder_map[p.name.lower()] = p
+    folders = snapshot.all_dirs() if recursive else snapshot.child_dirs(base_dir)
+    for p in folders:
+        folder_map[p.name.lower()] = p
     return folder_map
 
 
-def iter_images(source_dir: Path, recursive: bool) -> Iterable[Path]:
-    if recursive:
-        yield from (p for p in source_dir.rglob("*") if is_image(p))
-    else:
-        yield from (p for p in source_dir.iterdir() if is_image(p))
+def iter_images(source_dir: Path, recursive: bool, snapshot: Optional[TreeSnapshot] = None) -> Iterable[Path]:
+    snapshot = snapshot or TreeSnapshot(source_dir, max_depth=None if recursive else 1)
+    yield from snapshot.images(source_dir, recursive=recursive)
 
 
-def make_non_overwriting_path(target_dir: Path, filename: str) -> Path:
+def make_non_overwriting_path(target_dir: Path, filename: str, snapshot: Optional[TreeSnapshot] = None) -> Path:
     """
     若目标目录已存在同名文件，则生成不覆盖的新文件名：name_1.ext, name_2.ext ...
+    给出 snapshot 时按快照判断是否存在。
     """
+    exists = snapshot.exists if snapshot is not None else Path.exists
     candidate = target_dir / filename
-    if not candidate.exists():
+    if not exists(candidate):
         return candidate
     stem = Path(filename).stem
     suffix = Path(filename).suffix
@@ -50,37 +45,71 @@ def make_non_overwriting_path(target_dir: Path, filename: str) -> Path:
     while True:
         new_name = f"{stem}_{index}{suffix}"
         candidate = target_dir / new_name
-        if not candidate.exists():
+        if not exists(candidate):
             return candidate
         index += 1
 
 
-def move_images(base_dir: Path, source_dir: Path, recursive_folders: bool, recursive_images: bool) -> int:
-    folder_map = collect_folder_map(base_dir, recursive=recursive_folders)
-    moved = 0
-    for img in iter_images(source_dir, recursive=recursive_images):
+def plan_moves(base_dir: Path, source_dir: Path, recursive_folders: bool, recursive_images: bool) -> FsPlan:
+    """
+    计算完整的移动计划（不修改文件）。快照按计划中的移动同步更新，
+    因此后续图片的"目标目录是否已有图片""文件名是否冲突"判断与逐个移动时一致。
+    """
+    # 一次遍历建立快照：递归模式扫描整棵树，否则扫描 base_dir 与其第一层子目录（用于判断是否已有图片）
+    snapshot = TreeSnapshot(base_dir, max_depth=None if recursive_folders else 2)
+    if source_dir == base_dir and (recursive_folders or not recursive_images):
+        source_snapshot = snapshot
+    else:
+        source_snapshot = TreeSnapshot(source_dir, max_depth=None if recursive_images else 1)
+
+    folder_map = collect_folder_map(base_dir, recursive=recursive_folders, snapshot=snapshot)
+    plan = FsPlan(exists=snapshot.exists)
+    # 先取出图片列表，计划过程中快照的变化不影响本次遍历
+    for img in list(iter_images(source_dir, recursive=recursive_images, snapshot=source_snapshot)):
         key = img.stem.lower()
         dest_folder = folder_map.get(key)
         if not dest_folder:
             continue
         # 若目标资料夹内已存在任何图片，则跳过，避免重复图片
-        try:
-            has_image = any(
-                p.is_file() and p.suffix.lower() in IMAGE_EXTENSIONS
-                for p in dest_folder.iterdir()
-            )
-        except FileNotFoundError:
-            # 目标目录在此刻不存在则视为无图片
-            has_image = False
-        if has_image:
+        # （目标目录不存在时快照中没有其条目，视为无图片）
+        if snapshot.has_image(dest_folder):
             print(f"Skip: 已存在图片，跳过 -> {dest_folder}")
             continue
-        dest_path = make_non_overwriting_path(dest_folder, img.name)
-        dest_path.parent.mkdir(parents=True, exist_ok=True)
-        shutil.move(str(img), str(dest_path))
-        moved += 1
-        print(f"Moved: {img} -> {dest_path}")
-    return moved
+        dest_path = make_non_overwriting_path(dest_folder, img.name, snapshot)
+        op = plan.add(img, dest_path)
+        if op.status == CONFLICT:
+            print(f"Skip: {op.describe()}")
+            continue
+        snapshot.remove(img)
+        source_snapshot.remove(img)
+        snapshot.add(dest_path)
+    return plan
+
+
+def move_images(
+    base_dir: Path,
+    source_dir: Path,
+    recursive_folders: bool,
+    recursive_images: bool,
+    dry_run: bool = False,
+    workers: int = 8,
+    undo_log: Optional[str] = DEFAULT_UNDO_LOG,
+) -> int:
+    plan = plan_moves(base_dir, source_dir, recursive_folders, recursive_images)
+    if dry_run:
+        for op in plan.planned():
+            print(f"[预览] {op.src} -> {op.dest}")
+        return len(plan.planned())
+
+    results = plan.apply(workers=workers, undo_log=undo_log)
+    for op in results:
+        if op.status == DONE:
+            print(f"Moved: {op.src} -> {op.dest}")
+        else:
+            print(f"Failed: {op.src} -> {op.dest} - {op.reason}")
+    if undo_log and results:
+        print(f"撤销日志: {undo_log}（使用 --undo 回滚）")
+    return sum(1 for op in results if op.status == DONE)
 
 
 def parse_args() -> argparse.Namespace:
@@ -111,11 +140,43 @@ def parse_args() -> argparse.Namespace:
         action="store_true",
         help="递归扫描 source-dir 下的所有图片",
     )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="只打印移动计划，不实际移动",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=8,
+        help="并行移动的线程数，默认 8",
+    )
+    parser.add_argument(
+        "--undo-log",
+        type=str,
+        default=DEFAULT_UNDO_LOG,
+        help=f"撤销日志路径，默认 {DEFAULT_UNDO_LOG}",
+    )
+    parser.add_argument(
+        "--undo",
+        action="store_true",
+        help="按撤销日志把上一次移动的图片移回原处",
+    )
     return parser.parse_args()
 
 
 def main() -> None:
     args = parse_args()
+    if args.undo:
+        if not Path(args.undo_log).exists():
+            raise SystemExit(f"撤销日志不存在: {args.undo_log}")
+        ops = undo_plan(args.undo_log, workers=args.workers)
+        for op in ops:
+            status = "Restored" if op.status == DONE else "Failed"
+            print(f"{status}: {op.describe()}")
+        print(f"完成，还原了 {sum(1 for op in ops if op.status == DONE)} 个文件。")
+        return
+
     base_dir = Path(args.base_dir)
     source_dir = Path(args.source_dir) if args.source_dir else base_dir
 
@@ -129,8 +190,14 @@ def main() -> None:
         source_dir=source_dir,
         recursive_folders=args.recursive_folders,
         recursive_images=args.recursive_images,
+        dry_run=args.dry_run,
+        workers=args.workers,
+        undo_log=args.undo_log,
     )
-    print(f"完成，移动了 {moved} 个文件。")
+    if args.dry_run:
+        print(f"预览完成，将移动 {moved} 个文件。")
+    else:
+        print(f"完成，移动了 {moved} 个文件。")
 
 
 if __name__ == "__main__":
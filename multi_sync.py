@@ -0,0 +1,331 @@
+import argparse
+import json
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import requests
+
+from api_client import ADMIN_BASE_URL, ApiClient, RateLimiter
+from asset_tree import ItemResolver, load_platforms
+from catalog import default_catalog_path
+from catalog_diff import DEFAULT_FEED_PATH
+from hash_cache import DEFAULT_HASH_CACHE_PATH, HashCache
+from query import build_platform_dict, load_previous_output, parse_types, write_catalog, write_change_feed
+from response_cache import write_json_atomic
+from updateGameItemInfo import HEADERS, ITEM_FILE_SLOTS
+from upload_item_images import plan_from_tree, upload_one
+from upload_journal import DEFAULT_JOURNAL_PATH, UploadJournal
+
+
+DEFAULT_CONFIG_PATH = "environments.json"
+DEFAULT_ENV_DIR = "envs"
+
+# 环境配置中可省略的字段及默认值
+ENV_DEFAULTS: Dict[str, Any] = {
+    "baseUrl": ADMIN_BASE_URL,
+    "types": "1,2,3,4,5,6,8",
+    "equipmentId": 0,
+    "workers": 4,
+    "maxRps": 10.0,
+    "retries": 3,
+    "timeout": 15.0,
+    "pageSize": 150,
+    "itemsPageSize": 500,
+}
+
+_print_lock = threading.Lock()
+
+
+def log(env: str, message: str) -> None:
+    with _print_lock:
+        print(f"[{env}] {message}", flush=True)
+
+
+@dataclass
+class Environment:
+    name: str
+    base_url: str
+    token: str
+    types: List[int]
+    equipment_id: int
+    workers: int
+    max_rps: float
+    retries: int
+    timeout: float
+    page_size: int
+    items_page_size: int
+    directory: Path
+
+    @property
+    def output(self) -> str:
+        return str(self.directory / "gaming_platforms.json")
+
+    def headers(self) -> Dict[str, str]:
+        return {"Authorization": self.token}
+
+    def client(self) -> ApiClient:
+        # 每个环境独立的连接池与限速，互不占用对方的并发额度
+        return ApiClient(
+            headers=self.headers(),
+            pool_size=max(1, self.workers),
+            retries=self.retries,
+            timeout=self.timeout,
+            rate_limiter=RateLimiter(self.max_rps),
+        )
+
+
+def load_environments(config_path: str, env_dir: str = DEFAULT_ENV_DIR) -> Dict[str, Environment]:
+    """
+    读取环境配置（JSON）：
+    {
+      "defaults": {"types": "4", "workers": 4},
+      "environments": {
+        "test4": {"baseUrl": "http://.../newgamemanager", "tokenEnv": "TEST4_TOKEN", "maxRps": 5},
+        "prod": {"baseUrl": "https://.../newgamemanager", "token": "...", "types": "1-8"}
+      }
+    }
+    token 可直接写在配置中，也可用 tokenEnv 指定从环境变量读取。每个环境的数据写入 env_dir/{名称}/。
+    """
+    with open(config_path, "r", encoding="utf-8") as f:
+        config = json.load(f)
+    defaults = {**ENV_DEFAULTS, **config.get("defaults", {})}
+    environments: Dict[str, Environment] = {}
+    for name, raw in (config.get("environments") or {}).items():
+        settings = {**defaults, **raw}
+        token = settings.get("token") or os.environ.get(settings.get("tokenEnv") or "", "")
+        if not token:
+            raise ValueError(f"环境 {name} 缺少 token（或 tokenEnv 指定的环境变量未设置）")
+        types = settings["types"]
+        environments[name] = Environment(
+            name=name,
+            base_url=settings["baseUrl"].rstrip("/"),
+            token=token,
+            types=parse_types(types) if isinstance(types, str) else [int(t) for t in types],
+            equipment_id=int(settings["equipmentId"]),
+            workers=int(settings["workers"]),
+            max_rps=float(settings["maxRps"]),
+            retries=int(settings["retries"]),
+            timeout=float(settings["timeout"]),
+            page_size=int(settings["pageSize"]),
+            items_page_size=int(settings["itemsPageSize"]),
+            directory=Path(settings.get("dir") or Path(env_dir) / name),
+        )
+    if not environments:
+        raise ValueError(f"{config_path} 中没有配置任何环境")
+    return environments
+
+
+def crawl_environment(env: Environment) -> Dict[str, Any]:
+    """
+    抓取一个环境的平台数据，写出该环境的 JSON、SQLite 目录文件与变更流。
+    """
+    env.directory.mkdir(parents=True, exist_ok=True)
+    client = env.client()
+    try:
+        platform_dict = build_platform_dict(
+            base_url=f"{env.base_url}/findByGamePlatfromPageResult",
+            gaming_types=env.types,
+            equipment_id=env.equipment_id,
+            page_no=1,
+            page_size=env.page_size,
+            items_base_url=f"{env.base_url}/findGameItemPageResult",
+            items_page_no=1,
+            items_page_size=env.items_page_size,
+            timeout=env.timeout,
+            workers=env.workers,
+            client=client,
+        )
+    finally:
+        client.close()
+    previous = load_previous_output(env.output)
+    write_json_atomic(env.output, platform_dict, indent=2)
+    write_catalog(platform_dict, env.output, default_catalog_path(env.output))
+    write_change_feed(previous, platform_dict, env.output, str(env.directory / DEFAULT_FEED_PATH))
+    items = sum(len(p.get("items") or []) for p in platform_dict.values())
+    log(env.name, f"已保存 {len(platform_dict)} 个平台、{items} 个游戏项到 {env.output}；{client.summary()}")
+    return {"env": env.name, "status": "ok", "platforms": len(platform_dict), "items": items}
+
+
+def push_environment(
+    env: Environment,
+    root: Path,
+    slot: str,
+    gaming_types: Optional[List[str]],
+    platform_names: Optional[List[str]],
+    hash_cache: HashCache,
+    dry_run: bool = False,
+) -> Dict[str, Any]:
+    """
+    按该环境自己的目录文件把目录树中的图片解析为 gamingItemId（各环境的 ID 不一定相同），
+    再用该环境的连接池并发上传。上传日志按环境分开保存。
+    """
+    resolver = ItemResolver(load_platforms(env.output))
+    tasks, skipped = plan_from_tree(resolver, root, slot, gaming_types, platform_names)
+    log(env.name, f"待上传 {len(tasks)} 个文件，跳过 {len(skipped)} 个（未匹配或重复）")
+    if dry_run:
+        return {"env": env.name, "status": "planned", "planned": len(tasks), "skipped": len(skipped)}
+
+    url = f"{env.base_url}/updateGameItemInfo"
+    journal = UploadJournal(str(env.directory / DEFAULT_JOURNAL_PATH))
+    results: List[Dict[str, Any]] = []
+    try:
+        with ApiClient(headers={**HEADERS, **env.headers()}, pool_size=max(1, env.workers),
+                       retries=env.retries, timeout=env.timeout, rate_limiter=RateLimiter(env.max_rps)) as client:
+            with ThreadPoolExecutor(max_workers=max(1, env.workers)) as pool:
+                for result in pool.map(lambda t: upload_one(client, t, url, journal, hash_cache), tasks):
+                    log(env.name, f"[{result['status']}] {result['gamingItemId']} {result['slot']} <- {result['file']}")
+                    results.append(result)
+            log(env.name, client.summary())
+    finally:
+        journal.close()
+    write_json_atomic(str(env.directory / "upload_report.json"), results + skipped, indent=2)
+    counts: Dict[str, int] = {}
+    for r in results:
+        counts[r["status"]] = counts.get(r["status"], 0) + 1
+    return {"env": env.name, "status": "failed" if counts.get("failed") else "ok", **counts}
+
+
+def run_all(envs: List[Environment], job, parallel: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    对所有环境并发执行 job(env)；单个环境出错不影响其他环境。
+    """
+    def run(env: Environment) -> Dict[str, Any]:
+        try:
+            return job(env)
+        except (requests.RequestException, OSError, ValueError) as e:
+            log(env.name, f"失败: {e}")
+            return {"env": env.name, "status": "failed", "error": str(e)}
+
+    with ThreadPoolExecutor(max_workers=max(1, parallel or len(envs))) as pool:
+        return list(pool.map(run, envs))
+
+
+def _natural_keys(data: Dict[str, Any]) -> Tuple[Dict[tuple, Dict[str, Any]], Dict[tuple, Dict[str, Any]]]:
+    # 不同环境的 ID 不一定一致，按 (gamingType, 平台编码[, 游戏编码]) 对齐
+    platforms: Dict[tuple, Dict[str, Any]] = {}
+    items: Dict[tuple, Dict[str, Any]] = {}
+    for platform in data.values():
+        pkey = (str(platform.get("gamingType")), str(platform.get("gamingPlatformCode")))
+        platforms[pkey] = platform
+        for item in platform.get("items") or []:
+            items[pkey + (str(item.get("gamingItemCode")),)] = item
+    return platforms, items
+
+
+def diff_environments(base: Dict[str, Any], other: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    比较两个环境的平台数据，按编码对齐。missing 为基准环境有而另一环境没有的记录，
+    extra 相反，renamed 为两边都有但名称不同的记录。
+    """
+    base_platforms, base_items = _natural_keys(base)
+    other_platforms, other_items = _natural_keys(other)
+
+    def compare(left: Dict[tuple, Any], right: Dict[tuple, Any], name_field: str) -> Dict[str, List[Any]]:
+        return {
+            "missing": [list(k) for k in left if k not in right],
+            "extra": [list(k) for k in right if k not in left],
+            "renamed": [
+                {"key": list(k), "base": left[k].get(name_field), "other": right[k].get(name_field)}
+                for k in left
+                if k in right and left[k].get(name_field) != right[k].get(name_field)
+            ],
+        }
+
+    return {
+        "platforms": compare(base_platforms, other_platforms, "gamingPlatformName"),
+        "items": compare(base_items, other_items, "gamingItemName"),
+    }
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="按配置文件同时抓取或推送多个管理后台环境")
+    parser.add_argument("--config", type=str, default=DEFAULT_CONFIG_PATH, help=f"环境配置文件，默认 {DEFAULT_CONFIG_PATH}")
+    parser.add_argument("--env-dir", type=str, default=DEFAULT_ENV_DIR, help=f"各环境数据的保存目录，默认 {DEFAULT_ENV_DIR}")
+    parser.add_argument("--env", action="append", default=None, help="只处理指定环境，可重复（默认全部）")
+    parser.add_argument("--parallel", type=int, default=None, help="同时处理的环境数，默认全部同时进行")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sub.add_parser("crawl", help="抓取各环境的平台与游戏数据")
+
+    push = sub.add_parser("push", help="把目录树中的游戏项图片推送到各环境")
+    push.add_argument("--root", type=str, default="gamingType", help="图片目录树根路径，默认 gamingType")
+    push.add_argument("--types", type=str, default=None, help="只处理这些 gamingType 目录，逗号分隔")
+    push.add_argument("--platform", action="append", default=None, help="只处理指定平台目录，可重复")
+    push.add_argument("--slot", type=str, default="icon2File", choices=ITEM_FILE_SLOTS, help="图片上传到的字段，默认 icon2File")
+    push.add_argument("--hash-cache", type=str, default=DEFAULT_HASH_CACHE_PATH, help="文件哈希缓存路径（各环境共用）")
+    push.add_argument("--dry-run", action="store_true", help="只解析并输出各环境的计划，不实际上传")
+
+    diff = sub.add_parser("diff", help="比较各环境已抓取的数据，找出不一致之处")
+    diff.add_argument("--base", type=str, default=None, help="作为基准的环境，默认为配置中的第一个")
+    diff.add_argument("--report", type=str, default="env_drift.json", help="差异报告输出路径，默认 env_drift.json")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    try:
+        environments = load_environments(args.config, args.env_dir)
+    except (OSError, ValueError) as e:
+        print(f"无法读取环境配置: {e}", file=sys.stderr)
+        sys.exit(1)
+    # diff 的 --base 可以不在 --env 之内，但同样必须是已配置的环境
+    requested = (args.env or []) + ([args.base] if getattr(args, "base", None) else [])
+    unknown = [name for name in requested if name not in environments]
+    if unknown:
+        print(f"未知的环境: {', '.join(unknown)}（可选: {', '.join(environments)}）", file=sys.stderr)
+        sys.exit(1)
+    envs = [environments[name] for name in args.env] if args.env else list(environments.values())
+
+    if args.command == "crawl":
+        results = run_all(envs, crawl_environment, args.parallel)
+    elif args.command == "push":
+        root = Path(args.root)
+        if not root.is_dir():
+            print(f"目录不存在: {root}", file=sys.stderr)
+            sys.exit(1)
+        types = [t.strip() for t in args.types.split(",") if t.strip()] if args.types else None
+        hash_cache = HashCache(args.hash_cache)
+        try:
+            results = run_all(
+                envs,
+                lambda env: push_environment(env, root, args.slot, types, args.platform, hash_cache, args.dry_run),
+                args.parallel,
+            )
+        finally:
+            hash_cache.save()
+    else:
+        base = environments[args.base] if args.base else envs[0]
+        base_data = load_previous_output(base.output)
+        if not base_data:
+            print(f"环境 {base.name} 还没有数据，请先运行 crawl", file=sys.stderr)
+            sys.exit(1)
+        report: Dict[str, Any] = {"base": base.name, "environments": {}}
+        for env in envs:
+            if env is base:
+                continue
+            drift = diff_environments(base_data, load_previous_output(env.output))
+            report["environments"][env.name] = drift
+            counts = {
+                f"{kind}.{field}": len(drift[kind][field])
+                for kind in ("platforms", "items")
+                for field in ("missing", "extra", "renamed")
+                if drift[kind][field]
+            }
+            print(f"{base.name} -> {env.name}: {counts or '一致'}")
+        write_json_atomic(args.report, report, indent=2)
+        print(f"差异报告已保存到 {args.report}")
+        return
+
+    for result in results:
+        print(json.dumps(result, ensure_ascii=False))
+    if any(r["status"] == "failed" for r in results):
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
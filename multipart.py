@@ -0,0 +1,133 @@
+import mimetypes
+import os
+import uuid
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+# 文件字段：(文件名, 本地路径或 None, Content-Type)；路径为 None 表示空文件字段
+FilePart = Tuple[str, Optional[str], str]
+
+CHUNK_SIZE = 64 * 1024
+
+
+class StreamingMultipart:
+    """
+    流式 multipart/form-data 请求体：长度预先计算（可设置 Content-Length），
+    文件内容在发送时按块从磁盘读取，不会整体读入内存。
+    可直接作为 requests 的 data 参数；seek(0) 后可重新发送（供重试使用）。
+    文件句柄只在读取对应分段时打开，读完即关闭。
+    """
+
+    def __init__(
+        self,
+        fields: Dict[str, str],
+        files: Dict[str, FilePart],
+        boundary: Optional[str] = None,
+        chunk_size: int = CHUNK_SIZE,
+    ) -> None:
+        self.boundary = boundary or uuid.uuid4().hex
+        self.chunk_size = chunk_size
+        self._segments: List[Union[bytes, str]] = []
+        for name, value in fields.items():
+            self._segments.append(
+                self._part_header(f'form-data; name="{name}"') + str(value).encode("utf-8") + b"\r\n"
+            )
+        for name, (filename, path, content_type) in files.items():
+            self._segments.append(
+                self._part_header(f'form-data; name="{name}"; filename="{filename}"', content_type)
+            )
+            if path:
+                self._segments.append(path)
+            self._segments.append(b"\r\n")
+        self._segments.append(f"--{self.boundary}--\r\n".encode("ascii"))
+        self._length = sum(
+            len(seg) if isinstance(seg, bytes) else os.path.getsize(seg) for seg in self._segments
+        )
+        self.seek(0)
+
+    def _part_header(self, disposition: str, content_type: Optional[str] = None) -> bytes:
+        header = f"--{self.boundary}\r\nContent-Disposition: {disposition}\r\n"
+        if content_type:
+            header += f"Content-Type: {content_type}\r\n"
+        return (header + "\r\n").encode("utf-8")
+
+    @property
+    def content_type(self) -> str:
+        return f"multipart/form-data; boundary={self.boundary}"
+
+    def __len__(self) -> int:
+        return self._length
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        if offset != 0 or whence != os.SEEK_SET:
+            raise ValueError("StreamingMultipart 只支持 seek(0)")
+        self.close()
+        self._index = 0
+        self._offset = 0
+        self._position = 0
+        return 0
+
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0:
+            size = self._length - self._position
+        out: List[bytes] = []
+        remaining = size
+        while remaining > 0 and self._index < len(self._segments):
+            seg = self._segments[self._index]
+            if isinstance(seg, bytes):
+                chunk = seg[self._offset:self._offset + remaining]
+            else:
+                if self._file is None:
+                    self._file = open(seg, "rb")
+                chunk = self._file.read(remaining)
+            if chunk:
+                out.append(chunk)
+                remaining -= len(chunk)
+                self._offset += len(chunk)
+            if not chunk or (isinstance(seg, bytes) and self._offset >= len(seg)):
+                self._next_segment()
+        data = b"".join(out)
+        self._position += len(data)
+        return data
+
+    def _next_segment(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._index += 1
+        self._offset = 0
+
+    def __iter__(self) -> Iterator[bytes]:
+        while True:
+            chunk = self.read(self.chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+    def close(self) -> None:
+        if getattr(self, "_file", None) is not None:
+            self._file.close()
+        self._file = None
+
+
+def build_image_form(
+    data: Dict[str, str], images: Dict[str, str], slots: Iterable[str], id_key: str
+) -> StreamingMultipart:
+    """
+    构造图片更新接口（updateGameItemInfo / updateGamePlatfrom）的请求体：images 中给出的字段上传对应文件
+    （从磁盘流式读取），slots 中其余图片字段以空文件占位。data 必须带有 id_key（如 gamingItemId），
+    否则抛出 ValueError，不会提交无法定位对象的更新。
+    """
+    if not data.get(id_key):
+        raise ValueError(f"表单缺少 {id_key}")
+    files: Dict[str, FilePart] = {}
+    for slot in slots:
+        path = images.get(slot)
+        if path:
+            content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+            files[slot] = (os.path.basename(path), path, content_type)
+        else:
+            files[slot] = ("", None, "application/octet-stream")  # 空文件
+    return StreamingMultipart(data, files)
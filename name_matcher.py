@@ -0,0 +1,257 @@
+import unicodedata
+from bisect import bisect_left, bisect_right
+from collections import deque
+from typing import Dict, List, Optional, Set, Tuple
+
+try:
+    import opencc  # 可选依赖：完整的繁简转换
+    _T2S = opencc.OpenCC("t2s")
+except ImportError:  # pragma: no cover - 未安装时使用内置的常用字表
+    _T2S = None
+
+# 是否有完整的繁简转换（opencc）；否则只能转换下表中的常用字
+HAS_OPENCC = _T2S is not None
+
+# 游戏名中常见的繁体字 -> 简体字（未安装 opencc 时使用）
+_TRAD_TO_SIMP = str.maketrans(
+    "龍鳳寶財發門將雙麗樂驚萬雞對紅貓獅聖誕鬥戰時運極無貴與為國際體東車馬魚鳥龜蝦錢銀鑽實豬頭語說話開關長"
+    "張來個們這裡後還點燈燒熱風雲電華區場壽歡夢靈術師傳蹟鐵礦進慶農莊園廣飛機蘭劍俠傑勝敗陸衛綠藍黃醫買賣"
+    "價幣歲節鐘聲響變兒連滿獎條幾亂蘋韓義號圖島陽燦輪轉戲鬧舊歷險贏魯紳麼槍彈擊殺獵漁蓮狀嗎鮮鯉龐寵夥團戀"
+    "愛娛瑪遊優碼撲線寫經緣親鎖帥豐氣膽權隊輝鑼獲勵蠻廳鳴壯虛揮爺紋練級靜纖絲異齊總選騎驢艷縱聯賽鑑尋搖擺"
+    "獸豔賞賜賀祿貝鯊鯨鱷蠍蟲鷹鶴鵝鴨鴿鍋銅錫鋼鑰鏈錦鏡鐳銷鎮鑄針釣鈴鈔銘錄鋒鍵閃闖閣闊間閒聞闕貨貢貧貪負"
+    "費資賓賭賺購贈贊賢質賴歐亞颶飄霧爐煙煉爍熾記譜讚詩詞謎誘認讀課談請識護讓論誰許訣計設訊議評試詭謀瘋絕"
+    "縮紀約細終組結給統絡維網緊編織繼續纏纜綻繽紛輕載輸較輔輩軍軌遠過達邊遲適遺邁遙鄉鄰陣陰隨隱難離雜顏題"
+    "顯願類額頂項順須領頻頁顆顧顛騰驗駕駿驅驕髮鬆鬍黨齒億僅儀傘備兇劇劃劉動務勢勞卻厲嚇嘆噴嘯嚴囉圍圓壞壓"
+    "墜壘夠奪奮媽學孫寧審專導層屬幫幹廟廠彎從徵憶懷應擁擋據擇攝攜擴撈掃斬斷於曉曆楊標樹橋櫻檯歸殘湯溝滅漢"
+    "潛濤灣濕滾漲潑爛爭牆猶獨現環產畫當療盜盡盤眾礎禮稱穩窮競筆築簡糧罰習聽腦興舉艦蘇藥藝虧蠶衝補裝見規視"
+    "覺覽觀觸訂趕趙躍辦釋隻雖韻飯飲餅館饗騙鮑麥嬌妝婦嬰豈崗嶺峽帳幟慘憑憂懲搶攤撐敵數斕晝暫曬構槳毆氈決沖"
+    "況淚淨淺滄潔潤澀瀟灑灘煥熒燭犧獄獰獻璽瓏瑤瓊甌畢瘡癡皚盞睜矯碩確磚祕禍禪種積穌竊筍範篩簫籃籠紗紙紡紮"
+    "綢綵綿緋緞緩緻縣縫繩繪繫罈羅羨翹聰職脅脈腳膚膠臉臨臺艙艱萊葉蒼蓋薩蘆蘿虜蝕螢蠟製複襲覓訪詳誠誤調諾謝"
+    "證譯貞販貫貼賊賦贖趨跡踐蹤軟輛轟辭邏醜釀銳鋪錯鍊鍛鏢鏟鑒閉闆階雛靂韌頌頓頗頸頹顫飆餘饑駐騷驛鵬鸞齡龕",
+    "龙凤宝财发门将双丽乐惊万鸡对红猫狮圣诞斗战时运极无贵与为国际体东车马鱼鸟龟虾钱银钻实猪头语说话开关长"
+    "张来个们这里后还点灯烧热风云电华区场寿欢梦灵术师传迹铁矿进庆农庄园广飞机兰剑侠杰胜败陆卫绿蓝黄医买卖"
+    "价币岁节钟声响变儿连满奖条几乱苹韩义号图岛阳灿轮转戏闹旧历险赢鲁绅么枪弹击杀猎渔莲状吗鲜鲤庞宠伙团恋"
+    "爱娱玛游优码扑线写经缘亲锁帅丰气胆权队辉锣获励蛮厅鸣壮虚挥爷纹练级静纤丝异齐总选骑驴艳纵联赛鉴寻摇摆"
+    "兽艳赏赐贺禄贝鲨鲸鳄蝎虫鹰鹤鹅鸭鸽锅铜锡钢钥链锦镜镭销镇铸针钓铃钞铭录锋键闪闯阁阔间闲闻阙货贡贫贪负"
+    "费资宾赌赚购赠赞贤质赖欧亚飓飘雾炉烟炼烁炽记谱赞诗词谜诱认读课谈请识护让论谁许诀计设讯议评试诡谋疯绝"
+    "缩纪约细终组结给统络维网紧编织继续缠缆绽缤纷轻载输较辅辈军轨远过达边迟适遗迈遥乡邻阵阴随隐难离杂颜题"
+    "显愿类额顶项顺须领频页颗顾颠腾验驾骏驱骄发松胡党齿亿仅仪伞备凶剧划刘动务势劳却厉吓叹喷啸严啰围圆坏压"
+    "坠垒够夺奋妈学孙宁审专导层属帮干庙厂弯从征忆怀应拥挡据择摄携扩捞扫斩断于晓历杨标树桥樱台归残汤沟灭汉"
+    "潜涛湾湿滚涨泼烂争墙犹独现环产画当疗盗尽盘众础礼称稳穷竞笔筑简粮罚习听脑兴举舰苏药艺亏蚕冲补装见规视"
+    "觉览观触订赶赵跃办释只虽韵饭饮饼馆飨骗鲍麦娇妆妇婴岂岗岭峡帐帜惨凭忧惩抢摊撑敌数斓昼暂晒构桨殴毡决冲"
+    "况泪净浅沧洁润涩潇洒滩焕荧烛牺狱狞献玺珑瑶琼瓯毕疮痴皑盏睁矫硕确砖秘祸禅种积稣窃笋范筛箫篮笼纱纸纺扎"
+    "绸彩绵绯缎缓致县缝绳绘系坛罗羡翘聪职胁脉脚肤胶脸临台舱艰莱叶苍盖萨芦萝虏蚀萤蜡制复袭觅访详诚误调诺谢"
+    "证译贞贩贯贴贼赋赎趋迹践踪软辆轰辞逻丑酿锐铺错炼锻镖铲鉴闭板阶雏雳韧颂顿颇颈颓颤飙余饥驻骚驿鹏鸾龄龛",
+)
+
+
+class AhoCorasick:
+    """
+    Aho-Corasick 多模式匹配自动机：一次扫描文本即可找出其中出现的全部模式串。
+    """
+
+    def __init__(self, patterns: List[str]) -> None:
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[int]] = [[]]
+        for index, pattern in enumerate(patterns):
+            if not pattern:
+                continue
+            state = 0
+            for ch in pattern:
+                nxt = self._goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                state = nxt
+            self._out[state].append(index)
+
+        # 广度优先构建失败指针，并把失败链上的输出合并到当前状态
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def find_all(self, text: str) -> List[int]:
+        """
+        返回在 text 中出现过的模式串下标（去重，按首次出现的位置排序）。
+        """
+        found: List[int] = []
+        seen = set()
+        state = 0
+        for ch in text:
+            while state and ch not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(ch, 0)
+            for index in self._out[state]:
+                if index not in seen:
+                    seen.add(index)
+                    found.append(index)
+        return found
+
+
+class NameMatcher:
+    """
+    游戏名称匹配索引，对一份 gaming_map（名称 -> gamingItemId）构建一次，之后每次匹配都不再线性扫描。
+    匹配均不区分大小写，依次尝试：
+    1. 精确匹配：图片名与游戏名相同
+    2. 图片名包含游戏名（Aho-Corasick）：取最长的游戏名；长度相同时取 gaming_map 中靠前的
+    3. 游戏名包含图片名（后缀数组二分查找）：取最短的游戏名；长度相同时取 gaming_map 中靠前的
+    """
+
+    def __init__(self, gaming_map: Dict[str, int]) -> None:
+        self.names: List[str] = []
+        self.ids: List[int] = []
+        self._exact: Dict[str, int] = {}
+        for name, gaming_id in gaming_map.items():
+            key = name.lower()
+            if key in self._exact:
+                continue
+            self._exact[key] = len(self.names)
+            self.names.append(key)
+            self.ids.append(gaming_id)
+
+        self._automaton = AhoCorasick(self.names)
+        # 所有名称的全部后缀，排序后可二分查找"以某串开头的后缀"，即"包含某串的名称"
+        self._suffixes: List[Tuple[str, int]] = sorted(
+            (name[start:], index) for index, name in enumerate(self.names) for start in range(len(name))
+        )
+        self._suffix_keys = [suffix for suffix, _ in self._suffixes]
+
+    def _rank(self, index: int, prefer_long: bool) -> Tuple[int, int]:
+        length = len(self.names[index])
+        return (-length if prefer_long else length, index)
+
+    def names_in(self, text: str) -> List[int]:
+        """
+        返回被 text 包含的名称下标。
+        """
+        return self._automaton.find_all(text.lower())
+
+    def names_containing(self, text: str) -> List[int]:
+        """
+        返回包含 text 的名称下标（去重）。
+        """
+        query = text.lower()
+        if not query:
+            return []
+        lo = bisect_left(self._suffix_keys, query)
+        hi = bisect_right(self._suffix_keys, query + "\U0010ffff", lo)
+        return sorted({self._suffixes[i][1] for i in range(lo, hi)})
+
+    def match(self, stem: str) -> Optional[int]:
+        key = stem.lower()
+        if key in self._exact:
+            return self.ids[self._exact[key]]
+        contained = self.names_in(key)
+        if contained:
+            return self.ids[min(contained, key=lambda i: self._rank(i, prefer_long=True))]
+        containing = self.names_containing(key)
+        if containing:
+            return self.ids[min(containing, key=lambda i: self._rank(i, prefer_long=False))]
+        return None
+
+
+def normalize_name(name: str) -> str:
+    """
+    名称规范化：全角转半角（NFKC）、转小写、繁体转简体，并去掉空白与标点，只保留文字和数字。
+    例如 "麻將胡了 ２" -> "麻将胡了2"。
+    """
+    text = unicodedata.normalize("NFKC", name).lower()
+    text = _T2S.convert(text) if _T2S is not None else text.translate(_TRAD_TO_SIMP)
+    return "".join(ch for ch in text if unicodedata.category(ch)[0] in "LN")
+
+
+def char_ngrams(text: str, n: int = 2) -> Set[str]:
+    if len(text) <= n:
+        return {text} if text else set()
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+def edit_distance(a: str, b: str) -> int:
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        previous = current
+    return previous[-1]
+
+
+class FuzzyMatcher:
+    """
+    模糊匹配：在规范化后的名称上依次尝试
+    1. NameMatcher 的精确/包含匹配（置信度记为 1.0）
+    2. 字符 n-gram 倒排索引召回：只统计与图片名共享 n-gram 的名称，按 Jaccard 相似度取前 top_k 个候选，
+       再以 Jaccard 与编辑距离相似度的平均值打分，得分不低于 threshold 时返回最高分；
+       同分时取 gaming_map 中靠前的
+    召回只访问共享 n-gram 的倒排列表，名称库增长时开销与命中的列表长度相关，而不是与名称总数相关。
+    """
+
+    def __init__(self, gaming_map: Dict[str, int], n: int = 2, top_k: int = 10, threshold: float = 0.6) -> None:
+        self.n = n
+        self.top_k = top_k
+        self.threshold = threshold
+        normalized: Dict[str, int] = {}
+        for name, gaming_id in gaming_map.items():
+            key = normalize_name(name)
+            if key and key not in normalized:
+                normalized[key] = gaming_id
+        self._exact = NameMatcher(normalized)
+        self.names: List[str] = list(normalized)
+        self.ids: List[int] = list(normalized.values())
+        self._grams: List[Set[str]] = [char_ngrams(name, n) for name in self.names]
+        self._index: Dict[str, List[int]] = {}
+        for index, grams in enumerate(self._grams):
+            for gram in grams:
+                self._index.setdefault(gram, []).append(index)
+
+    def candidates(self, query: str) -> List[Tuple[int, float]]:
+        """
+        返回 (名称下标, Jaccard 相似度) 的候选列表，按相似度降序，最多 top_k 个。
+        """
+        grams = char_ngrams(query, self.n)
+        shared: Dict[int, int] = {}
+        for gram in grams:
+            for index in self._index.get(gram, ()):
+                shared[index] = shared.get(index, 0) + 1
+        scored = [
+            (index, count / (len(grams) + len(self._grams[index]) - count))
+            for index, count in shared.items()
+        ]
+        scored.sort(key=lambda item: (-item[1], item[0]))
+        return scored[: self.top_k]
+
+    def match_scored(self, stem: str) -> Optional[Tuple[int, float]]:
+        """
+        返回 (gamingItemId, 置信度)，没有达到阈值的候选时返回 None。
+        """
+        query = normalize_name(stem)
+        if not query:
+            return None
+        gaming_id = self._exact.match(query)
+        if gaming_id is not None:
+            return gaming_id, 1.0
+        best: Optional[Tuple[float, int]] = None
+        for index, jaccard in self.candidates(query):
+            name = self.names[index]
+            similarity = 1 - edit_distance(query, name) / max(len(query), len(name))
+            score = (jaccard + similarity) / 2
+            if best is None or score > best[0] or (score == best[0] and index < best[1]):
+                best = (score, index)
+        if best is None or best[0] < self.threshold:
+            return None
+        return self.ids[best[1]], round(best[0], 3)
+
+    def match(self, stem: str) -> Optional[int]:
+        result = self.match_scored(stem)
+        return result[0] if result else None
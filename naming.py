@@ -0,0 +1,30 @@
+import os
+import re
+from pathlib import Path
+
+
+INVALID_WIN_CHARS = re.compile(r'[<>:"/\\|?*]')
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".bmp", ".webp"}
+
+
+def sanitize_name(name: str) -> str:
+    """
+    将名称清洗为 Windows 允许的目录名：
+    - 去除非法字符 <>:"/\|?*
+    - 去除首尾空白与句点
+    - 将连续空白压缩为一个空格
+    - 名称为空时回退为 'Unnamed'
+    """
+    name = INVALID_WIN_CHARS.sub(" ", str(name))
+    name = re.sub(r"\s+", " ", name).strip().strip(".")
+    return name or "Unnamed"
+
+
+def is_image_name(name: str) -> bool:
+    return os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS
+
+
+def is_image(path: Path) -> bool:
+    """检查路径是否为图片文件"""
+    return path.is_file() and is_image_name(path.name)
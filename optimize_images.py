@@ -0,0 +1,215 @@
+import argparse
+import hashlib
+import json
+import os
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    from PIL import Image, features
+except ImportError:  # Pillow 为可选依赖，仅本模块需要
+    Image = None
+    features = None
+
+from asset_tree import iter_tree_images
+from icon_specs import load_slot_specs
+from upload_journal import file_sha256
+
+
+DEFAULT_OUT_DIR = ".optimized"
+
+# 源文件格式 -> (输出格式, 扩展名)；其他格式（GIF、BMP 等）统一输出为 PNG
+KEEP_FORMATS = {"PNG": ("PNG", "png"), "JPEG": ("JPEG", "jpg"), "WEBP": ("WEBP", "webp")}
+
+
+@dataclass(frozen=True)
+class OptimizeSettings:
+    size: Tuple[int, int]
+    alpha: bool = True
+    quantize: bool = False  # 近无损：量化为 256 色调色板，仅在结果更小时采用
+    webp: bool = False
+    avif: bool = False
+    quality: int = 90  # JPEG/WebP/AVIF 的质量；WebP 为 0 时使用无损模式
+
+    def key(self) -> str:
+        raw = json.dumps(asdict(self), sort_keys=True)
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:12]
+
+
+def settings_for_slot(slot: str, specs: Dict[str, Dict[str, Any]], **options: Any) -> OptimizeSettings:
+    spec = specs[slot]
+    return OptimizeSettings(size=tuple(spec["size"]), alpha=bool(spec["alpha"]), **options)
+
+
+def require_pillow() -> None:
+    if Image is None:
+        raise SystemExit("需要安装 Pillow 才能处理图片：pip install Pillow")
+
+
+def _save_atomic(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _encode(im: "Image.Image", fmt: str, **params: Any) -> bytes:
+    import io
+
+    buf = io.BytesIO()
+    im.save(buf, fmt, **params)
+    return buf.getvalue()
+
+
+def _encode_format(im: "Image.Image", fmt: str, settings: OptimizeSettings) -> bytes:
+    if fmt == "PNG":
+        data = _encode(im, "PNG", optimize=True)
+        if settings.quantize:
+            method = Image.Quantize.FASTOCTREE if im.mode == "RGBA" else Image.Quantize.MEDIANCUT
+            quantized = _encode(im.quantize(256, method=method), "PNG", optimize=True)
+            if len(quantized) < len(data):
+                data = quantized
+        return data
+    if fmt == "JPEG":
+        return _encode(im.convert("RGB"), "JPEG", quality=max(1, settings.quality), optimize=True, progressive=True)
+    if fmt == "WEBP":
+        if settings.quality <= 0:
+            return _encode(im, "WEBP", lossless=True, method=6)
+        return _encode(im, "WEBP", quality=settings.quality, method=6)
+    return _encode(im, "AVIF", quality=max(1, settings.quality))
+
+
+def optimize_image(src: str, settings: OptimizeSettings, out_dir: str = DEFAULT_OUT_DIR) -> Dict[str, Any]:
+    """
+    按规格处理单张图片：超出目标尺寸时等比缩小，按源文件格式重新压缩（PNG 可选近无损量化，
+    JPEG / WebP 按 quality；其他格式输出为 PNG），结果记为 outputs["image"]；并按需生成 WebP / AVIF 变体。
+    输出以"源文件哈希 + 参数"命名并缓存在 out_dir 中，已存在时直接复用。
+    未缩放时各输出都不会比源文件更大（否则直接使用源文件内容）。
+    """
+    require_pillow()
+    digest = file_sha256(src)
+    base = Path(out_dir) / digest[:2] / f"{digest}-{settings.key()}"
+    with Image.open(src) as probe:
+        source_format = probe.format
+    image_format, ext = KEEP_FORMATS.get(source_format, ("PNG", "png"))
+    targets = {"image": base.parent / f"{base.name}.{ext}"}
+    if settings.webp and image_format != "WEBP":
+        targets["webp"] = base.parent / f"{base.name}.webp"
+    if settings.avif and features.check("avif"):
+        targets["avif"] = base.parent / f"{base.name}.avif"
+
+    result: Dict[str, Any] = {
+        "source": src,
+        "sourceBytes": os.path.getsize(src),
+        "outputs": {fmt: str(p) for fmt, p in targets.items()},
+        "cached": all(p.exists() for p in targets.values()),
+    }
+    if result["cached"]:
+        result["outputBytes"] = {fmt: p.stat().st_size for fmt, p in targets.items()}
+        return result
+
+    with Image.open(src) as opened:
+        opened.load()
+        has_alpha = opened.mode in ("RGBA", "LA") or (opened.mode == "P" and "transparency" in opened.info)
+        im = opened.convert("RGBA" if has_alpha and settings.alpha else "RGB")
+    resized = im.width > settings.size[0] or im.height > settings.size[1]
+    if resized:
+        im.thumbnail(settings.size, Image.LANCZOS)
+
+    for key, path in targets.items():
+        fmt = {"image": image_format, "webp": "WEBP", "avif": "AVIF"}[key]
+        data = _encode_format(im, fmt, settings)
+        # 只有源文件本身就是该格式时才能回退为源文件内容
+        if not resized and fmt == source_format and len(data) >= result["sourceBytes"]:
+            data = Path(src).read_bytes()
+        _save_atomic(path, data)
+
+    result["outputBytes"] = {fmt: p.stat().st_size for fmt, p in targets.items()}
+    return result
+
+
+def _optimize_job(job: Tuple[str, OptimizeSettings, str]) -> Dict[str, Any]:
+    src, settings, out_dir = job
+    try:
+        return optimize_image(src, settings, out_dir)
+    except Exception as e:
+        return {"source": src, "error": str(e)}
+
+
+def optimize_many(
+    jobs: List[Tuple[str, OptimizeSettings]],
+    out_dir: str = DEFAULT_OUT_DIR,
+    workers: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """
+    在进程池中并行处理多张图片，按输入顺序返回结果；单张失败时结果中带 error 字段。
+    """
+    require_pillow()
+    payload = [(src, settings, out_dir) for src, settings in jobs]
+    if not payload:
+        return []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_optimize_job, payload, chunksize=8))
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="按图片字段规格缩放、重新压缩图片，并可生成 WebP/AVIF 变体")
+    parser.add_argument("--root", type=str, default="gamingType", help="图片目录树根路径，默认 gamingType")
+    parser.add_argument("--types", type=str, default=None, help="只处理这些 gamingType 目录，逗号分隔")
+    parser.add_argument("--platform", action="append", default=None, help="只处理指定平台目录，可重复")
+    parser.add_argument("--slot", type=str, default="icon2File", help="使用哪个图片字段的规格，默认 icon2File")
+    parser.add_argument("--spec-file", type=str, default=None, help="覆盖默认规格的 JSON 文件")
+    parser.add_argument("--out-dir", type=str, default=DEFAULT_OUT_DIR, help=f"输出与缓存目录，默认 {DEFAULT_OUT_DIR}")
+    parser.add_argument("--workers", type=int, default=None, help="进程数，默认为 CPU 核数")
+    parser.add_argument("--quantize", action="store_true", help="近无损压缩：量化为 256 色（仅在更小时采用）")
+    parser.add_argument("--webp", action="store_true", help="同时生成 WebP 变体")
+    parser.add_argument("--avif", action="store_true", help="同时生成 AVIF 变体（需 Pillow 支持 AVIF）")
+    parser.add_argument("--quality", type=int, default=90, help="JPEG/WebP/AVIF 质量，默认 90；WebP 设为 0 时无损")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    require_pillow()
+    specs = load_slot_specs(args.spec_file)
+    if args.slot not in specs:
+        print(f"未知的图片字段: {args.slot}", file=sys.stderr)
+        sys.exit(1)
+    settings = settings_for_slot(
+        args.slot, specs, quantize=args.quantize, webp=args.webp, avif=args.avif, quality=args.quality
+    )
+    types = [t.strip() for t in args.types.split(",") if t.strip()] if args.types else None
+    sources = [str(p) for p in iter_tree_images(Path(args.root), types, args.platform)]
+
+    results = optimize_many([(src, settings) for src in sources], args.out_dir, args.workers)
+    failed = [r for r in results if "error" in r]
+    done = [r for r in results if "error" not in r]
+    for r in failed:
+        print(f"失败: {r['source']} - {r['error']}")
+    source_bytes = sum(r["sourceBytes"] for r in done)
+    totals: Dict[str, int] = {}
+    for r in done:
+        for fmt, size in r["outputBytes"].items():
+            totals[fmt] = totals.get(fmt, 0) + size
+    cached = sum(1 for r in done if r["cached"])
+    print(f"处理 {len(done)} 张（其中缓存命中 {cached} 张），失败 {len(failed)} 张")
+    print(f"源文件合计 {source_bytes / 1024 / 1024:.1f} MB")
+    for fmt, size in totals.items():
+        ratio = size / source_bytes if source_bytes else 0
+        print(f"  {fmt}: {size / 1024 / 1024:.1f} MB（{ratio:.0%}）")
+    if args.avif and not features.check("avif"):
+        print("提示: 当前 Pillow 不支持 AVIF，已跳过 AVIF 变体")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,28 +1,90 @@
 import argparse
 import json
+import os
 import sys
-from typing import Any, Dict, Iterable, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
 
 import requests
 
+from api_client import ADMIN_BASE_URL, ApiClient, RateLimiter, get_default_client
+from catalog import NdjsonWriter, compile_catalog, default_catalog_path, is_ndjson_path, load_platform_dict
+from catalog_diff import DEFAULT_FEED_PATH, append_change_feed, diff_catalogs
+from record_extractor import find_dicts_with_keys, get_extractor  # noqa: F401 - 兼容旧的导入路径
+from response_cache import ResponseCache, write_json_atomic
 
-def find_dicts_with_keys(root: Any, required_keys: Iterable[str]) -> List[Dict[str, Any]]:
+
+# 两级接口中记录必须包含的字段
+PLATFORM_KEYS = ("gamingPlatformCode", "gamingPlatformId", "gamingType", "gamingPlatformName")
+ITEM_KEYS = ("gamingItemName", "gamingItemCode", "gamingType")
+
+
+def _fetch_records(
+    base_url: str,
+    params: Dict[str, Any],
+    required: Iterable[str],
+    headers: Optional[Dict[str, str]],
+    timeout: float,
+    client: Optional[ApiClient],
+    cache: Optional[ResponseCache],
+) -> List[Dict[str, Any]]:
     """
-    深度优先在任意 JSON 结构中查找同时包含 required_keys 的字典集合。
+    发起 GET 请求并提取包含 required 字段的记录。
+    记录由该接口的 RecordExtractor 提取：路径已知时流式解析，否则完整解析并发现路径。
+    提供 cache 时使用条件请求：服务端返回 304 则直接复用缓存中的记录。
+    本地没有缓存却收到 304 时（缓存文件被删除或清理、调用方自带条件头）按未命中处理，
+    去掉条件头重新请求一次；仍为 304 则抛出 HTTPError，不会把该页当作空页。
     """
-    matches: List[Dict[str, Any]] = []
-
-    def _walk(node: Any) -> None:
-        if isinstance(node, dict):
-            if all(key in node for key in required_keys):
-                matches.append(node)  # type: ignore[arg-type]
-            for value in node.values():
-                _walk(value)
-        elif isinstance(node, list):
-            for item in node:
-                _walk(item)
-
-    _walk(root)
+    client = client or get_default_client()
+    request_headers = dict(headers or {})
+    cache_key: Optional[str] = None
+    entry: Optional[Dict[str, Any]] = None
+    if cache is not None:
+        cache_key = ResponseCache.make_key(
+            base_url,
+            params.get("gamingType"),
+            params.get("platformCode"),
+            params["pageNo"],
+            params["pageSize"],
+            params.get("equipmentId"),
+        )
+        entry = cache.load(cache_key)
+        request_headers.update(cache.conditional_headers(entry))
+
+    extractor = get_extractor(base_url, required)
+    streamed = extractor.streaming
+    for attempt in range(2):
+        resp = client.get(
+            base_url,
+            params=params,
+            headers=request_headers,
+            timeout=timeout,
+            stream=streamed,
+        )
+        try:
+            if resp.status_code == 304:
+                if entry is not None:
+                    return entry["records"]
+                if attempt == 0:
+                    request_headers = {
+                        k: v for k, v in request_headers.items() if k.lower() not in ("if-none-match", "if-modified-since")
+                    }
+                    continue
+                raise requests.HTTPError("服务端返回 304，但本地没有缓存的记录", response=resp)
+            resp.raise_for_status()
+            matches = extractor.extract(resp, streamed)
+            break
+        finally:
+            resp.close()
+    if cache is not None and cache_key is not None:
+        # 内容与校验信息均未变化时 store 不会写盘
+        cache.store(
+            cache_key,
+            matches,
+            etag=resp.headers.get("ETag"),
+            last_modified=resp.headers.get("Last-Modified"),
+            previous=entry,
+        )
     return matches
 
 
@@ -34,6 +96,8 @@ def fetch_platforms_for_type(
     page_size: int = 150,
     headers: Optional[Dict[str, str]] = None,
     timeout: float = 15.0,
+    client: Optional[ApiClient] = None,
+    cache: Optional[ResponseCache] = None,
 ) -> List[Dict[str, Any]]:
     """
     调用接口按 gamingType 拉取平台数据，返回原始字典列表。
@@ -44,14 +108,7 @@ def fetch_platforms_for_type(
         "pageSize": page_size,
         "gamingType": gaming_type,
     }
-    resp = requests.get(base_url, params=params, headers=headers, timeout=timeout)
-    resp.raise_for_status()
-    data = resp.json()
-
-    # 在返回 JSON 中查找包含所需字段的字典
-    required = {"gamingPlatformCode", "gamingPlatformId", "gamingType", "gamingPlatformName"}
-    matches = find_dicts_with_keys(data, required)
-    return matches
+    return _fetch_records(base_url, params, PLATFORM_KEYS, headers, timeout, client, cache)
 
 
 def fetch_items_for_platform(
@@ -63,6 +120,8 @@ def fetch_items_for_platform(
     page_size: int = 500,
     headers: Optional[Dict[str, str]] = None,
     timeout: float = 15.0,
+    client: Optional[ApiClient] = None,
+    cache: Optional[ResponseCache] = None,
 ) -> List[Dict[str, Any]]:
     """
     调用接口按平台与类型拉取游戏项数据，返回原始字典列表。
@@ -74,13 +133,121 @@ def fetch_items_for_platform(
         "gamingType": gaming_type,
         "platformCode": platform_code,
     }
-    resp = requests.get(base_url, params=params, headers=headers, timeout=timeout)
-    resp.raise_for_status()
-    data = resp.json()
+    return _fetch_records(base_url, params, ITEM_KEYS, headers, timeout, client, cache)
 
-    required = {"gamingItemName", "gamingItemCode", "gamingType"}
-    matches = find_dicts_with_keys(data, required)
-    return matches
+
+def iter_pages(
+    fetch_page: Callable[[int], List[Dict[str, Any]]],
+    page_no: int = 1,
+    page_size: int = 150,
+) -> Iterator[List[Dict[str, Any]]]:
+    """
+    逐页调用 fetch_page(page_no) 并依次产出每页的记录列表，直到接口不再返回更多数据：
+    - 某页返回的记录数少于 page_size（包括空页）视为最后一页
+    - 某页与上一页内容完全相同（接口忽略 pageNo）时停止，避免死循环
+    在调用方处理第 N 页的同时，后台线程预取第 N+1 页；任一时刻最多只持有两页数据。
+    """
+    previous: Optional[List[Dict[str, Any]]] = None
+    with ThreadPoolExecutor(max_workers=1) as prefetcher:
+        future = prefetcher.submit(fetch_page, page_no)
+        while True:
+            rows = future.result()
+            if not rows or rows == previous:
+                return
+            has_more = len(rows) >= page_size
+            if has_more:
+                future = prefetcher.submit(fetch_page, page_no + 1)
+            yield rows
+            if not has_more:
+                return
+            previous = rows
+            page_no += 1
+
+
+def iter_platforms_for_type(
+    base_url: str,
+    gaming_type: int,
+    equipment_id: int = 0,
+    page_no: int = 1,
+    page_size: int = 150,
+    headers: Optional[Dict[str, str]] = None,
+    timeout: float = 15.0,
+    client: Optional[ApiClient] = None,
+    cache: Optional[ResponseCache] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    从 page_no 开始自动翻页，逐条产出某个 gamingType 下的平台数据。
+    """
+    def fetch_page(page: int) -> List[Dict[str, Any]]:
+        return fetch_platforms_for_type(
+            base_url,
+            gaming_type,
+            equipment_id=equipment_id,
+            page_no=page,
+            page_size=page_size,
+            headers=headers,
+            timeout=timeout,
+            client=client,
+            cache=cache,
+        )
+
+    for rows in iter_pages(fetch_page, page_no=page_no, page_size=page_size):
+        yield from rows
+
+
+def iter_items_for_platform(
+    base_url: str,
+    equipment_id: int,
+    gaming_type: int,
+    platform_code: str,
+    page_no: int = 1,
+    page_size: int = 500,
+    headers: Optional[Dict[str, str]] = None,
+    timeout: float = 15.0,
+    client: Optional[ApiClient] = None,
+    cache: Optional[ResponseCache] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    从 page_no 开始自动翻页，逐条产出某个平台下的游戏项数据。
+    """
+    def fetch_page(page: int) -> List[Dict[str, Any]]:
+        return fetch_items_for_platform(
+            base_url=base_url,
+            equipment_id=equipment_id,
+            gaming_type=gaming_type,
+            platform_code=platform_code,
+            page_no=page,
+            page_size=page_size,
+            headers=headers,
+            timeout=timeout,
+            client=client,
+            cache=cache,
+        )
+
+    for rows in iter_pages(fetch_page, page_no=page_no, page_size=page_size):
+        yield from rows
+
+
+def _to_platform_entry(item: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "gamingPlatformCode": item["gamingPlatformCode"],
+        "gamingPlatformId": item["gamingPlatformId"],
+        "gamingType": item["gamingType"],
+        "gamingPlatformName": item["gamingPlatformName"],
+    }
+
+
+def _to_item_entries(game_items: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [
+        {
+            "gamingItemName": gi["gamingItemName"],
+            "gamingItemCode": gi["gamingItemCode"],
+            "gamingType": gi["gamingType"],
+            "gamingItemId": gi.get("gamingItemId", ""),  # 添加gamingItemId字段
+        }
+        for gi in game_items
+        if all(k in gi for k in ("gamingItemName", "gamingItemCode", "gamingType"))
+    ]
 
 
 def build_platform_dict(
@@ -93,62 +260,93 @@ def build_platform_dict(
     items_page_no: int,
     items_page_size: int,
     headers: Optional[Dict[str, str]] = None,
+    timeout: float = 15.0,
+    workers: int = 1,
+    client: Optional[ApiClient] = None,
+    cache: Optional[ResponseCache] = None,
+    sink: Optional[NdjsonWriter] = None,
 ) -> Dict[str, Dict[str, Any]]:
     """
     聚合多个 gamingType 的结果，生成以 gamingPlatformId 为键的字典。
     值仅保留 gamingPlatformCode、gamingPlatformId、gamingType、gamingPlatformName 四个字段。
     对于每个平台，若有游戏项返回，则在该平台对象下新增 items 列表，
     每个元素包含 gamingItemName、gamingItemCode、gamingType、gamingItemId。
+
+    两级接口均从 page_no / items_page_no 开始自动翻页，直到取完全部数据。
+    workers > 1 时使用线程池并发请求（先并发拉取各类型的平台列表，再并发拉取各平台的游戏项），
+    所有请求经由共享的 client（连接池、重试与限速）发出；提供 cache 时使用条件请求与本地缓存。
+    结果的键顺序与串行抓取一致。
+    提供 sink 时，每个平台在抓到后立即逐行写出（NDJSON），不等全部抓取完成；平台的游戏项在其全部分页
+    抓取成功后一次写出，某页失败时与返回的字典一样不写出该平台的任何游戏项，两种输出保持一致。
     """
-    result: Dict[str, Dict[str, Any]] = {}
-    for gt in gaming_types:
-        items = fetch_platforms_for_type(
-            base_url,
-            gt,
-            equipment_id=equipment_id,
-            page_no=page_no,
-            page_size=page_size,
-            headers=headers,
+
+    def fetch_items(entry: Dict[str, Any], platform_id: str) -> List[Dict[str, Any]]:
+        # 游戏项逐页流式转换为输出条目，不保留原始响应
+        game_items = _to_item_entries(
+            iter_items_for_platform(
+                base_url=items_base_url,
+                equipment_id=equipment_id,
+                gaming_type=entry["gamingType"],
+                platform_code=entry["gamingPlatformCode"],
+                page_no=items_page_no,
+                page_size=items_page_size,
+                headers=headers,
+                timeout=timeout,
+                client=client,
+                cache=cache,
+            )
         )
-        for item in items:
-            try:
-                platform_id = str(item["gamingPlatformId"])  # 统一为字符串 key
-                platform_entry: Dict[str, Any] = {
-                    "gamingPlatformCode": item["gamingPlatformCode"],
-                    "gamingPlatformId": item["gamingPlatformId"],
-                    "gamingType": item["gamingType"],
-                    "gamingPlatformName": item["gamingPlatformName"],
-                }
-                # 二级接口：按平台与类型拉取游戏项
-                try:
-                    game_items = fetch_items_for_platform(
-                        base_url=items_base_url,
+        if sink is not None:
+            sink.items(platform_id, game_items)
+        return game_items
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        platform_futures = [
+            pool.submit(
+                lambda gt: list(
+                    iter_platforms_for_type(
+                        base_url,
+                        gt,
                         equipment_id=equipment_id,
-                        gaming_type=platform_entry["gamingType"],
-                        platform_code=platform_entry["gamingPlatformCode"],
-                        page_no=items_page_no,
-                        page_size=items_page_size,
+                        page_no=page_no,
+                        page_size=page_size,
                         headers=headers,
+                        timeout=timeout,
+                        client=client,
+                        cache=cache,
                     )
-                    if game_items:
-                        platform_entry["items"] = [
-                            {
-                                "gamingItemName": gi["gamingItemName"],
-                                "gamingItemCode": gi["gamingItemCode"],
-                                "gamingType": gi["gamingType"],
-                                "gamingItemId": gi.get("gamingItemId", ""),  # 添加gamingItemId字段
-                            }
-                            for gi in game_items
-                            if all(k in gi for k in ("gamingItemName", "gamingItemCode", "gamingType"))
-                        ]
-                except requests.RequestException:
-                    # 忽略子请求错误，不中断主流程
-                    pass
-
-                result[platform_id] = platform_entry
-            except KeyError:
-                # 若个别项缺字段则跳过
-                continue
+                ),
+                gt,
+            )
+            for gt in gaming_types
+        ]
+
+        # 按类型与平台的原始顺序收集条目，保证输出布局与串行模式相同
+        entries: List[tuple] = []
+        for future in platform_futures:
+            for item in future.result():
+                try:
+                    platform_id = str(item["gamingPlatformId"])  # 统一为字符串 key
+                    platform_entry = _to_platform_entry(item)
+                except KeyError:
+                    # 若个别项缺字段则跳过
+                    continue
+                if sink is not None:
+                    sink.platform(platform_entry)
+                # 二级接口：按平台与类型拉取游戏项
+                items_future = pool.submit(fetch_items, platform_entry, platform_id)
+                entries.append((platform_id, platform_entry, items_future))
+
+        result: Dict[str, Dict[str, Any]] = {}
+        for platform_id, platform_entry, items_future in entries:
+            try:
+                game_items = items_future.result()
+                if game_items:
+                    platform_entry["items"] = game_items
+            except requests.RequestException:
+                # 忽略子请求错误，不中断主流程
+                pass
+            result[platform_id] = platform_entry
     return result
 
 
@@ -158,10 +356,7 @@ def parse_args() -> argparse.Namespace:
     )
     parser.add_argument(
         "--base-url",
-        default=(
-            "http://admin.btest4wohjelay.com:3000/"
-            "adminsystem/server/newgamemanager/findByGamePlatfromPageResult"
-        ),
+        default=f"{ADMIN_BASE_URL}/findByGamePlatfromPageResult",
         help="接口基础 URL（无需附带查询参数）",
     )
     parser.add_argument(
@@ -176,8 +371,14 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument(
         "--output",
         type=str,
-        default="gaming_platforms.json",
-        help="输出 JSON 文件路径",
+        default=None,
+        help="输出文件路径，默认 gaming_platforms.json（--format ndjson 时为 gaming_platforms.ndjson）",
+    )
+    parser.add_argument(
+        "--format",
+        choices=("json", "ndjson"),
+        default=None,
+        help="输出格式：json 为整份缩进 JSON；ndjson 为每行一个平台或游戏项，边抓取边写出。默认按输出文件扩展名判断",
     )
     parser.add_argument(
         "--timeout",
@@ -185,22 +386,86 @@ def parse_args() -> argparse.Namespace:
         default=15.0,
         help="请求超时时间（秒）",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=8,
+        help="并发请求的线程数，默认 8（设为 1 即串行抓取）",
+    )
+    parser.add_argument(
+        "--max-rps",
+        type=float,
+        default=10.0,
+        help="对同一主机每秒最多发起的请求数，默认 10（<=0 表示不限速）",
+    )
+    parser.add_argument(
+        "--retries",
+        type=int,
+        default=3,
+        help="超时或 5xx 时的最大重试次数，默认 3",
+    )
     # 平台分页参数
-    parser.add_argument("--page-no", type=int, default=1, help="页码，默认 1")
+    parser.add_argument("--page-no", type=int, default=1, help="起始页码（之后自动翻页），默认 1")
     parser.add_argument("--page-size", type=int, default=150, help="分页大小，默认 150")
     # 游戏项接口与分页参数
     parser.add_argument(
         "--items-base-url",
-        default=(
-            "http://admin.btest4wohjelay.com:3000/"
-            "adminsystem/server/newgamemanager/findGameItemPageResult"
-        ),
+        default=f"{ADMIN_BASE_URL}/findGameItemPageResult",
         help="游戏项接口基础 URL（无需附带查询参数）",
     )
-    parser.add_argument("--items-page-no", type=int, default=1, help="游戏项页码，默认 1")
+    parser.add_argument("--items-page-no", type=int, default=1, help="游戏项起始页码（之后自动翻页），默认 1")
     parser.add_argument(
         "--items-page-size", type=int, default=500, help="游戏项分页大小，默认 500"
     )
+    # 记录在响应 JSON 中的位置（ijson 前缀写法），不指定时自动发现
+    parser.add_argument(
+        "--record-path",
+        type=str,
+        default=None,
+        help="平台记录在响应中的路径，例如 data.list.item（默认自动发现）",
+    )
+    parser.add_argument(
+        "--items-record-path",
+        type=str,
+        default=None,
+        help="游戏项记录在响应中的路径，例如 data.list.item（默认自动发现）",
+    )
+    # 增量同步
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="增量模式：使用本地响应缓存与条件请求，仅在数据有变化时改写输出文件",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=str,
+        default=".query_cache",
+        help="增量模式的响应缓存目录，默认 .query_cache",
+    )
+    # 编译后的目录文件
+    parser.add_argument(
+        "--catalog-db",
+        type=str,
+        default=None,
+        help="同时输出的 SQLite 目录文件路径，默认与输出 JSON 同名（.sqlite）",
+    )
+    parser.add_argument(
+        "--no-catalog-db",
+        action="store_true",
+        help="不生成 SQLite 目录文件",
+    )
+    # 变更流
+    parser.add_argument(
+        "--change-feed",
+        type=str,
+        default=DEFAULT_FEED_PATH,
+        help=f"与上一次输出比较后，把变更追加到该文件（JSONL），默认 {DEFAULT_FEED_PATH}",
+    )
+    parser.add_argument(
+        "--no-change-feed",
+        action="store_true",
+        help="不计算变更、不写变更流",
+    )
     return parser.parse_args()
 
 
@@ -215,6 +480,43 @@ def parse_types(spec: str) -> List[int]:
     return [int(p) for p in parts]
 
 
+def load_previous_output(path: str) -> Dict[str, Dict[str, Any]]:
+    """
+    读取上一次的输出文件；文件不存在或无法解析时返回空字典。
+    """
+    try:
+        return load_platform_dict(path)
+    except (FileNotFoundError, json.JSONDecodeError, ValueError):
+        return {}
+
+
+def write_catalog(platform_dict: Dict[str, Dict[str, Any]], json_path: str, catalog_db: str) -> None:
+    """
+    将平台字典编译为 SQLite 目录文件，并记录对应 JSON 文件的 sha256。
+    """
+    compile_catalog(platform_dict, catalog_db, source_path=json_path)
+    print(f"已生成目录文件 {catalog_db}")
+
+
+def write_change_feed(
+    previous: Dict[str, Dict[str, Any]],
+    platform_dict: Dict[str, Dict[str, Any]],
+    json_path: str,
+    feed_path: str,
+) -> None:
+    """
+    与上一次的输出比较，把变更追加到变更流。没有上一次的输出（首次运行）时不写入。
+    """
+    if not previous:
+        return
+    changes = diff_catalogs(previous, platform_dict)
+    if not changes:
+        print("与上一次输出相比没有结构变化")
+        return
+    changeset = append_change_feed(feed_path, changes, json_path)
+    print(f"变更已追加到 {feed_path}（序号 {changeset['seq']}）: {changeset['summary']}")
+
+
 def main() -> None:
     args = parse_args()
     gaming_types = parse_types(args.types)
@@ -222,9 +524,29 @@ def main() -> None:
     # 使用你提供的请求头
     headers: Dict[str, str] = {
         "Authorization": "9999e327-1b0c-4950-beae-c41ed78658ab",
-        "Accept": "application/json, text/plain, */*",
-        "Accept-Language": "zh-TW,zh;q=0.9,en;q=0.8,en-GB;q=0.7,en-US;q=0.6,zh-CN;q=0.5",
     }
+    client = ApiClient(
+        headers=headers,
+        pool_size=max(1, args.workers),
+        retries=args.retries,
+        timeout=args.timeout,
+        rate_limiter=RateLimiter(args.max_rps),
+    )
+    cache = ResponseCache(args.cache_dir) if args.incremental else None
+    ndjson = args.format == "ndjson" or (args.format is None and args.output and is_ndjson_path(args.output))
+    if args.output is None:
+        args.output = "gaming_platforms.ndjson" if ndjson else "gaming_platforms.json"
+    # NDJSON 边抓取边写入 .part 文件，完成后才替换正式输出，上一次的输出在此之前保持不变
+    sink = NdjsonWriter(args.output) if ndjson else None
+    catalog_db = None if args.no_catalog_db else (args.catalog_db or default_catalog_path(args.output))
+    get_extractor(args.base_url, PLATFORM_KEYS, args.record_path)
+    get_extractor(args.items_base_url, ITEM_KEYS, args.items_record_path)
+
+    def keep_partial() -> None:
+        # 抓取失败或被中断时关闭 NDJSON 输出，保留已写出的 .part 文件
+        if sink is not None:
+            sink.close()
+            print(f"已抓取的部分保存在 {sink.part_path}", file=sys.stderr)
 
     try:
         platform_dict = build_platform_dict(
@@ -236,22 +558,54 @@ def main() -> None:
             items_base_url=args.items_base_url,
             items_page_no=args.items_page_no,
             items_page_size=args.items_page_size,
-            headers=headers,
+            timeout=args.timeout,
+            workers=args.workers,
+            client=client,
+            cache=cache,
+            sink=sink,
         )
     except requests.HTTPError as e:
         print(f"HTTP 错误: {e}", file=sys.stderr)
+        keep_partial()
         sys.exit(2)
     except requests.RequestException as e:
         print(f"请求失败: {e}", file=sys.stderr)
+        keep_partial()
         sys.exit(3)
+    except BaseException:
+        keep_partial()  # 例如 Ctrl+C
+        raise
+    finally:
+        client.close()
+
+    previous = load_previous_output(args.output) if args.incremental or not args.no_change_feed else {}
+    if args.incremental:
+        changed = [pid for pid, entry in platform_dict.items() if previous.get(pid) != entry]
+        removed = [pid for pid in previous if pid not in platform_dict]
+        if not changed and not removed and list(previous) == list(platform_dict):
+            print(f"数据无变化，未改写 {args.output}（共 {len(platform_dict)} 条记录）")
+            if sink is not None:
+                sink.discard()
+            if catalog_db and not os.path.exists(catalog_db):
+                write_catalog(platform_dict, args.output, catalog_db)
+            print(client.summary())
+            return
+        print(f"有变化的平台 {len(changed)} 个，已移除的平台 {len(removed)} 个")
 
-    with open(args.output, "w", encoding="utf-8") as f:
-        json.dump(platform_dict, f, ensure_ascii=False, indent=2)
+    if sink is not None:
+        sink.commit()
+    else:
+        write_json_atomic(args.output, platform_dict, indent=2)
+    if not args.no_change_feed:
+        write_change_feed(previous, platform_dict, args.output, args.change_feed)
 
     print(
         f"已保存 {len(platform_dict)} 条记录到 {args.output}，"
         f"gamingType: {gaming_types}，equipmentId: {args.equipment_id}"
     )
+    if catalog_db:
+        write_catalog(platform_dict, args.output, catalog_db)
+    print(client.summary())
 
 
 if __name__ == "__main__":
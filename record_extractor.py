@@ -0,0 +1,136 @@
+import threading
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import requests
+
+try:
+    import ijson  # 可选依赖：安装后可边下载边解析响应
+except ImportError:  # pragma: no cover - 未安装时退回完整解析
+    ijson = None
+
+
+def find_dicts_with_keys(root: Any, required_keys: Iterable[str]) -> List[Dict[str, Any]]:
+    """
+    深度优先在任意 JSON 结构中查找同时包含 required_keys 的字典集合。
+    使用显式栈遍历，嵌套再深也不会触发递归深度限制；结果顺序与先序遍历一致。
+    """
+    required = tuple(required_keys)
+    matches: List[Dict[str, Any]] = []
+    stack: List[Any] = [root]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            if all(key in node for key in required):
+                matches.append(node)
+            stack.extend(reversed(list(node.values())))
+        elif isinstance(node, list):
+            stack.extend(reversed(node))
+    return matches
+
+
+def discover_record_paths(root: Any, required_keys: Iterable[str]) -> List[Tuple[str, int]]:
+    """
+    找出所有"数组元素包含 required_keys"的位置，返回 (ijson 前缀, 命中数) 列表，按命中数降序。
+    前缀写法与 ijson 一致：字典键用 "." 连接，数组元素记为 "item"，例如 "data.list.item"。
+    """
+    required = tuple(required_keys)
+    counts: Dict[str, int] = {}
+    stack: List[Tuple[str, Any]] = [("", root)]
+    while stack:
+        prefix, node = stack.pop()
+        if isinstance(node, dict):
+            if prefix.endswith("item") and all(key in node for key in required):
+                counts[prefix] = counts.get(prefix, 0) + 1
+            for key, value in node.items():
+                stack.append((f"{prefix}.{key}" if prefix else str(key), value))
+        elif isinstance(node, list):
+            child = f"{prefix}.item" if prefix else "item"
+            for value in node:
+                stack.append((child, value))
+    return sorted(counts.items(), key=lambda kv: (-kv[1], kv[0]))
+
+
+def iter_prefix(root: Any, prefix: str) -> Iterator[Any]:
+    """
+    在已解析的 JSON 中按 ijson 前缀取出对应的全部节点（不做递归全树遍历）。
+    """
+    nodes: List[Any] = [root]
+    for token in prefix.split(".") if prefix else []:
+        next_nodes: List[Any] = []
+        for node in nodes:
+            if token == "item" and isinstance(node, list):
+                next_nodes.extend(node)
+            elif isinstance(node, dict) and token in node:
+                next_nodes.append(node[token])
+        nodes = next_nodes
+    yield from nodes
+
+
+class RecordExtractor:
+    """
+    从接口响应中提取记录的提取器，每个接口一个实例：
+    - 已知记录路径且安装了 ijson 时，直接在 resp.raw 上流式解析，内存占用与单条记录相当
+    - 已知路径但未安装 ijson 时，完整解析后按路径直接取值
+    - 路径未知时，完整解析并做一次启发式发现；若唯一路径覆盖了全部匹配记录，则缓存该路径供后续请求使用
+    """
+
+    def __init__(self, required_keys: Iterable[str], record_path: Optional[str] = None) -> None:
+        self.required = tuple(required_keys)
+        self.record_path = record_path
+        self._lock = threading.Lock()
+
+    @property
+    def streaming(self) -> bool:
+        return ijson is not None and self.record_path is not None
+
+    def extract(self, resp: requests.Response, streamed: bool = False) -> List[Dict[str, Any]]:
+        """
+        提取记录。streamed 表示请求是否以 stream=True 发出（应取自发请求前的 self.streaming），
+        只有这种情况下 resp.raw 仍未被读取，可以流式解析。
+        """
+        path = self.record_path
+        if streamed and path is not None and ijson is not None:
+            resp.raw.decode_content = True
+            return [
+                record
+                for record in ijson.items(resp.raw, path, use_float=True)
+                if isinstance(record, dict) and all(key in record for key in self.required)
+            ]
+
+        data = resp.json()
+        if path is not None:
+            return [
+                record
+                for record in iter_prefix(data, path)
+                if isinstance(record, dict) and all(key in record for key in self.required)
+            ]
+
+        matches = find_dicts_with_keys(data, self.required)
+        paths = discover_record_paths(data, self.required)
+        if len(paths) == 1 and paths[0][1] == len(matches):
+            with self._lock:
+                self.record_path = paths[0][0]
+        return matches
+
+
+_extractors: Dict[Tuple[str, Tuple[str, ...]], RecordExtractor] = {}
+_extractors_lock = threading.Lock()
+
+
+def get_extractor(
+    endpoint: str,
+    required_keys: Iterable[str],
+    record_path: Optional[str] = None,
+) -> RecordExtractor:
+    """
+    返回某个接口的共享提取器（按 endpoint 与所需字段缓存）。
+    传入 record_path 时以其为准，覆盖启发式发现的结果。
+    """
+    key = (endpoint, tuple(sorted(required_keys)))
+    with _extractors_lock:
+        extractor = _extractors.get(key)
+        if extractor is None:
+            extractor = _extractors[key] = RecordExtractor(required_keys, record_path)
+        elif record_path is not None:
+            extractor.record_path = record_path
+        return extractor
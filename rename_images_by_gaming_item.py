@@ -1,46 +1,45 @@
 import argparse
 import json
 import os
+import sqlite3
 from pathlib import Path
-from typing import Dict, Optional, Tuple
+from typing import Any, Dict, List, Optional, Set, Tuple
 
+from catalog import open_catalog
+from catalog_diff import ADDED, DEFAULT_CURSOR_FILE, DEFAULT_FEED_PATH, MOVED, RENAMED, load_pending_changes, write_cursor
+from fs_plan import CONFLICT, DONE, FsPlan, undo_plan
+from name_matcher import HAS_OPENCC, FuzzyMatcher, NameMatcher
+from naming import is_image
 
-IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".bmp", ".webp"}
 
-
-def is_image(path: Path) -> bool:
-    """检查文件是否为图片"""
-    return path.is_file() and path.suffix.lower() in IMAGE_EXTENSIONS
+DEFAULT_UNDO_LOG = "rename_undo.jsonl"
 
 
 def load_gaming_data(json_path: Path, gaming_type_filter: Optional[str] = None) -> Dict[str, int]:
     """
-    从JSON文件加载游戏数据，返回游戏名称到gamingItemId的映射
+    从JSON文件（或编译后的 .sqlite 目录文件）加载游戏数据，返回游戏名称到gamingItemId的映射
     """
     gaming_map: Dict[str, int] = {}
     
     try:
-        with open(json_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        # 通过目录文件按 gamingType 索引取出游戏项（JSON 会编译为旁路缓存，内容变化时自动重建）
+        with open_catalog(str(json_path)) as catalog:
+            items = catalog.items(gaming_type_filter)
         
-        # 遍历所有平台
-        for platform_id, platform_data in data.items():
-            if 'items' in platform_data:
-                # 遍历每个平台下的游戏项目
-                for item in platform_data['items']:
-                    gaming_item_name = item.get('gamingItemName', '').strip()
-                    gaming_item_id = item.get('gamingItemId')
-                    gaming_type = item.get('gamingType', '').strip()
-                    
-                    # 如果设置了gamingType过滤，只加载匹配的游戏
-                    if gaming_type_filter and gaming_type != gaming_type_filter:
-                        continue
-                    
-                    if gaming_item_name and gaming_item_id:
-                        # 使用小写名称作为匹配键，避免大小写问题
-                        gaming_map[gaming_item_name.lower()] = gaming_item_id
-                        # 也保存原始名称，以防需要精确匹配
-                        gaming_map[gaming_item_name] = gaming_item_id
+        for item in items:
+            gaming_item_name = (item.get('gamingItemName') or '').strip()
+            gaming_item_id = item.get('gamingItemId')
+            gaming_type = (item.get('gamingType') or '').strip()
+            
+            # 如果设置了gamingType过滤，只加载匹配的游戏
+            if gaming_type_filter and gaming_type != gaming_type_filter:
+                continue
+            
+            if gaming_item_name and gaming_item_id:
+                # 使用小写名称作为匹配键，避免大小写问题
+                gaming_map[gaming_item_name.lower()] = gaming_item_id
+                # 也保存原始名称，以防需要精确匹配
+                gaming_map[gaming_item_name] = gaming_item_id
         
         filter_info = f" (gamingType: {gaming_type_filter})" if gaming_type_filter else ""
         print(f"已加载 {len(gaming_map)} 个游戏项目{filter_info}")
@@ -52,77 +51,154 @@ def load_gaming_data(json_path: Path, gaming_type_filter: Optional[str] = None)
     except json.JSONDecodeError as e:
         print(f"错误：JSON文件格式错误 - {e}")
         return {}
+    except sqlite3.Error as e:
+        print(f"错误：目录文件读取失败 - {e}")
+        return {}
 
 
-def find_matching_gaming_id(image_name: str, gaming_map: Dict[str, int]) -> Optional[int]:
+def gaming_map_from_changes(changes: List[Dict[str, Any]], gaming_type_filter: Optional[str] = None) -> Dict[str, int]:
+    """
+    只取变更流中新增、改名或换平台的游戏项，返回游戏名称到gamingItemId的映射。
+    改名的游戏项新旧名称都会映射到它的ID，以旧名称命名的图片同样能被重命名。
+    结果只用来确定允许的ID（见 merge_changed_names），匹配仍基于完整的游戏数据，
+    否则包含匹配会把未变化游戏的图片错配到名称相近的变更游戏上。
+    """
+    gaming_map: Dict[str, int] = {}
+    for change in changes:
+        if change["kind"] != "item" or change["op"] not in (ADDED, RENAMED, MOVED):
+            continue
+        after = change["after"]
+        if gaming_type_filter and str(after.get("gamingType") or "").strip() != gaming_type_filter:
+            continue
+        names = [after.get("gamingItemName")]
+        if change["op"] == RENAMED:
+            names.append(change["before"].get("gamingItemName"))
+        for name in names:
+            name = (name or "").strip()
+            if name and after.get("gamingItemId"):
+                gaming_map[name.lower()] = after["gamingItemId"]
+                gaming_map[name] = after["gamingItemId"]
+    print(f"变更流中有 {len(gaming_map)} 个需要匹配的游戏名称")
+    return gaming_map
+
+
+def merge_changed_names(gaming_map: Dict[str, int], changed_map: Dict[str, int]) -> Set[str]:
+    """
+    把变更流中的名称（主要是改名前的旧名称）补充到完整的名称映射中，已被当前数据占用的名称保持不变；
+    返回变更涉及的 gamingItemId 集合（统一为字符串，JSON 与目录文件中的 ID 类型可能不同）。
+    """
+    for name, gaming_id in changed_map.items():
+        gaming_map.setdefault(name, gaming_id)
+    return {str(gaming_id) for gaming_id in changed_map.values()}
+
+
+def find_matching_gaming_id(
+    image_name: str,
+    gaming_map: Dict[str, int],
+    matcher: Optional[NameMatcher] = None,
+) -> Optional[int]:
     """
     根据图片名称查找匹配的gamingItemId
-    支持多种匹配策略：
+    支持多种匹配策略（不区分大小写，规则详见 NameMatcher）：
     1. 精确匹配（去除扩展名后）
-    2. 包含匹配
-    3. 模糊匹配
+    2. 包含匹配：图片名称包含游戏名称，取最长的游戏名称
+    3. 包含匹配：游戏名称包含图片名称，取最短的游戏名称
+    批量匹配时应预先构建一次 matcher 并传入，避免每次重建索引
     """
     # 去除扩展名
     name_without_ext = Path(image_name).stem
-    
-    # 策略1：精确匹配（小写）
-    if name_without_ext.lower() in gaming_map:
-        return gaming_map[name_without_ext.lower()]
-    
-    # 策略2：精确匹配（原始大小写）
-    if name_without_ext in gaming_map:
-        return gaming_map[name_without_ext]
-    
-    # 策略3：包含匹配（图片名称包含游戏名称）
-    for gaming_name, gaming_id in gaming_map.items():
-        if gaming_name.lower() in name_without_ext.lower():
-            return gaming_id
-    
-    # 策略4：包含匹配（游戏名称包含图片名称）
-    for gaming_name, gaming_id in gaming_map.items():
-        if name_without_ext.lower() in gaming_name.lower():
-            return gaming_id
-    
-    return None
+    if matcher is None:
+        matcher = NameMatcher(gaming_map)
+    return matcher.match(name_without_ext)
 
 
-def rename_images_by_gaming_id(source_dir: Path, gaming_map: Dict[str, int], dry_run: bool = False) -> int:
+def plan_renames(
+    source_dir: Path,
+    gaming_map: Dict[str, int],
+    fuzzy: bool = False,
+    fuzzy_threshold: float = 0.6,
+    only_ids: Optional[Set[str]] = None,
+) -> FsPlan:
     """
-    根据JSON数据重命名图片
+    为目录中的图片计算完整的重命名计划（不修改文件），目标已存在或多个图片指向同一 ID 时标记为冲突
+    only_ids 不为 None 时，最佳匹配不在其中的图片保持不变（用于只处理变更流中的游戏项）
     """
-    renamed = 0
+    plan = FsPlan()
+    # 名称索引只构建一次，所有图片共用
+    matcher = NameMatcher(gaming_map)
+    fuzzy_matcher = FuzzyMatcher(gaming_map, threshold=fuzzy_threshold) if fuzzy else None
     
-    for img_path in source_dir.iterdir():
+    for img_path in sorted(source_dir.iterdir()):
         if not is_image(img_path):
             continue
         
-        gaming_id = find_matching_gaming_id(img_path.name, gaming_map)
+        if fuzzy_matcher is not None:
+            scored = fuzzy_matcher.match_scored(img_path.stem)
+            gaming_id = scored[0] if scored else None
+            if scored and scored[1] < 1.0:
+                print(f"模糊匹配: {img_path.name} -> {gaming_id}（置信度 {scored[1]}）")
+        else:
+            gaming_id = find_matching_gaming_id(img_path.name, gaming_map, matcher)
         if gaming_id is None:
             print(f"未找到匹配: {img_path.name}")
             continue
+        if only_ids is not None and str(gaming_id) not in only_ids:
+            continue
         
         # 构建新的文件名：gamingItemId + 原扩展名
-        new_name = f"{gaming_id}{img_path.suffix}"
-        new_path = img_path.parent / new_name
-        
-        # 检查新文件名是否已存在
-        if new_path.exists():
-            print(f"跳过: 目标文件已存在 {new_path}")
+        new_path = img_path.parent / f"{gaming_id}{img_path.suffix}"
+        if new_path == img_path:
             continue
-        
-        if dry_run:
-            print(f"[预览] {img_path.name} -> {new_name}")
-        else:
-            try:
-                img_path.rename(new_path)
-                print(f"重命名: {img_path.name} -> {new_name}")
-            except Exception as e:
-                print(f"错误: 无法重命名 {img_path.name} - {e}")
-                continue
-        
-        renamed += 1
+        op = plan.add(img_path, new_path)
+        if op.status == CONFLICT:
+            print(f"跳过: {img_path.name} -> {new_path.name}（{op.reason}）")
+    
+    return plan
+
+
+def rename_images_by_gaming_id(
+    source_dir: Path,
+    gaming_map: Dict[str, int],
+    dry_run: bool = False,
+    fuzzy: bool = False,
+    fuzzy_threshold: float = 0.6,
+    workers: int = 8,
+    undo_log: Optional[str] = DEFAULT_UNDO_LOG,
+    only_ids: Optional[Set[str]] = None,
+) -> int:
+    """
+    根据JSON数据重命名图片：先计算完整计划，再用线程池并行执行，并写入撤销日志
+    fuzzy=True 时使用模糊匹配（名称规范化 + n-gram 相似度），低于 fuzzy_threshold 的候选视为未匹配
+    """
+    plan = plan_renames(source_dir, gaming_map, fuzzy=fuzzy, fuzzy_threshold=fuzzy_threshold, only_ids=only_ids)
+    
+    if dry_run:
+        for op in plan.planned():
+            print(f"[预览] {op.src.name} -> {op.dest.name}")
+        return len(plan.planned())
     
-    return renamed
+    results = plan.apply(workers=workers, undo_log=undo_log)
+    for op in results:
+        if op.status == DONE:
+            print(f"重命名: {op.src.name} -> {op.dest.name}")
+        else:
+            print(f"错误: 无法重命名 {op.src.name} - {op.reason}")
+    if undo_log and results:
+        print(f"撤销日志: {undo_log}（使用 --undo 回滚）")
+    return sum(1 for op in results if op.status == DONE)
+
+
+def undo_renames(undo_log: str, workers: int = 8) -> int:
+    """
+    按撤销日志把文件名改回原样
+    """
+    ops = undo_plan(undo_log, workers=workers)
+    for op in ops:
+        if op.status == DONE:
+            print(f"已还原: {op.src.name} -> {op.dest.name}")
+        else:
+            print(f"错误: 无法还原 {op.src.name} - {op.reason}")
+    return sum(1 for op in ops if op.status == DONE)
 
 
 def parse_args():
@@ -139,7 +215,7 @@ def parse_args():
         "--json-file",
         type=str,
         default="gaming_platforms.json",
-        help="包含游戏数据的JSON文件路径"
+        help="包含游戏数据的JSON文件路径，也可以是编译后的 .sqlite 目录文件"
     )
     parser.add_argument(
         "--gaming-type",
@@ -147,17 +223,66 @@ def parse_args():
         default="4",
         help="只匹配指定gamingType的游戏（例如：'4' 表示只匹配PG电子游戏）"
     )
+    parser.add_argument(
+        "--fuzzy",
+        action="store_true",
+        help="启用模糊匹配：忽略全角/半角、繁简体、空格与标点差异，并按相似度匹配"
+    )
+    parser.add_argument(
+        "--fuzzy-threshold",
+        type=float,
+        default=0.6,
+        help="模糊匹配的最低置信度（0-1），默认 0.6"
+    )
     parser.add_argument(
         "--dry-run",
         action="store_true",
         help="预览模式，只显示将要进行的重命名操作，不实际执行"
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=8,
+        help="并行重命名的线程数，默认 8"
+    )
+    parser.add_argument(
+        "--undo-log",
+        type=str,
+        default=DEFAULT_UNDO_LOG,
+        help=f"撤销日志路径，默认 {DEFAULT_UNDO_LOG}"
+    )
+    parser.add_argument(
+        "--undo",
+        action="store_true",
+        help="按撤销日志回滚上一次的重命名"
+    )
+    parser.add_argument(
+        "--changes",
+        nargs="?",
+        const=DEFAULT_FEED_PATH,
+        default=None,
+        help=f"只匹配 query.py 变更流中新增或改名的游戏项，默认读取 {DEFAULT_FEED_PATH}"
+    )
+    parser.add_argument(
+        "--since",
+        type=int,
+        default=None,
+        help=f"与 --changes 一起使用：合并处理序号大于该值的全部变更；默认处理源目录下 {DEFAULT_CURSOR_FILE} 记录的上次处理位置之后的全部变更"
+    )
     return parser.parse_args()
 
 
 def main():
     args = parse_args()
     
+    if args.undo:
+        if not os.path.exists(args.undo_log):
+            print(f"错误：撤销日志不存在 {args.undo_log}")
+            return
+        restored = undo_renames(args.undo_log, args.workers)
+        print(f"完成，还原了 {restored} 个文件")
+        return
+    
     source_dir = Path(args.source_dir)
     json_file = Path(args.json_file)
     
@@ -173,17 +298,46 @@ def main():
     print(f"JSON文件: {json_file}")
     print(f"游戏类型过滤: {args.gaming_type if args.gaming_type else '无'}")
     print(f"模式: {'预览模式' if args.dry_run else '执行模式'}")
+    if args.fuzzy and not HAS_OPENCC:
+        print("提示: 未安装 opencc，繁简转换只覆盖内置的常用字表；完整转换请 pip install opencc")
     print("-" * 50)
     
     # 加载游戏数据
+    cursor_file = str(source_dir / DEFAULT_CURSOR_FILE)
+    seq = None
+    only_ids = None
+    if args.changes:
+        changes, seq = load_pending_changes(args.changes, cursor_file, args.since)
+        changed_map = gaming_map_from_changes(changes, args.gaming_type)
+        if not changed_map:
+            print("变更流中没有需要处理的游戏项")
+            if seq is not None and not args.dry_run:
+                write_cursor(cursor_file, args.changes, seq)
+            return
+
     gaming_map = load_gaming_data(json_file, args.gaming_type)
     if not gaming_map:
         print("无法加载游戏数据，退出")
         return
+    if args.changes:
+        # 按完整数据匹配，只接受最佳匹配属于变更游戏项的图片
+        only_ids = merge_changed_names(gaming_map, changed_map)
     
     # 重命名图片
-    renamed_count = rename_images_by_gaming_id(source_dir, gaming_map, args.dry_run)
+    renamed_count = rename_images_by_gaming_id(
+        source_dir,
+        gaming_map,
+        args.dry_run,
+        fuzzy=args.fuzzy,
+        fuzzy_threshold=args.fuzzy_threshold,
+        workers=args.workers,
+        undo_log=args.undo_log,
+        only_ids=only_ids,
+    )
     
+    if seq is not None and not args.dry_run:
+        write_cursor(cursor_file, args.changes, seq)
+
     print("-" * 50)
     if args.dry_run:
         print(f"预览完成，将重命名 {renamed_count} 个文件")
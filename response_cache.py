@@ -0,0 +1,101 @@
+import hashlib
+import json
+import os
+import tempfile
+from typing import Any, Dict, List, Optional
+
+
+def content_hash(records: Any) -> str:
+    """
+    对记录做规范化 JSON 序列化后计算 SHA-256，用于判断内容是否变化。
+    """
+    payload = json.dumps(records, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def write_json_atomic(path: str, data: Any, indent: Optional[int] = None) -> None:
+    """
+    先写入同目录下的临时文件再替换目标文件，避免中途失败留下半截文件。
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=".json")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=indent)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class ResponseCache:
+    """
+    接口响应的本地缓存，每个 (endpoint, gamingType, platformCode, 分页) 对应一个文件。
+    缓存内容包括服务端校验信息（ETag / Last-Modified）、提取出的记录及其内容哈希：
+    - 有校验信息时，请求附带 If-None-Match / If-Modified-Since，304 时直接复用缓存记录
+    - 内容哈希与校验信息都未变化时不写磁盘
+    """
+
+    def __init__(self, cache_dir: str) -> None:
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(
+        endpoint: str,
+        gaming_type: Any,
+        platform_code: Optional[str],
+        page_no: int,
+        page_size: int,
+        equipment_id: Any = 0,
+    ) -> str:
+        raw = json.dumps(
+            [endpoint, str(gaming_type), platform_code or "", page_no, page_size, str(equipment_id)],
+            ensure_ascii=False,
+        )
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def load(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def conditional_headers(self, entry: Optional[Dict[str, Any]]) -> Dict[str, str]:
+        headers: Dict[str, str] = {}
+        if entry:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("lastModified"):
+                headers["If-Modified-Since"] = entry["lastModified"]
+        return headers
+
+    def store(
+        self,
+        key: str,
+        records: List[Dict[str, Any]],
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+        previous: Optional[Dict[str, Any]] = None,
+    ) -> bool:
+        """
+        保存记录，返回是否实际写入了磁盘。
+        """
+        entry = {
+            "etag": etag,
+            "lastModified": last_modified,
+            "contentHash": content_hash(records),
+            "records": records,
+        }
+        if previous is not None and all(
+            previous.get(k) == entry[k] for k in ("etag", "lastModified", "contentHash")
+        ):
+            return False
+        write_json_atomic(self._path(key), entry)
+        return True
@@ -0,0 +1,106 @@
+import os
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from naming import is_image_name
+
+
+class TreeSnapshot:
+    """
+    目录树的内存快照：用 os.scandir 一次性遍历，记录每个目录下的条目名称以及是否为目录。
+    之后的"是否存在 / 是否已有图片 / 有哪些子目录"都从快照回答，不再逐个 stat；
+    移动或新建文件后通过 add / remove 同步更新快照。
+    - max_depth=None: 遍历整棵树
+    - max_depth=1: 只列出 root 本身；2: 再列出 root 的每个子目录，依此类推
+    名称比较使用 os.path.normcase（Windows 上不区分大小写）。
+    """
+
+    def __init__(self, root: Path, max_depth: Optional[int] = None) -> None:
+        self.root = Path(root)
+        # 目录 -> {normcase(名称): (名称, 是否为目录)}，保持 scandir 返回的顺序
+        self.listings: Dict[Path, Dict[str, Tuple[str, bool]]] = {}
+        # 目录的深度优先先序（与 Path.rglob 的遍历顺序一致），不含 root
+        self.dir_order: List[Path] = []
+        self._scan(max_depth)
+
+    def _scan(self, max_depth: Optional[int]) -> None:
+        stack: List[Tuple[Path, int]] = [(self.root, 1)]
+        while stack:
+            directory, depth = stack.pop()
+            listing: Dict[str, Tuple[str, bool]] = {}
+            try:
+                with os.scandir(directory) as it:
+                    for entry in it:
+                        try:
+                            is_dir = entry.is_dir()
+                        except OSError:
+                            is_dir = False
+                        listing[os.path.normcase(entry.name)] = (entry.name, is_dir)
+            except (FileNotFoundError, NotADirectoryError, PermissionError):
+                continue
+            self.listings[directory] = listing
+            if max_depth is not None and depth >= max_depth:
+                continue
+            children = [directory / name for name, is_dir in listing.values() if is_dir]
+            stack.extend((child, depth + 1) for child in reversed(children))
+
+        # 按先序重建目录顺序：父目录的子目录依次展开
+        def walk(directory: Path) -> Iterator[Path]:
+            for child in self.child_dirs(directory):
+                yield child
+                yield from walk(child)
+
+        self.dir_order = list(walk(self.root))
+
+    def is_scanned(self, directory: Path) -> bool:
+        return Path(directory) in self.listings
+
+    def entries(self, directory: Path) -> List[Tuple[str, bool]]:
+        return list(self.listings.get(Path(directory), {}).values())
+
+    def child_dirs(self, directory: Path) -> List[Path]:
+        directory = Path(directory)
+        return [directory / name for name, is_dir in self.entries(directory) if is_dir]
+
+    def all_dirs(self) -> List[Path]:
+        """
+        root 之下的所有目录（仅限已扫描深度内），顺序与 root.rglob("*") 中的目录一致。
+        """
+        return list(self.dir_order)
+
+    def files(self, directory: Path) -> List[Path]:
+        directory = Path(directory)
+        return [directory / name for name, is_dir in self.entries(directory) if not is_dir]
+
+    def images(self, directory: Path, recursive: bool = False) -> Iterator[Path]:
+        """
+        列出目录下的图片；recursive=True 时按 rglob 的顺序包括所有子目录。
+        """
+        directories = [Path(directory)]
+        if recursive:
+            directories += [d for d in self.dir_order if Path(directory) in d.parents]
+        for d in directories:
+            for path in self.files(d):
+                if is_image_name(path.name):
+                    yield path
+
+    def has_image(self, directory: Path) -> bool:
+        return any(not is_dir and is_image_name(name) for name, is_dir in self.entries(directory))
+
+    def exists(self, path: Path) -> bool:
+        path = Path(path)
+        return os.path.normcase(path.name) in self.listings.get(path.parent, {})
+
+    def add(self, path: Path, is_dir: bool = False) -> None:
+        path = Path(path)
+        self.listings.setdefault(path.parent, {})[os.path.normcase(path.name)] = (path.name, is_dir)
+        if is_dir:
+            self.listings.setdefault(path, {})
+            if path not in self.dir_order:
+                self.dir_order.append(path)
+
+    def remove(self, path: Path) -> None:
+        path = Path(path)
+        listing = self.listings.get(path.parent)
+        if listing is not None:
+            listing.pop(os.path.normcase(path.name), None)
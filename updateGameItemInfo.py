@@ -1,8 +1,50 @@
-import requests
+import os
+from typing import Dict, Optional
 
-def update_game_item_with_images():
-    url = 'http://admin.btest4wohjelay.com:3000/adminsystem/server/newgamemanager/updateGameItemInfo'
-    
+from api_client import ADMIN_BASE_URL, ApiClient, response_ok
+from hash_cache import DEFAULT_HASH_CACHE_PATH, HashCache
+from multipart import StreamingMultipart, build_image_form
+from upload_journal import DEFAULT_JOURNAL_PATH, UploadJournal
+
+UPDATE_ITEM_URL = f'{ADMIN_BASE_URL}/updateGameItemInfo'
+
+# 接口接受的图片字段（hjConUrlFile 目前不提交）
+ITEM_FILE_SLOTS = (
+    'conUrlFile',
+    'icon1File',
+    'icon2File',
+    'icon3File',
+    'hjIcon1File',
+    'hjIcon2File',
+    'hjIcon3File',
+)
+
+HEADERS = {
+    'Authorization': '9999e327-1b0c-4950-beae-c41ed78658ab',
+    'Accept': 'application/json, text/plain, */*',
+    'Accept-Language': 'zh-TW,zh;q=0.9,en;q=0.8,en-GB;q=0.7,en-US;q=0.6,zh-CN;q=0.5'
+}
+
+
+def build_update_form(data: Dict[str, str], images: Dict[str, str], slots=ITEM_FILE_SLOTS) -> StreamingMultipart:
+    """
+    构造游戏项更新请求体，规则见 multipart.build_image_form
+    """
+    return build_image_form(data, images, slots, id_key='gamingItemId')
+
+
+def post_item_update(client: ApiClient, data: Dict[str, str], images: Dict[str, str], url: str = UPDATE_ITEM_URL):
+    """
+    提交一次游戏项更新，返回响应对象
+    """
+    body = build_update_form(data, images)
+    try:
+        return client.post(url, data=body, headers={'Content-Type': body.content_type}, verify=False)
+    finally:
+        body.close()
+
+
+def update_game_item_with_images(client: Optional[ApiClient] = None):
     # 准备表单数据
     data = {
         #'gamingItemName': '幸运宝石',
@@ -20,34 +62,42 @@ def update_game_item_with_images():
     }
     print(data)
     # 准备文件
-    files = {
-        'conUrlFile': ('', '', 'application/octet-stream'),  # 空文件
-        'icon1File': ('', '', 'application/octet-stream'),  # 空文件
-        'icon2File': open('C:/Users/USER/Desktop/picture/5.jpg', 'rb'),  # 实际图片文件
-        'icon3File': ('', '', 'application/octet-stream'),   # 空文件
-        #'hjConUrlFile': open('C:/Users/USER/Desktop/picture/5.jpg', 'rb'),  # 实际图片文件
-        'hjIcon1File': ('', '', 'application/octet-stream'),   # 空文件
-        'hjIcon2File': ('', '', 'application/octet-stream'),   # 空文件
-        'hjIcon3File': ('', '', 'application/octet-stream'),   # 空文件
-    }
-    print(files)
-    headers = {
-        'Authorization': '9999e327-1b0c-4950-beae-c41ed78658ab',
-        'Accept': 'application/json, text/plain, */*',
-        'Accept-Language': 'zh-TW,zh;q=0.9,en;q=0.8,en-GB;q=0.7,en-US;q=0.6,zh-CN;q=0.5'
+    images = {
+        'icon2File': 'C:/Users/USER/Desktop/picture/5.jpg',  # 实际图片文件
+        #'hjConUrlFile': 'C:/Users/USER/Desktop/picture/5.jpg',  # 实际图片文件
     }
-    
+    print(images)
+
+    # 与上传日志比对：相同内容已成功上传过则跳过
+    image_path = images['icon2File']
+    hash_cache = HashCache(DEFAULT_HASH_CACHE_PATH)
+    sha256 = hash_cache.sha256(image_path)
+    size = os.path.getsize(image_path)
+    hash_cache.save()
+    journal = UploadJournal(DEFAULT_JOURNAL_PATH)
+    if journal.is_confirmed('item', data['gamingItemId'], 'icon2File', sha256, size):
+        print(f"跳过: 相同图片已上传过 {image_path}")
+        journal.close()
+        return None
+
+    own_client = client is None
+    client = client or ApiClient(headers=HEADERS)
     try:
-        response = requests.post(url, data=data, files=files, headers=headers, verify=False)
+        response = post_item_update(client, data, images)
         print(f"状态码: {response.status_code}")
         print(f"响应: {response.text}")
+        status = 'ok' if response_ok(response) else 'failed'
+        journal.record('item', data['gamingItemId'], 'icon2File', image_path, sha256, status,
+                       response.status_code, response.text[:500], size)
         return response
     except Exception as e:
         print(f"请求失败: {e}")
     finally:
-        # 关闭文件
-        if 'icon2File' in files and hasattr(files['icon2File'], 'close'):
-            files['icon2File'].close()
+        journal.close()
+        if own_client:
+            client.close()
+
 
-# 调用函数
-update_game_item_with_images()
\ No newline at end of file
+if __name__ == '__main__':
+    # 调用函数
+    update_game_item_with_images()
@@ -0,0 +1,395 @@
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from api_client import ApiClient, response_ok, status_text_ok
+from asset_index import AssetIndex, IndexedHashCache, open_asset_index
+from async_upload import HAS_AIOHTTP, AsyncUploader, UploadJob, UploadResult, parse_rate
+from asset_tree import ItemResolver, iter_tree_images, load_platforms
+from hash_cache import DEFAULT_HASH_CACHE_PATH, HashCache
+from icon_specs import load_slot_specs
+from optimize_images import optimize_many, settings_for_slot
+from response_cache import write_json_atomic
+from updateGameItemInfo import HEADERS, ITEM_FILE_SLOTS, UPDATE_ITEM_URL, build_update_form, post_item_update
+from upload_journal import DEFAULT_JOURNAL_PATH, UploadJournal, file_sha256
+from validate_assets import ERROR, index_infos, validate_files
+
+
+# (上传任务列表, 未能上传的报告条目)
+UploadPlan = Tuple[List["UploadTask"], List[Dict[str, Any]]]
+
+
+@dataclass
+class UploadTask:
+    path: Path
+    slot: str
+    platform: Dict[str, Any]
+    item: Dict[str, Any]
+    upload_path: Optional[Path] = None  # 实际上传的文件（例如优化后的图片），默认即 path
+
+    @property
+    def send_path(self) -> Path:
+        return self.upload_path or self.path
+
+    @property
+    def item_id(self) -> str:
+        return str(self.item.get("gamingItemId"))
+
+    def form_data(self) -> Dict[str, str]:
+        return {
+            "gamingItemId": self.item_id,
+            "platformCode": str(self.platform.get("gamingPlatformCode", "")),
+            "gamingItemCode": str(self.item.get("gamingItemCode", "")),
+            "gamingType": str(self.item.get("gamingType", "")),
+        }
+
+
+def _report_entry(path: Path, status: str, item_id: Optional[str] = None, slot: Optional[str] = None, **extra: Any) -> Dict[str, Any]:
+    entry: Dict[str, Any] = {"file": str(path), "gamingItemId": item_id, "slot": slot, "status": status}
+    entry.update(extra)
+    return entry
+
+
+def plan_from_tree(
+    resolver: ItemResolver,
+    root: Path,
+    slot: str,
+    gaming_types: Optional[List[str]] = None,
+    platform_names: Optional[List[str]] = None,
+) -> UploadPlan:
+    """
+    扫描 gamingType 目录树，将图片解析为上传任务。返回 (任务列表, 未能上传的报告条目)。
+    同一游戏项同一字段有多张图片时只上传第一张（按路径排序），其余记为 duplicate。
+    """
+    tasks: List[UploadTask] = []
+    skipped: List[Dict[str, Any]] = []
+    seen: Dict[Tuple[str, str], Path] = {}
+    for path in iter_tree_images(root, gaming_types, platform_names):
+        ref = resolver.resolve(path, root)
+        if ref is None:
+            skipped.append(_report_entry(path, "unmatched", slot=slot))
+            continue
+        task = UploadTask(path, slot, *ref)
+        key = (task.item_id, slot)
+        if key in seen:
+            skipped.append(_report_entry(path, "duplicate", task.item_id, slot, duplicateOf=str(seen[key])))
+            continue
+        seen[key] = path
+        tasks.append(task)
+    return tasks, skipped
+
+
+def plan_from_manifest(resolver: ItemResolver, manifest_path: Path, default_slot: str) -> UploadPlan:
+    """
+    读取清单文件（JSON 数组，元素形如 {"file": "...", "gamingItemId": 16177, "slot": "icon2File"}），
+    返回 (任务列表, 未能上传的报告条目)。slot 缺省时使用 default_slot。
+    """
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        entries = json.load(f)
+    tasks: List[UploadTask] = []
+    skipped: List[Dict[str, Any]] = []
+    for entry in entries:
+        path = Path(entry["file"])
+        item_id = str(entry["gamingItemId"])
+        slot = entry.get("slot") or default_slot
+        ref = resolver.by_item_id.get(item_id)
+        if ref is None or slot not in ITEM_FILE_SLOTS or not path.is_file():
+            reason = "未知的 gamingItemId" if ref is None else ("未知的图片字段" if slot not in ITEM_FILE_SLOTS else "文件不存在")
+            skipped.append(_report_entry(path, "unmatched", item_id, slot, error=reason))
+            continue
+        tasks.append(UploadTask(path, slot, *ref))
+    return tasks, skipped
+
+
+def upload_one(
+    client: ApiClient,
+    task: UploadTask,
+    url: str,
+    journal: Optional[UploadJournal] = None,
+    hash_cache: Optional[HashCache] = None,
+) -> Dict[str, Any]:
+    """
+    上传单个文件。提供 journal 时先计算文件哈希（有 hash_cache 时复用未变化文件的缓存哈希）：
+    日志中已确认上传过相同内容则跳过，否则上传并把结果追加到日志。
+    """
+    start = time.perf_counter()
+    sha256 = ""
+    size = None
+    try:
+        if journal is not None:
+            send_path = str(task.send_path)
+            sha256 = hash_cache.sha256(send_path) if hash_cache else file_sha256(send_path)
+            size = os.path.getsize(send_path)
+            if journal.is_confirmed("item", task.item_id, task.slot, sha256, size):
+                return _report_entry(task.path, "skipped", task.item_id, task.slot, sha256=sha256)
+        resp = post_item_update(client, task.form_data(), {task.slot: str(task.send_path)}, url=url)
+    except Exception as e:
+        if journal is not None:
+            journal.record("item", task.item_id, task.slot, str(task.path), sha256, "failed", response=str(e), size=size)
+        return _report_entry(task.path, "failed", task.item_id, task.slot, error=str(e), elapsed=round(time.perf_counter() - start, 3))
+    status = "ok" if response_ok(resp) else "failed"
+    if journal is not None:
+        journal.record("item", task.item_id, task.slot, str(task.path), sha256, status, resp.status_code, resp.text[:500], size)
+    return _report_entry(
+        task.path,
+        status,
+        task.item_id,
+        task.slot,
+        httpStatus=resp.status_code,
+        response=resp.text[:500],
+        elapsed=round(time.perf_counter() - start, 3),
+    )
+
+
+def optimize_tasks(tasks: List[UploadTask], spec_file: Optional[str], quantize: bool, workers: Optional[int]) -> None:
+    """
+    上传前按各字段规格优化图片（进程池并行，结果按源文件哈希缓存），并把任务的上传文件替换为优化结果。
+    优化失败的任务仍上传原图。
+    """
+    specs = load_slot_specs(spec_file)
+    jobs = [(str(t.path), settings_for_slot(t.slot, specs, quantize=quantize)) for t in tasks]
+    for task, result in zip(tasks, optimize_many(jobs, workers=workers)):
+        if "error" in result:
+            print(f"优化失败，改为上传原图: {task.path} - {result['error']}")
+            continue
+        task.upload_path = Path(result["outputs"]["image"])
+
+
+def validate_tasks(
+    tasks: List[UploadTask],
+    spec_file: Optional[str],
+    deep: bool,
+    index: Optional[AssetIndex] = None,
+) -> UploadPlan:
+    """
+    上传前按各字段规格校验图片，返回 (通过的任务, 校验出错误的报告条目)。
+    只有警告（尺寸或大小超标等）的任务照常上传。给出 index 时直接使用其中的文件头信息。
+    """
+    known = index_infos(index) if index is not None else None
+    specs = load_slot_specs(spec_file)
+    by_slot: Dict[str, List[UploadTask]] = {}
+    for task in tasks:
+        by_slot.setdefault(task.slot, []).append(task)
+    invalid: Dict[int, Dict[str, Any]] = {}
+    for slot, slot_tasks in by_slot.items():
+        entries = validate_files([str(t.path) for t in slot_tasks], specs[slot], deep, known=known)
+        for task, entry in zip(slot_tasks, entries):
+            errors = [issue["message"] for issue in entry["issues"] if issue["severity"] == ERROR]
+            if errors:
+                invalid[id(task)] = _report_entry(task.path, "invalid", task.item_id, slot, error="; ".join(errors))
+    return [t for t in tasks if id(t) not in invalid], list(invalid.values())
+
+
+def upload_tasks(
+    client: ApiClient,
+    tasks: List[UploadTask],
+    workers: int,
+    url: str = UPDATE_ITEM_URL,
+    journal: Optional[UploadJournal] = None,
+    hash_cache: Optional[HashCache] = None,
+) -> List[Dict[str, Any]]:
+    """
+    使用有界线程池并发上传，按任务顺序返回每个任务的结果。
+    """
+    results: List[Dict[str, Any]] = []
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        for result in pool.map(lambda t: upload_one(client, t, url, journal, hash_cache), tasks):
+            print(f"[{result['status']}] {result['gamingItemId']} {result['slot']} <- {result['file']}")
+            results.append(result)
+    return results
+
+
+def upload_tasks_async(
+    engine: AsyncUploader,
+    tasks: List[UploadTask],
+    url: str = UPDATE_ITEM_URL,
+    journal: Optional[UploadJournal] = None,
+    hash_cache: Optional[HashCache] = None,
+) -> List[Dict[str, Any]]:
+    """
+    使用异步上传引擎上传，按完成顺序返回每个任务的结果。哈希计算与日志比对在任务来源中惰性进行，
+    引擎队列满时暂停，与上传重叠执行；每个任务完成时立即写入日志。
+    """
+    results: List[Dict[str, Any]] = []
+
+    def report(entry: Dict[str, Any]) -> None:
+        print(f"[{entry['status']}] {entry['gamingItemId']} {entry['slot']} <- {entry['file']}")
+        results.append(entry)
+
+    def jobs():
+        for task in tasks:
+            sha256, size = "", None
+            if journal is not None:
+                send_path = str(task.send_path)
+                try:
+                    sha256 = hash_cache.sha256(send_path) if hash_cache else file_sha256(send_path)
+                    size = os.path.getsize(send_path)
+                except OSError as e:
+                    report(_report_entry(task.path, "failed", task.item_id, task.slot, error=str(e)))
+                    continue
+                if journal.is_confirmed("item", task.item_id, task.slot, sha256, size):
+                    report(_report_entry(task.path, "skipped", task.item_id, task.slot, sha256=sha256))
+                    continue
+            make_body = partial(build_update_form, task.form_data(), {task.slot: str(task.send_path)})
+            yield UploadJob(url, make_body, (task, sha256, size))
+
+    def on_result(result: UploadResult) -> None:
+        task, sha256, size = result.job.tag
+        elapsed = round(result.elapsed, 3)
+        if result.status is None:
+            if journal is not None:
+                journal.record("item", task.item_id, task.slot, str(task.path), sha256, "failed", response=result.error, size=size)
+            report(_report_entry(task.path, "failed", task.item_id, task.slot, error=result.error, elapsed=elapsed))
+            return
+        status = "ok" if status_text_ok(result.status, result.text) else "failed"
+        if journal is not None:
+            journal.record("item", task.item_id, task.slot, str(task.path), sha256, status, result.status, result.text[:500], size)
+        report(
+            _report_entry(
+                task.path,
+                status,
+                task.item_id,
+                task.slot,
+                httpStatus=result.status,
+                response=result.text[:500],
+                elapsed=elapsed,
+                attempts=result.attempts,
+            )
+        )
+
+    engine.run_sync(jobs(), on_result)
+    return results
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="批量上传游戏项图片（按目录树或清单解析 gamingItemId）")
+    parser.add_argument("--root", type=str, default="gamingType", help="图片目录树根路径，默认 gamingType")
+    parser.add_argument("--json-file", type=str, default="gaming_platforms.json", help="游戏数据 JSON 文件路径")
+    parser.add_argument("--manifest", type=str, default=None, help="上传清单（JSON 数组），指定后不再扫描目录树")
+    parser.add_argument("--types", type=str, default=None, help="只处理这些 gamingType 目录，逗号分隔，例如 4")
+    parser.add_argument("--platform", action="append", default=None, help="只处理指定平台目录，可重复")
+    parser.add_argument("--slot", type=str, default="icon2File", choices=ITEM_FILE_SLOTS, help="图片上传到的字段，默认 icon2File")
+    parser.add_argument("--workers", type=int, default=4, help="并发上传的线程数，默认 4")
+    parser.add_argument("--url", type=str, default=UPDATE_ITEM_URL, help="更新接口 URL")
+    parser.add_argument("--report", type=str, default="upload_report.json", help="上传结果报告输出路径")
+    parser.add_argument(
+        "--journal",
+        type=str,
+        default=DEFAULT_JOURNAL_PATH,
+        help="上传日志路径（JSONL），重跑时跳过日志中已确认上传过的相同文件",
+    )
+    parser.add_argument(
+        "--hash-cache",
+        type=str,
+        default=DEFAULT_HASH_CACHE_PATH,
+        help="文件哈希缓存路径，大小与修改时间未变的文件不再重新计算哈希",
+    )
+    parser.add_argument("--no-journal", action="store_true", help="不读写上传日志，全部重新上传")
+    parser.add_argument(
+        "--index",
+        type=str,
+        default=None,
+        help="资源索引路径（asset_index.py）：同步后直接使用其中的 SHA-256 与文件头信息，不再另行计算",
+    )
+    parser.add_argument("--optimize", action="store_true", help="上传前按字段规格缩放并重新压缩图片（需要 Pillow）")
+    parser.add_argument("--quantize", action="store_true", help="与 --optimize 一起使用：近无损量化为 256 色")
+    parser.add_argument("--spec-file", type=str, default=None, help="覆盖默认图片规格的 JSON 文件")
+    parser.add_argument("--validate", action="store_true", help="上传前校验图片，跳过截断、损坏或格式不符的文件")
+    parser.add_argument("--deep", action="store_true", help="与 --validate 一起使用：完整解码图片（需要 Pillow）")
+    parser.add_argument(
+        "--async",
+        dest="use_async",
+        action="store_true",
+        help="使用异步上传引擎（需要 aiohttp；--workers 为同时在途的请求数），可配合 --bandwidth 限制总上行带宽",
+    )
+    parser.add_argument(
+        "--bandwidth",
+        type=parse_rate,
+        default=0,
+        help="与 --async 一起使用：总上行带宽上限，例如 512K、2M、1.5MB/s（字节/秒），默认不限",
+    )
+    parser.add_argument("--timeout", type=float, default=120.0, help="与 --async 一起使用：单个请求的超时秒数（不含限速等待），默认 120")
+    parser.add_argument("--retries", type=int, default=3, help="与 --async 一起使用：超时、连接错误或 5xx 时的重试次数，默认 3")
+    parser.add_argument("--dry-run", action="store_true", help="预览模式，只解析并输出计划，不实际上传")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    if args.use_async and not HAS_AIOHTTP:
+        raise SystemExit("--async 需要安装 aiohttp：pip install aiohttp")
+    try:
+        resolver = ItemResolver(load_platforms(args.json_file))
+    except (OSError, ValueError) as e:
+        print(f"无法加载游戏数据: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.manifest:
+        tasks, skipped = plan_from_manifest(resolver, Path(args.manifest), args.slot)
+    else:
+        root = Path(args.root)
+        if not root.is_dir():
+            print(f"目录不存在: {root}", file=sys.stderr)
+            sys.exit(1)
+        types = [t.strip() for t in args.types.split(",") if t.strip()] if args.types else None
+        tasks, skipped = plan_from_tree(resolver, root, args.slot, types, args.platform)
+
+    index = open_asset_index(args.index, args.root, args.json_file) if args.index else None
+    if args.validate:
+        tasks, invalid = validate_tasks(tasks, args.spec_file, args.deep, index)
+        for entry in invalid:
+            print(f"[校验失败] {entry['file']}: {entry['error']}")
+        skipped += invalid
+    print(f"待上传 {len(tasks)} 个文件，跳过 {len(skipped)} 个（未匹配、重复或校验失败）")
+    if args.dry_run:
+        results = [_report_entry(t.path, "planned", t.item_id, t.slot) for t in tasks]
+        for r in results:
+            print(f"[预览] {r['gamingItemId']} {r['slot']} <- {r['file']}")
+    else:
+        if args.optimize:
+            optimize_tasks(tasks, args.spec_file, args.quantize, None)
+        journal = None if args.no_journal else UploadJournal(args.journal)
+        hash_cache = IndexedHashCache(index, args.hash_cache) if index is not None else HashCache(args.hash_cache)
+        try:
+            if args.use_async:
+                engine = AsyncUploader(
+                    headers=HEADERS,
+                    concurrency=args.workers,
+                    bandwidth=args.bandwidth,
+                    timeout=args.timeout,
+                    retries=args.retries,
+                )
+                results = upload_tasks_async(engine, tasks, url=args.url, journal=journal, hash_cache=hash_cache)
+                print(engine.summary())
+            else:
+                with ApiClient(headers=HEADERS, pool_size=max(1, args.workers)) as client:
+                    results = upload_tasks(
+                        client, tasks, args.workers, url=args.url, journal=journal, hash_cache=hash_cache
+                    )
+                    print(client.summary())
+        finally:
+            hash_cache.save()
+            if journal is not None:
+                journal.close()
+    if index is not None:
+        index.close()
+
+    report = results + skipped
+    write_json_atomic(args.report, report, indent=2)
+    counts: Dict[str, int] = {}
+    for r in report:
+        counts[r["status"]] = counts.get(r["status"], 0) + 1
+    print(f"完成: {counts}，报告已保存到 {args.report}")
+    if any(r["status"] == "failed" for r in results):
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
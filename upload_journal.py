@@ -0,0 +1,105 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+# (对象类型 item/platform, 对象 ID, 图片字段)
+JournalKey = Tuple[str, str, str]
+
+DEFAULT_JOURNAL_PATH = "upload_journal.jsonl"
+
+
+def file_sha256(path: str, chunk_size: int = 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class UploadJournal:
+    """
+    追加写入的 JSONL 上传日志，每次上传（无论成败）写一行：
+    {"ts", "kind", "id", "slot", "file", "sha256", "size", "status", "httpStatus", "response"}
+    打开时回放已有记录，得到每个 (kind, id, slot) 最近一次成功上传的文件哈希与大小，
+    即"已上传内容清单"；重跑时哈希与大小都相同的上传可直接跳过。
+    每行写入后立即 flush 并 fsync，进程崩溃最多丢失正在写的那一行，回放时会忽略无法解析的残缺行。
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._confirmed: Dict[JournalKey, Dict[str, Any]] = {}
+        self._replay()
+        self._file = open(path, "a", encoding="utf-8")
+
+    def _replay(self) -> None:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    if entry.get("status") == "ok":
+                        key = (entry["kind"], str(entry["id"]), entry["slot"])
+                        self._confirmed[key] = entry
+        except FileNotFoundError:
+            pass
+
+    def confirmed(self, kind: str, target_id: Any, slot: str) -> Optional[Dict[str, Any]]:
+        """
+        返回该字段最近一次成功上传的日志条目（没有则为 None）。
+        """
+        with self._lock:
+            return self._confirmed.get((kind, str(target_id), slot))
+
+    def is_confirmed(self, kind: str, target_id: Any, slot: str, sha256: str, size: Optional[int] = None) -> bool:
+        entry = self.confirmed(kind, target_id, slot)
+        if entry is None or entry.get("sha256") != sha256:
+            return False
+        return size is None or entry.get("size") in (None, size)
+
+    def record(
+        self,
+        kind: str,
+        target_id: Any,
+        slot: str,
+        file: str,
+        sha256: str,
+        status: str,
+        http_status: Optional[int] = None,
+        response: Optional[str] = None,
+        size: Optional[int] = None,
+    ) -> None:
+        entry = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "kind": kind,
+            "id": str(target_id),
+            "slot": slot,
+            "file": file,
+            "sha256": sha256,
+            "size": size,
+            "status": status,
+            "httpStatus": http_status,
+            "response": response,
+        }
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            if status == "ok":
+                self._confirmed[(kind, str(target_id), slot)] = entry
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+    def __enter__(self) -> "UploadJournal":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
@@ -0,0 +1,236 @@
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from api_client import ApiClient, response_ok
+from asset_index import IndexedHashCache, open_asset_index
+from asset_tree import ItemResolver, iter_platform_images, load_platforms
+from hash_cache import DEFAULT_HASH_CACHE_PATH, HashCache
+from response_cache import write_json_atomic
+from updateGamePlatfrom import HEADERS, PLATFORM_FILE_SLOTS, UPDATE_PLATFORM_URL, post_platform_update
+from upload_journal import DEFAULT_JOURNAL_PATH, UploadJournal, file_sha256
+
+
+@dataclass
+class PlatformUpload:
+    platform: Dict[str, Any]
+    images: Dict[str, Path] = field(default_factory=dict)  # 图片字段 -> 文件
+
+    @property
+    def platform_id(self) -> str:
+        return str(self.platform.get("gamingPlatformId"))
+
+    def form_data(self) -> Dict[str, str]:
+        return {
+            "gamingPlatformId": self.platform_id,
+            "gamingType": str(self.platform.get("gamingType", "")),
+        }
+
+
+def _report_entry(path: Path, status: str, platform_id: Optional[str] = None, slot: Optional[str] = None, **extra: Any) -> Dict[str, Any]:
+    entry: Dict[str, Any] = {"file": str(path), "gamingPlatformId": platform_id, "slot": slot, "status": status}
+    entry.update(extra)
+    return entry
+
+
+def split_slot(stem: str, default_slot: str) -> Tuple[str, str]:
+    """
+    从文件名拆出平台标识与图片字段：PG电子_icon4File -> (PG电子, icon4File)，PG电子 -> (PG电子, default_slot)。
+    """
+    head, sep, tail = stem.rpartition("_")
+    if sep and tail in PLATFORM_FILE_SLOTS:
+        return head, tail
+    return stem, default_slot
+
+
+def plan_platform_uploads(
+    resolver: ItemResolver,
+    root: Path,
+    default_slot: str,
+    gaming_types: Optional[List[str]] = None,
+) -> Tuple[List[PlatformUpload], List[Dict[str, Any]]]:
+    """
+    扫描 root/{type}/ 下的平台图片，按文件名（平台名、gamingPlatformCode 或 gamingPlatformId，
+    可带 _{图片字段} 后缀）解析为平台。同一平台的多个字段合并为一次请求；
+    平台名对应多个平台（同名平台）时每个平台都会更新。返回 (上传列表, 未能上传的报告条目)。
+    """
+    uploads: Dict[str, PlatformUpload] = {}
+    skipped: List[Dict[str, Any]] = []
+    for path in iter_platform_images(root, gaming_types):
+        ref, slot = split_slot(path.stem, default_slot)
+        platforms = resolver.find_platforms_by_ref(path.parent.name, ref)
+        if not platforms:
+            skipped.append(_report_entry(path, "unmatched", slot=slot))
+            continue
+        for platform in platforms:
+            upload = uploads.setdefault(str(platform.get("gamingPlatformId")), PlatformUpload(platform))
+            if slot in upload.images:
+                skipped.append(_report_entry(path, "duplicate", upload.platform_id, slot, duplicateOf=str(upload.images[slot])))
+                continue
+            upload.images[slot] = path
+    return list(uploads.values()), skipped
+
+
+def upload_platform(
+    client: ApiClient,
+    upload: PlatformUpload,
+    url: str,
+    journal: Optional[UploadJournal] = None,
+    hash_cache: Optional[HashCache] = None,
+) -> List[Dict[str, Any]]:
+    """
+    上传一个平台的全部图片字段（一次请求），返回每个字段的结果。
+    提供 journal 时，日志中已确认上传过相同内容的字段不再提交；所有字段都已上传过时不发请求。
+    """
+    start = time.perf_counter()
+    results: List[Dict[str, Any]] = []
+    pending: Dict[str, Path] = {}
+    hashes: Dict[str, Tuple[str, int]] = {}
+    for slot, path in upload.images.items():
+        try:
+            if journal is not None:
+                sha256 = hash_cache.sha256(str(path)) if hash_cache else file_sha256(str(path))
+                size = os.path.getsize(path)
+                hashes[slot] = (sha256, size)
+                if journal.is_confirmed("platform", upload.platform_id, slot, sha256, size):
+                    results.append(_report_entry(path, "skipped", upload.platform_id, slot, sha256=sha256))
+                    continue
+        except OSError as e:
+            results.append(_report_entry(path, "failed", upload.platform_id, slot, error=str(e)))
+            continue
+        pending[slot] = path
+    if not pending:
+        return results
+
+    try:
+        resp = post_platform_update(client, upload.form_data(), {s: str(p) for s, p in pending.items()}, url=url)
+    except Exception as e:
+        for slot, path in pending.items():
+            if journal is not None:
+                sha256, size = hashes[slot]
+                journal.record("platform", upload.platform_id, slot, str(path), sha256, "failed", response=str(e), size=size)
+            results.append(_report_entry(path, "failed", upload.platform_id, slot, error=str(e)))
+        return results
+    status = "ok" if response_ok(resp) else "failed"
+    elapsed = round(time.perf_counter() - start, 3)
+    for slot, path in pending.items():
+        if journal is not None:
+            sha256, size = hashes[slot]
+            journal.record("platform", upload.platform_id, slot, str(path), sha256, status, resp.status_code, resp.text[:500], size)
+        results.append(
+            _report_entry(path, status, upload.platform_id, slot, httpStatus=resp.status_code, response=resp.text[:500], elapsed=elapsed)
+        )
+    return results
+
+
+def upload_platforms(
+    client: ApiClient,
+    uploads: List[PlatformUpload],
+    workers: int,
+    url: str = UPDATE_PLATFORM_URL,
+    journal: Optional[UploadJournal] = None,
+    hash_cache: Optional[HashCache] = None,
+) -> List[Dict[str, Any]]:
+    """
+    使用有界线程池并发上传（每个平台一个请求），按平台顺序返回所有字段的结果。
+    """
+    results: List[Dict[str, Any]] = []
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        for platform_results in pool.map(lambda u: upload_platform(client, u, url, journal, hash_cache), uploads):
+            for result in platform_results:
+                print(f"[{result['status']}] {result['gamingPlatformId']} {result['slot']} <- {result['file']}")
+            results.extend(platform_results)
+    return results
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="批量上传平台图片（gamingType/{type}/{平台}.png，按文件名解析 gamingPlatformId）")
+    parser.add_argument("--root", type=str, default="gamingType", help="图片目录树根路径，默认 gamingType")
+    parser.add_argument("--json-file", type=str, default="gaming_platforms.json", help="游戏数据 JSON 文件路径")
+    parser.add_argument("--types", type=str, default=None, help="只处理这些 gamingType 目录，逗号分隔，例如 4")
+    parser.add_argument(
+        "--slot",
+        type=str,
+        default="icon5File",
+        choices=PLATFORM_FILE_SLOTS,
+        help="文件名不带 _{图片字段} 后缀时上传到的字段，默认 icon5File",
+    )
+    parser.add_argument("--workers", type=int, default=4, help="并发上传的线程数，默认 4")
+    parser.add_argument("--url", type=str, default=UPDATE_PLATFORM_URL, help="更新接口 URL")
+    parser.add_argument("--report", type=str, default="platform_upload_report.json", help="上传结果报告输出路径")
+    parser.add_argument(
+        "--journal",
+        type=str,
+        default=DEFAULT_JOURNAL_PATH,
+        help="上传日志路径（JSONL），重跑时跳过日志中已确认上传过的相同文件",
+    )
+    parser.add_argument(
+        "--hash-cache",
+        type=str,
+        default=DEFAULT_HASH_CACHE_PATH,
+        help="文件哈希缓存路径，大小与修改时间未变的文件不重新计算哈希",
+    )
+    parser.add_argument("--no-journal", action="store_true", help="不读写上传日志，全部重新上传")
+    parser.add_argument("--index", type=str, default=None, help="资源索引路径（asset_index.py）：同步后直接使用其中的 SHA-256")
+    parser.add_argument("--dry-run", action="store_true", help="预览模式，只解析并输出计划，不实际上传")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    try:
+        resolver = ItemResolver(load_platforms(args.json_file))
+    except (OSError, ValueError) as e:
+        print(f"无法加载游戏数据: {e}", file=sys.stderr)
+        sys.exit(1)
+    root = Path(args.root)
+    if not root.is_dir():
+        print(f"目录不存在: {root}", file=sys.stderr)
+        sys.exit(1)
+    types = [t.strip() for t in args.types.split(",") if t.strip()] if args.types else None
+    uploads, skipped = plan_platform_uploads(resolver, root, args.slot, types)
+
+    files = sum(len(u.images) for u in uploads)
+    print(f"待上传 {len(uploads)} 个平台（{files} 个文件），跳过 {len(skipped)} 个（未匹配或重复）")
+    if args.dry_run:
+        results = [
+            _report_entry(path, "planned", u.platform_id, slot)
+            for u in uploads
+            for slot, path in u.images.items()
+        ]
+        for r in results:
+            print(f"[预览] {r['gamingPlatformId']} {r['slot']} <- {r['file']}")
+    else:
+        journal = None if args.no_journal else UploadJournal(args.journal)
+        index = open_asset_index(args.index, args.root, args.json_file) if args.index else None
+        hash_cache = IndexedHashCache(index, args.hash_cache) if index is not None else HashCache(args.hash_cache)
+        try:
+            with ApiClient(headers=HEADERS, pool_size=max(1, args.workers)) as client:
+                results = upload_platforms(
+                    client, uploads, args.workers, url=args.url, journal=journal, hash_cache=hash_cache
+                )
+                print(client.summary())
+        finally:
+            hash_cache.save()
+            if journal is not None:
+                journal.close()
+            if index is not None:
+                index.close()
+
+    report = results + skipped
+    write_json_atomic(args.report, report, indent=2)
+    counts: Dict[str, int] = {}
+    for r in report:
+        counts[r["status"]] = counts.get(r["status"], 0) + 1
+    print(f"完成: {counts}，报告已保存到 {args.report}")
+    if any(r["status"] == "failed" for r in results):
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
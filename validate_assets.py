@@ -0,0 +1,230 @@
+import argparse
+import os
+import struct
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow 为可选依赖，仅 --deep 需要
+    Image = None
+
+from asset_index import AssetIndex, open_asset_index
+from asset_tree import iter_tree_images
+from icon_specs import load_slot_specs
+from image_info import ImageHeaderError, ImageInfo, read_image_info
+from response_cache import write_json_atomic
+
+
+DEFAULT_REPORT_PATH = "validation_report.json"
+
+ERROR = "error"
+WARNING = "warning"
+
+_PNG_IEND = b"\x00\x00\x00\x00IEND\xaeB`\x82"
+
+# (路径, 规格, 是否完整解码, 已知的文件头信息)
+ValidateJob = Tuple[str, Dict[str, Any], bool, Optional[ImageInfo]]
+
+
+def _issue(severity: str, code: str, message: str) -> Dict[str, str]:
+    return {"severity": severity, "code": code, "message": message}
+
+
+def check_complete(path: str, fmt: str, size: int) -> Optional[str]:
+    """
+    读取文件末尾判断是否被截断（PNG 以 IEND 结束、JPEG 以 EOI 结束等），完整时返回 None。
+    """
+    with open(path, "rb") as f:
+        if fmt == "WEBP" or fmt == "BMP":
+            head = f.read(12)
+            declared = struct.unpack("<I", head[4:8] if fmt == "WEBP" else head[2:6])[0]
+            expected = declared + 8 if fmt == "WEBP" else declared
+            return f"文件声明 {expected} 字节，实际 {size} 字节" if size < expected else None
+        f.seek(max(0, size - 32))
+        tail = f.read()
+    if fmt == "PNG" and not tail.endswith(_PNG_IEND):
+        return "缺少 IEND 段"
+    # 部分编码器会在 EOI 之后补零
+    if fmt == "JPEG" and not tail.rstrip(b"\x00\r\n ").endswith(b"\xff\xd9"):
+        return "缺少 EOI 标记 (FFD9)"
+    if fmt == "GIF" and not tail.endswith(b";"):
+        return "缺少结束符 (0x3B)"
+    return None
+
+
+def _decode(path: str) -> Optional[str]:
+    try:
+        with Image.open(path) as im:
+            im.load()
+    except Exception as e:
+        return str(e) or type(e).__name__
+    return None
+
+
+def validate_file(job: ValidateJob) -> Dict[str, Any]:
+    """
+    按字段规格检查一个文件，返回报告条目（issues 为空表示通过）。
+    """
+    path, spec, deep, info = job
+    entry: Dict[str, Any] = {"file": path, "bytes": None, "format": None, "width": None, "height": None,
+                             "alpha": None, "issues": []}
+    issues: List[Dict[str, str]] = entry["issues"]
+    try:
+        size = os.path.getsize(path)
+        entry["bytes"] = size
+        if info is None:
+            info = read_image_info(path)
+    except ImageHeaderError as e:
+        issues.append(_issue(ERROR, "header", str(e)))
+        return entry
+    except OSError as e:
+        issues.append(_issue(ERROR, "unreadable", str(e)))
+        return entry
+    entry.update(format=info.format, width=info.width, height=info.height, alpha=info.alpha)
+
+    try:
+        truncated = check_complete(path, info.format, size)
+    except (OSError, struct.error) as e:
+        truncated = str(e)
+    if truncated:
+        issues.append(_issue(ERROR, "truncated", truncated))
+    if deep:
+        error = _decode(path)
+        if error:
+            issues.append(_issue(ERROR, "decode", error))
+
+    if info.format not in spec["formats"]:
+        issues.append(_issue(ERROR, "format", f"格式 {info.format} 不在允许列表 {spec['formats']} 中"))
+    want_w, want_h = spec["size"]
+    if info.width > want_w or info.height > want_h:
+        issues.append(_issue(WARNING, "dimensions", f"尺寸 {info.width}x{info.height} 超过 {want_w}x{want_h}"))
+    elif (info.width, info.height) != (want_w, want_h):
+        issues.append(_issue(WARNING, "dimensions", f"尺寸 {info.width}x{info.height} 与规格 {want_w}x{want_h} 不符"))
+    if size > spec["maxBytes"]:
+        issues.append(_issue(WARNING, "bytes", f"{size / 1024:.0f} KB 超过上限 {spec['maxBytes'] / 1024:.0f} KB"))
+    if info.alpha and not spec["alpha"]:
+        issues.append(_issue(WARNING, "alpha", "带透明通道，但该字段不保留透明"))
+    return entry
+
+
+def validate_files(
+    paths: List[str],
+    spec: Dict[str, Any],
+    deep: bool = False,
+    workers: Optional[int] = None,
+    known: Optional[Dict[str, ImageInfo]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    在进程池中并行检查文件，按输入顺序返回报告条目。known 为已知的文件头信息（例如来自资源索引），
+    命中的文件不再解析文件头。
+    """
+    if deep and Image is None:
+        raise SystemExit("--deep 需要安装 Pillow：pip install Pillow")
+    known = known or {}
+    jobs = [(path, spec, deep, known.get(path)) for path in paths]
+    # 只读文件头时单个任务很轻，加大 chunksize 以减少进程间通信
+    chunksize = 4 if deep else 64
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(validate_file, jobs, chunksize=chunksize))
+
+
+def summarize(entries: List[Dict[str, Any]]) -> Dict[str, int]:
+    summary = {"files": len(entries), "ok": 0, "warnings": 0, "errors": 0}
+    for entry in entries:
+        severities = {issue["severity"] for issue in entry["issues"]}
+        if ERROR in severities:
+            summary["errors"] += 1
+        elif WARNING in severities:
+            summary["warnings"] += 1
+        else:
+            summary["ok"] += 1
+    return summary
+
+
+def infos_from_index(index_path: str, root: Path, json_file: Optional[str] = None) -> Dict[str, ImageInfo]:
+    """
+    从资源索引（asset_index.py）取出文件头信息，以 str(root / 相对路径) 为键。
+    通过 open_asset_index 同步索引，给出 json_file 时新增或变化的文件同时匹配 gamingItemId。
+    """
+    with open_asset_index(index_path, str(root), json_file) as index:
+        return index_infos(index)
+
+
+def index_infos(index: AssetIndex) -> Dict[str, ImageInfo]:
+    """
+    把已打开的 AssetIndex 中的文件头信息转为 validate_files 的 known 参数，以 str(index.root / 相对路径) 为键。
+    """
+    infos: Dict[str, ImageInfo] = {}
+    for row in index.assets():
+        if row["format"] is None:
+            continue  # 文件头无法解析的文件交给校验重新报告错误
+        alpha = None if row["alpha"] is None else bool(row["alpha"])
+        infos[str(index.root / row["path"])] = ImageInfo(row["format"], row["width"], row["height"], alpha)
+    return infos
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="按图片字段规格校验目录树中的图片，输出校验报告")
+    parser.add_argument("--root", type=str, default="gamingType", help="图片目录树根路径，默认 gamingType")
+    parser.add_argument("--types", type=str, default=None, help="只处理这些 gamingType 目录，逗号分隔")
+    parser.add_argument("--platform", action="append", default=None, help="只处理指定平台目录，可重复")
+    parser.add_argument("--files", nargs="+", default=None, help="直接指定要校验的文件，指定后不再扫描目录树")
+    parser.add_argument("--slot", type=str, default="icon2File", help="按哪个图片字段的规格校验，默认 icon2File")
+    parser.add_argument("--spec-file", type=str, default=None, help="覆盖默认图片规格的 JSON 文件")
+    parser.add_argument("--deep", action="store_true", help="完整解码每张图片（需要 Pillow，较慢）")
+    parser.add_argument("--index", type=str, default=None, help="使用资源索引中的文件头信息（asset_index.py 的索引文件）")
+    parser.add_argument(
+        "--json-file",
+        type=str,
+        default="gaming_platforms.json",
+        help="与 --index 一起使用：同步索引时用于匹配 gamingItemId 的游戏数据",
+    )
+    parser.add_argument("--workers", type=int, default=None, help="进程数，默认为 CPU 核数")
+    parser.add_argument("--strict", action="store_true", help="有警告时也以非零状态退出")
+    parser.add_argument("--report", type=str, default=DEFAULT_REPORT_PATH, help=f"报告输出路径，默认 {DEFAULT_REPORT_PATH}")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    specs = load_slot_specs(args.spec_file)
+    if args.slot not in specs:
+        print(f"未知的图片字段: {args.slot}（可选: {', '.join(sorted(specs))}）", file=sys.stderr)
+        sys.exit(1)
+    spec = specs[args.slot]
+
+    root = Path(args.root)
+    if args.files:
+        paths = args.files
+    else:
+        if not root.is_dir():
+            print(f"目录不存在: {root}", file=sys.stderr)
+            sys.exit(1)
+        types = [t.strip() for t in args.types.split(",") if t.strip()] if args.types else None
+        paths = [str(p) for p in iter_tree_images(root, types, args.platform)]
+    known = infos_from_index(args.index, root, args.json_file) if args.index else None
+
+    entries = validate_files(paths, spec, args.deep, args.workers, known)
+    for entry in entries:
+        for issue in entry["issues"]:
+            label = "错误" if issue["severity"] == ERROR else "警告"
+            print(f"[{label}] {entry['file']}: {issue['message']}")
+    summary = summarize(entries)
+    write_json_atomic(
+        args.report,
+        {"slot": args.slot, "spec": spec, "deep": args.deep, "summary": summary, "files": entries},
+        indent=2,
+    )
+    print(
+        f"共 {summary['files']} 个文件：通过 {summary['ok']}，警告 {summary['warnings']}，"
+        f"错误 {summary['errors']}，报告已保存到 {args.report}"
+    )
+    if summary["errors"] or (args.strict and summary["warnings"]):
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
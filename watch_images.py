@@ -0,0 +1,405 @@
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # watchdog 为可选依赖，未安装时使用目录轮询
+    FileSystemEventHandler = object
+    Observer = None
+
+from api_client import ApiClient
+from asset_tree import ItemRef, ItemResolver, load_platforms
+from fs_plan import CONFLICT, DONE, FsPlan, undo_plan
+from hash_cache import DEFAULT_HASH_CACHE_PATH, HashCache
+from name_matcher import NameMatcher
+from naming import is_image_name, sanitize_name
+from updateGameItemInfo import HEADERS, ITEM_FILE_SLOTS, UPDATE_ITEM_URL
+from upload_item_images import UploadTask, upload_one
+from upload_journal import DEFAULT_JOURNAL_PATH, UploadJournal
+
+
+DEFAULT_UNDO_LOG = "watch_undo.jsonl"
+
+# 监视的目录层级：root/{type}/{平台}/{游戏}
+WATCH_DEPTH = 3
+
+
+class DirPoller:
+    """
+    通过目录的修改时间发现新文件：目录中增删条目时其 mtime 会变化，
+    每次轮询只 stat 已知目录，仅对 mtime 变化的目录重新 scandir，而不是重新扫描整棵树。
+    """
+
+    def __init__(self, root: Path, max_depth: int = WATCH_DEPTH) -> None:
+        self.root = root
+        self.max_depth = max_depth
+        self._dirs: Dict[Path, int] = {}  # 目录 -> 上次列出时的 mtime
+        self._files: Dict[Path, Set[str]] = {}  # 目录 -> 上次列出的文件名
+        self.existing: List[Path] = []  # 启动时已存在的图片
+        self._list(root, 0, initial=True)
+
+    def _depth(self, directory: Path) -> int:
+        return len(directory.relative_to(self.root).parts)
+
+    def _list(self, directory: Path, depth: int, initial: bool = False) -> List[Path]:
+        new_files: List[Path] = []
+        try:
+            mtime = os.stat(directory).st_mtime_ns
+            with os.scandir(directory) as it:
+                entries = list(it)
+        except OSError:
+            self._dirs.pop(directory, None)
+            self._files.pop(directory, None)
+            return new_files
+        self._dirs[directory] = mtime
+        known = self._files.get(directory, set())
+        names: Set[str] = set()
+        for entry in entries:
+            path = Path(entry.path)
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                continue
+            if is_dir:
+                if depth < self.max_depth and path not in self._dirs:
+                    new_files += self._list(path, depth + 1, initial)
+            elif is_image_name(entry.name):
+                names.add(entry.name)
+                if entry.name not in known:
+                    (self.existing if initial else new_files).append(path)
+        self._files[directory] = names
+        return new_files
+
+    def poll(self) -> List[Path]:
+        new_files: List[Path] = []
+        for directory, mtime in list(self._dirs.items()):
+            try:
+                current = os.stat(directory).st_mtime_ns
+            except OSError:
+                self._dirs.pop(directory, None)
+                self._files.pop(directory, None)
+                continue
+            if current != mtime:
+                new_files += self._list(directory, self._depth(directory))
+        return new_files
+
+
+class _EventHandler(FileSystemEventHandler):
+    def __init__(self, watcher: "ImageWatcher") -> None:
+        super().__init__()
+        self.watcher = watcher
+
+    def on_created(self, event: Any) -> None:
+        if not event.is_directory:
+            self.watcher.notice(Path(event.src_path))
+
+    def on_moved(self, event: Any) -> None:
+        if not event.is_directory:
+            self.watcher.notice(Path(event.dest_path))
+
+    def on_modified(self, event: Any) -> None:
+        if not event.is_directory:
+            self.watcher.notice(Path(event.src_path))
+
+
+class ImageWatcher:
+    """
+    把新放入 root/{type}/{平台}/ 的图片归档到位：
+    - 按内存中的目录索引（ItemResolver，ID 或游戏名精确匹配；否则按平台内的包含关系匹配）找到游戏项
+    - layout="folder": 移入游戏目录 {平台}/{游戏名}/（目录已有图片时跳过，与 move_images_by_name 一致）
+    - layout="id": 在平台目录内重命名为 {gamingItemId}.ext（与 rename_images_by_gaming_item 一致）
+    文件大小与修改时间在 debounce 秒内保持不变才处理，避免处理尚未复制完的文件。
+    已在游戏目录中或已按 ID 命名的图片不再处理，因此不会对自己产生的文件重复响应。
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        json_file: str,
+        layout: str = "folder",
+        debounce: float = 0.5,
+        undo_log: Optional[str] = DEFAULT_UNDO_LOG,
+        upload: Optional["UploadQueue"] = None,
+    ) -> None:
+        self.root = root
+        self.json_file = json_file
+        self.layout = layout
+        self.debounce = debounce
+        self.undo_log = undo_log
+        self.upload = upload
+        self._lock = threading.Lock()
+        self._pending: Dict[Path, Tuple[int, int, float]] = {}  # 路径 -> (大小, mtime, 首次观察到该状态的时间)
+        self._ignored: Dict[Path, Tuple[int, int]] = {}  # 未匹配的文件，内容变化前不再重试
+        self._catalog_mtime = 0
+        self._matchers: Dict[Tuple[str, str], NameMatcher] = {}
+        self.resolver = ItemResolver({})
+        self.reload_catalog()
+
+    def reload_catalog(self) -> bool:
+        """
+        目录数据文件变化时重新加载索引，返回是否重新加载。
+        """
+        mtime = os.stat(self.json_file).st_mtime_ns
+        if mtime == self._catalog_mtime:
+            return False
+        self.resolver = ItemResolver(load_platforms(self.json_file))
+        self._matchers.clear()
+        self._ignored.clear()
+        self._catalog_mtime = mtime
+        return True
+
+    def notice(self, path: Path) -> None:
+        if is_image_name(path.name):
+            with self._lock:
+                self._pending.setdefault(path, (-1, -1, 0.0))
+
+    def _ready(self, now: float) -> List[Path]:
+        ready: List[Path] = []
+        with self._lock:
+            for path, (size, mtime, since) in list(self._pending.items()):
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    del self._pending[path]
+                    continue
+                if (st.st_size, st.st_mtime_ns) != (size, mtime):
+                    self._pending[path] = (st.st_size, st.st_mtime_ns, now)
+                elif now - since >= self.debounce:
+                    del self._pending[path]
+                    if self._ignored.get(path) != (size, mtime):
+                        ready.append(path)
+        return ready
+
+    def _platform_matcher(self, gaming_type: str, dir_name: str) -> NameMatcher:
+        key = (gaming_type, dir_name)
+        matcher = self._matchers.get(key)
+        if matcher is None:
+            gaming_map: Dict[str, Any] = {}
+            for platform in self.resolver.find_platforms(gaming_type, dir_name):
+                for item in platform.get("items") or []:
+                    if item.get("gamingItemName"):
+                        gaming_map.setdefault(item["gamingItemName"], item.get("gamingItemId"))
+            matcher = self._matchers[key] = NameMatcher(gaming_map)
+        return matcher
+
+    def match(self, path: Path) -> Optional[ItemRef]:
+        ref = self.resolver.resolve(path, self.root)
+        if ref is not None:
+            return ref
+        parts = path.relative_to(self.root).parts
+        gaming_id = self._platform_matcher(parts[0], parts[1]).match(path.stem)
+        return self.resolver.by_item_id.get(str(gaming_id)) if gaming_id is not None else None
+
+    def target(self, path: Path, ref: ItemRef) -> Path:
+        """
+        返回图片应归档到的位置（已在位时即为 path 本身）。
+        """
+        platform_dir = path.parent
+        item = ref[1]
+        if self.layout == "id":
+            return platform_dir / f"{item.get('gamingItemId')}{path.suffix}"
+        return platform_dir / sanitize_name(item["gamingItemName"]) / path.name
+
+    def process(self, paths: List[Path]) -> List[Dict[str, Any]]:
+        """
+        对一批已稳定的图片计算归档计划并执行，返回每个文件的处理结果。
+        """
+        results: List[Dict[str, Any]] = []
+        plan = FsPlan()
+        refs: Dict[Path, ItemRef] = {}
+        for path in paths:
+            try:
+                parts = path.relative_to(self.root).parts
+            except ValueError:
+                continue
+            if len(parts) != WATCH_DEPTH:
+                continue  # 游戏目录中的图片已在位
+            ref = self.match(path)
+            if ref is None:
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue  # 轮询之后文件已被删除或改名
+                self._ignored[path] = (st.st_size, st.st_mtime_ns)
+                results.append({"file": str(path), "status": "unmatched"})
+                continue
+            dest = self.target(path, ref)
+            if dest == path:
+                continue
+            if self.layout == "folder" and any(is_image_name(p.name) for p in _files(dest.parent)):
+                results.append({"file": str(path), "status": "skipped", "reason": f"已存在图片 {dest.parent}"})
+                continue
+            op = plan.add(path, dest)
+            if op.status == CONFLICT:
+                results.append({"file": str(path), "status": "skipped", "reason": op.reason})
+                continue
+            refs[dest] = ref
+        for op in plan.apply(workers=4, undo_log=self.undo_log):
+            result = {"file": str(op.src), "dest": str(op.dest), "status": "filed" if op.status == DONE else "failed"}
+            if op.status != DONE:
+                result["reason"] = op.reason
+            elif self.upload is not None:
+                self.upload.submit(op.dest, *refs[op.dest])
+            results.append(result)
+        return results
+
+    def tick(self, now: Optional[float] = None) -> List[Dict[str, Any]]:
+        ready = self._ready(time.monotonic() if now is None else now)
+        return self.process(ready) if ready else []
+
+
+def _files(directory: Path) -> List[Path]:
+    try:
+        with os.scandir(directory) as it:
+            return [Path(e.path) for e in it if e.is_file()]
+    except OSError:
+        return []
+
+
+class UploadQueue:
+    """
+    归档后的图片交给有界线程池上传（复用上传日志与哈希缓存，相同内容不会重复上传）。
+    """
+
+    def __init__(self, slot: str, workers: int, url: str, journal_path: str, hash_cache_path: str) -> None:
+        self.slot = slot
+        self.url = url
+        self.client = ApiClient(headers=HEADERS, pool_size=max(1, workers))
+        self.journal = UploadJournal(journal_path)
+        self.hash_cache = HashCache(hash_cache_path)
+        self.pool = ThreadPoolExecutor(max_workers=max(1, workers))
+
+    def submit(self, path: Path, platform: Dict[str, Any], item: Dict[str, Any]) -> None:
+        task = UploadTask(path, self.slot, platform, item)
+        self.pool.submit(self._run, task)
+
+    def _run(self, task: UploadTask) -> None:
+        result = upload_one(self.client, task, self.url, self.journal, self.hash_cache)
+        print(f"[上传 {result['status']}] {result['gamingItemId']} {result['slot']} <- {result['file']}")
+
+    def close(self) -> None:
+        self.pool.shutdown(wait=True)
+        self.hash_cache.save()
+        self.journal.close()
+        self.client.close()
+
+
+def _print_results(results: List[Dict[str, Any]]) -> None:
+    for r in results:
+        if r["status"] == "filed":
+            print(f"归档: {r['file']} -> {r['dest']}")
+        elif r["status"] == "unmatched":
+            print(f"未找到匹配: {r['file']}")
+        elif r["status"] == "failed":
+            print(f"失败: {r['file']} -> {r['dest']}（{r['reason']}）")
+        else:
+            print(f"跳过: {r['file']}（{r.get('reason', '')}）")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="监视 gamingType 目录树，自动归档新放入的图片（可选自动上传）")
+    parser.add_argument("--root", type=str, default="gamingType", help="图片目录树根路径，默认 gamingType")
+    parser.add_argument(
+        "--json-file",
+        type=str,
+        default="gaming_platforms.json",
+        help="游戏数据 JSON 或 .sqlite 目录文件，文件变化时自动重新加载",
+    )
+    parser.add_argument(
+        "--layout",
+        choices=("folder", "id"),
+        default="folder",
+        help="folder: 移入 {平台}/{游戏名}/ 目录（默认）；id: 在平台目录内重命名为 {gamingItemId}.ext",
+    )
+    parser.add_argument("--interval", type=float, default=0.25, help="轮询间隔（秒），默认 0.25")
+    parser.add_argument("--debounce", type=float, default=0.5, help="文件保持不变多少秒后再处理，默认 0.5")
+    parser.add_argument("--process-existing", action="store_true", help="启动时也处理已存在的待归档图片")
+    parser.add_argument("--once", action="store_true", help="处理已存在的图片后退出，不常驻")
+    parser.add_argument("--polling", action="store_true", help="即使安装了 watchdog 也使用目录轮询")
+    parser.add_argument("--undo-log", type=str, default=DEFAULT_UNDO_LOG, help=f"撤销日志路径，默认 {DEFAULT_UNDO_LOG}")
+    parser.add_argument(
+        "--undo",
+        action="store_true",
+        help="按撤销日志把已归档的图片移回平台目录后退出（请先停止常驻进程，否则图片会被再次归档）",
+    )
+    parser.add_argument("--upload", action="store_true", help="归档后自动上传到游戏项图片字段")
+    parser.add_argument("--slot", type=str, default="icon2File", choices=ITEM_FILE_SLOTS, help="上传字段，默认 icon2File")
+    parser.add_argument("--workers", type=int, default=2, help="上传线程数，默认 2")
+    parser.add_argument("--url", type=str, default=UPDATE_ITEM_URL, help="更新接口 URL")
+    parser.add_argument("--journal", type=str, default=DEFAULT_JOURNAL_PATH, help="上传日志路径")
+    parser.add_argument("--hash-cache", type=str, default=DEFAULT_HASH_CACHE_PATH, help="文件哈希缓存路径")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    if args.undo:
+        if not Path(args.undo_log).exists():
+            raise SystemExit(f"撤销日志不存在: {args.undo_log}")
+        ops = undo_plan(args.undo_log, workers=4)
+        for op in ops:
+            status = "还原" if op.status == DONE else "失败"
+            print(f"{status}: {op.describe()}")
+        print(f"完成，还原了 {sum(1 for op in ops if op.status == DONE)} 个文件。")
+        return
+
+    root = Path(args.root)
+    if not root.is_dir():
+        print(f"目录不存在: {root}", file=sys.stderr)
+        sys.exit(1)
+
+    upload = (
+        UploadQueue(args.slot, args.workers, args.url, args.journal, args.hash_cache) if args.upload else None
+    )
+    try:
+        watcher = ImageWatcher(root, args.json_file, args.layout, args.debounce, args.undo_log, upload)
+    except (OSError, ValueError) as e:
+        print(f"无法加载游戏数据: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    poller = DirPoller(root)
+    if args.process_existing or args.once:
+        _print_results(watcher.process(poller.existing))
+    if args.once:
+        if upload is not None:
+            upload.close()
+        return
+
+    observer = None
+    if Observer is not None and not args.polling:
+        observer = Observer()
+        observer.schedule(_EventHandler(watcher), str(root), recursive=True)
+        observer.start()
+    print(f"正在监视 {root.resolve()}（{'watchdog' if observer else '轮询'}，按 Ctrl+C 退出）")
+
+    try:
+        while True:
+            if observer is None:
+                for path in poller.poll():
+                    watcher.notice(path)
+            try:
+                if watcher.reload_catalog():
+                    print(f"已重新加载游戏数据: {args.json_file}")
+            except (OSError, ValueError) as e:
+                print(f"重新加载游戏数据失败，继续使用旧数据: {e}", file=sys.stderr)
+            _print_results(watcher.tick())
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        print("停止监视")
+    finally:
+        if observer is not None:
+            observer.stop()
+            observer.join()
+        if upload is not None:
+            upload.close()
+
+
+if __name__ == "__main__":
+    main()